@@ -0,0 +1,166 @@
+# async_api.py
+"""
+asyncio entry point for embedding the pipeline in a service:
+
+    result = await tailor_async(jd_text)
+    results = await asyncio.gather(*(tailor_async(jd) for jd in jds))
+
+tailor_async() runs the same steps as main1.run_job for one JD, but every wait
+is awaited on the caller's event loop: the LLM calls go through the SDK's async
+client, pdflatex runs as an asyncio subprocess, and file I/O happens in worker
+threads. Nothing is printed; progress messages come back in result["messages"]
+next to the structured resume, output paths, errors, timings and token usage.
+"""
+import os
+import time
+import asyncio
+import weakref
+from src.utils import get_llm_response_async, load_json_async
+from src.resume_builder import build_pdf_async
+from src.portfolio import load_portfolio_index, shortlist_names
+from src import fit, interview_agent, jd, renderers, run_log, tracing
+import main1
+from main1 import PORTFOLIO_PATH, STATIC_PATH
+
+# --- CONFIGURATION ---
+# pdflatex is CPU-bound: more compiles than cores at once only makes each slower
+LATEX_CONCURRENCY = int(os.getenv("LATEX_CONCURRENCY", str(os.cpu_count() or 2)))
+
+_latex_slots = weakref.WeakKeyDictionary()  # event loop -> Semaphore
+
+def _latex_semaphore():
+    loop = asyncio.get_running_loop()
+    if loop not in _latex_slots:
+        _latex_slots[loop] = asyncio.Semaphore(LATEX_CONCURRENCY)
+    return _latex_slots[loop]
+
+async def load_inputs_async(portfolio_path=PORTFOLIO_PATH, static_path=STATIC_PATH):
+    """(portfolio_index, static_data), read off the event loop. Load once and pass them to every tailor_async call."""
+    portfolio_index, static_data = await asyncio.gather(
+        asyncio.to_thread(load_portfolio_index, portfolio_path), load_json_async(static_path))
+    return portfolio_index, static_data
+
+def _read_bytes(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+async def _timed(timings, phase, coro):
+    start = time.perf_counter()
+    try:
+        return await coro
+    finally:
+        timings[phase] = round(time.perf_counter() - start, 3)
+
+async def tailor_async(jd_text, portfolio_index=None, static_data=None, output_dir="output",
+                       prep_dir="interview_prep", formats=None, interview=True, job_id=None, quiet=True):
+    """
+    Tailors a resume (and interview guide) for `jd_text` and returns a dict:
+      meta, base_name   role/company the model read off the JD
+      resume            the tailored resume as plain data (what md/txt/docx render)
+      outputs, pdf_path {format: path} for `formats` (default main1.OUTPUT_FORMATS)
+      pdf_bytes         the PDF file's contents, so a service can send it on directly
+      interview         {"path", "text", "data"} or None
+      fit               one-page trimming report when the PDF was built (see src.fit)
+      error, errors     first failure and a message per failed phase
+      timings, tokens   seconds per phase; token/cost totals per stage
+      messages          the progress messages (printed instead with quiet=False)
+    Portfolio and static data are loaded from the default paths when not given.
+    Runs as its own task, so its run log never leaks into the caller's context.
+    """
+    return await asyncio.create_task(_tailor(jd_text, portfolio_index, static_data, output_dir, prep_dir,
+                                             formats, interview, job_id, quiet))
+
+async def _tailor(jd_text, portfolio_index, static_data, output_dir, prep_dir, formats, interview, job_id, quiet):
+    job_start = time.perf_counter()
+    log = run_log.start_job(job_id or "tailor_async", quiet=quiet)
+    formats = main1.OUTPUT_FORMATS if formats is None else formats
+    timings = {}
+    result = {"job_id": log["job_id"], "meta": None, "base_name": None, "resume": None, "outputs": {},
+              "pdf_path": None, "pdf_bytes": None, "interview": None, "error": None, "errors": {}, "timings": timings}
+    try:
+        if portfolio_index is None or static_data is None:
+            loaded_index, loaded_static = await load_inputs_async()
+            portfolio_index = portfolio_index or loaded_index
+            static_data = static_data or loaded_static
+        if not portfolio_index or not static_data:
+            result["errors"]["tailor"] = "Portfolio or static data not found"
+        else:
+            await _run(jd_text, portfolio_index, static_data, output_dir, prep_dir, formats, interview, result)
+    except Exception as e:
+        result["errors"].setdefault("tailor", f"{type(e).__name__}: {e}")
+
+    for phase in ["tailor", "pdf", *formats, "interview"]:
+        if phase in result["errors"]:
+            result["error"] = result["errors"][phase]
+            break
+    timings["wall"] = round(time.perf_counter() - job_start, 3)
+    result["tokens"] = run_log.token_totals(log["llm_calls"])
+    result["messages"] = log.get("messages", [])
+    return result
+
+async def _run(jd_text, portfolio_index, static_data, output_dir, prep_dir, formats, interview, result):
+    timings = result["timings"]
+    jd_text = jd.clean_jd(jd_text)
+    # May create the context cache (a blocking call), so both run off the event loop
+    jd_text, portfolio_text = await asyncio.to_thread(main1.fit_to_budget, jd_text, portfolio_index)
+    if jd_text is None:
+        result["errors"]["tailor"] = "Token budget too small"; return
+    shared = await asyncio.to_thread(main1.shares_prefix, portfolio_index)
+    shortlist = shortlist_names(portfolio_index, jd_text) if shared else None
+
+    prefix, prompt = main1.build_tailor_prefix(portfolio_text), main1.build_tailor_suffix(jd_text, shortlist)
+    response = await _timed(timings, "tailor", get_llm_response_async(prompt, prefix=prefix))
+    if not response:
+        result["errors"]["tailor"] = "AI returned no response"; return
+
+    prepared = main1.prepare_resume(response, static_data, pdf="pdf" in formats)
+    base_name = result["base_name"] = prepared["base_name"]
+    result["meta"], result["resume"] = prepared["meta"], prepared["plain_final"]
+    output_path = os.path.join(output_dir, f"Resume_Om_Asanani_{base_name}.pdf")
+    await asyncio.to_thread(os.makedirs, output_dir, exist_ok=True)
+
+    async def pdf_phase():
+        async with _latex_semaphore():
+            if not fit.FIT_ONE_PAGE:
+                return await build_pdf_async(prepared["final_data"], output_filename=output_path, clean=False)
+            path, result["fit"] = await fit.build_fitted_async(prepared["final_data"], output_path,
+                                                               jd_text=jd_text, clean=False)
+            return path
+
+    async def interview_phase():
+        report = {}
+        path = await interview_agent.generate_interview_guide_async(
+            jd_text, prepared["plain_data"], base_name, output_dir=prep_dir, report=report)
+        return {"path": path, **report} if path else None
+
+    text_formats = [f for f in formats if f != "pdf"]
+    phases = {}
+    if "pdf" in formats:
+        phases["pdf"] = _timed(timings, "pdf", pdf_phase())
+    if text_formats:
+        phases["render"] = _timed(timings, "render", asyncio.to_thread(
+            renderers.write_outputs, prepared["plain_final"], text_formats, os.path.splitext(output_path)[0]))
+    if interview:
+        phases["interview"] = _timed(timings, "interview", interview_phase())
+    with tracing.span("phases"):
+        done = dict(zip(phases, await asyncio.gather(*phases.values(), return_exceptions=True)))
+
+    for phase, value in done.items():
+        if isinstance(value, Exception):
+            result["errors"][phase] = f"{type(value).__name__}: {value}"
+    if isinstance(done.get("render"), dict):
+        result["outputs"].update(done["render"])
+    for fmt in text_formats:
+        if fmt not in result["outputs"]:
+            result["errors"].setdefault(fmt, f"{fmt.upper()} generation failed")
+    if "pdf" in done:
+        if isinstance(done["pdf"], str):
+            result["pdf_path"] = result["outputs"]["pdf"] = done["pdf"]
+            result["pdf_bytes"] = await asyncio.to_thread(_read_bytes, done["pdf"])
+        else:
+            result["errors"].setdefault("pdf", "PDF generation failed")
+    if interview:
+        if isinstance(done["interview"], dict):
+            result["interview"] = done["interview"]
+        else:
+            result["errors"].setdefault("interview", "Interview prep generation failed")
@@ -0,0 +1,230 @@
+import os
+import re
+import json
+import time
+import datetime
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import src.utils as utils
+from src.utils import load_file, load_json
+from src import jd, job_state, providers, render_cache, renderers, run_log, scheduler, tracing
+from src.portfolio import load_portfolio_index
+import main1
+from main1 import PORTFOLIO_PATH, STATIC_PATH
+
+# --- CONFIGURATION ---
+BATCH_OUTPUT_DIR = "batch_output"
+DEFAULT_WORKERS = 4
+JD_EXTENSIONS = (".txt", ".md")
+
+def load_jobs(source):
+    """
+    Reads job descriptions from a folder (one .txt/.md file per JD) or a JSONL
+    file (one {"id": ..., "jd": ...} object per line).
+    Returns a list of (job_id, jd_text) tuples.
+    """
+    jobs = []
+    if os.path.isdir(source):
+        for name in sorted(os.listdir(source)):
+            if not name.lower().endswith(JD_EXTENSIONS): continue
+            jd_text = load_file(os.path.join(source, name))
+            if jd_text:
+                jobs.append((os.path.splitext(name)[0], jd_text))
+    else:
+        with open(source, 'r', encoding='utf-8') as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line: continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as e:
+                    print(f"⚠️  Skipping line {line_no} of {source}: {e}"); continue
+                jd_text = record.get('jd') or record.get('text') or record.get('job_description')
+                if not jd_text:
+                    print(f"⚠️  Skipping line {line_no} of {source}: no JD text."); continue
+                jobs.append((str(record.get('id') or f"job_{line_no}"), jd_text))
+
+    # Job ids become directory names, and two postings must never share one
+    # (not even with a suffixed id: a, a, a_1 -> a, a_1, a_1_1).
+    taken = set()
+    unique_jobs = []
+    for job_id, jd_text in jobs:
+        base = re.sub(r'[^a-zA-Z0-9_.-]', '_', job_id) or "job"
+        job_id, n = base, 0
+        while job_id in taken:
+            n += 1
+            job_id = f"{base}_{n}"
+        taken.add(job_id)
+        unique_jobs.append((job_id, jd_text))
+    return unique_jobs
+
+def _run_one(job_id, jd_text, portfolio_index, static_data, out_dir):
+    job_dir = os.path.join(out_dir, job_id)
+    start = time.perf_counter()
+    log = run_log.start_job(job_id)
+    if tracing.TRACE_DIR:
+        tracing.enable(log)
+    try:
+        result = main1.run_job(jd_text, portfolio_index, static_data, output_dir=job_dir, prep_dir=job_dir,
+                               stream=main1.STREAM_RESPONSES, formats=main1.OUTPUT_FORMATS)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+        result = {"base_name": None, "pdf_path": None, "outputs": {}, "prep_path": None, "error": error,
+                  "errors": {"job": error}, "timings": {}}
+    result["job_id"] = job_id
+    result["seconds"] = round(time.perf_counter() - start, 3)
+    result["llm_calls"] = run_log.summary(log)["llm_calls"]
+    if tracing.TRACE_DIR:
+        result["trace_path"] = tracing.write(log, os.path.join(tracing.TRACE_DIR, job_id))
+    return result
+
+def _dedupe(jobs, jd_index, context):
+    """
+    Splits `jobs` into the ones to run and the rest: {job_id: earlier job_id} for
+    near-duplicates within this batch, and {job_id: stored result} for postings an
+    earlier run already handled. Also returns each job's fingerprint.
+    """
+    fingerprints, to_run, in_batch, reused = {}, [], {}, {}
+    batch_index = jd.JdIndex(path=None)
+    for job_id, jd_text in jobs:
+        fingerprint, previous = main1.find_reusable(jd_index, jd_text, job_id, context)
+        fingerprints[job_id] = fingerprint
+        twin = batch_index.find(fingerprint)
+        if twin:
+            in_batch[job_id] = twin["job_id"]
+        elif previous:
+            reused[job_id] = previous
+        else:
+            batch_index.add(fingerprint, job_id)
+            to_run.append((job_id, jd_text))
+    return to_run, in_batch, reused, fingerprints
+
+def _sum_traces(results):
+    """Batch-wide llm / latex / io / python milliseconds (None unless tracing was on)."""
+    traced = [r["trace_ms"] for r in results if r.get("trace_ms")]
+    if not traced: return None
+    return {k: round(sum(t[k] for t in traced), 3) for k in traced[0]}
+
+def run_batch(source, out_dir=BATCH_OUTPUT_DIR, workers=DEFAULT_WORKERS):
+    """Tailors the master portfolio against every JD in `source` and writes manifest.json."""
+    static_data = load_json(STATIC_PATH)
+    portfolio_index = load_portfolio_index(PORTFOLIO_PATH)
+    if not (static_data and portfolio_index): return None
+
+    jobs = load_jobs(source)
+    if not jobs:
+        print(f"❌ No job descriptions found in {source}"); return None
+
+    os.makedirs(out_dir, exist_ok=True)
+    print(f"📦 Batch: {len(jobs)} jobs, {workers} workers -> {out_dir}/")
+
+    started = datetime.datetime.now().isoformat(timespec='seconds')
+    batch_start = time.perf_counter()
+    results = []
+    jd_index = jd.JdIndex() if jd.DEDUPE_ENABLED else None
+    in_batch, fingerprints = {}, {}
+    if jd_index:
+        context = main1.run_context(portfolio_index, static_data)
+        jobs, in_batch, reused, fingerprints = _dedupe(jobs, jd_index, context)
+        for job_id, previous in reused.items():
+            results.append({**main1.reused_result(job_id, previous), "job_id": job_id, "seconds": 0.0, "llm_calls": []})
+        if in_batch or reused:
+            print(f"🪞 {len(in_batch) + len(reused)} duplicate postings skipped, {len(jobs)} left to run")
+    # The work is dominated by network waits on Gemini, so threads are enough;
+    # `workers` is the cap on requests in flight against the API quota.
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_run_one, job_id, jd_text, portfolio_index, static_data, out_dir)
+                   for job_id, jd_text in jobs]
+        for future in as_completed(futures):
+            result = future.result()
+            status = "✅" if not result["error"] else "❌"
+            print(f"{status} [{result['job_id']}] {result['seconds']}s {result['error'] or ''}")
+            results.append(result)
+            if jd_index:
+                main1.remember_result(jd_index, fingerprints[result["job_id"]], result["job_id"], result, context)
+
+    # Duplicates within the batch share the result of the copy that ran
+    by_id = {r["job_id"]: r for r in results}
+    for job_id, original in in_batch.items():
+        first = by_id[original]
+        results.append({**{k: first.get(k) for k in ("base_name", "pdf_path", "outputs", "prep_path", "error")},
+                        "errors": {}, "timings": {}, "job_id": job_id, "duplicate_of": original,
+                        "seconds": 0.0, "llm_calls": []})
+
+    results.sort(key=lambda r: r["job_id"])
+    failures = [r for r in results if r["error"]]
+    manifest = {
+        "source": source,
+        "started": started,
+        "workers": workers,
+        "total_jobs": len(results),
+        "succeeded": len(results) - len(failures),
+        "failed": len(failures),
+        "duplicates": sum(1 for r in results if r.get("duplicate_of")),
+        "wall_seconds": round(time.perf_counter() - batch_start, 3),
+        "render_cache": render_cache.get_stats(),
+        "llm": {
+            "calls": sum(len(r["llm_calls"]) for r in results),
+            "retries": sum(c["retries"] for r in results for c in r["llm_calls"]),
+            "queue_wait_s": round(sum(c["queue_wait_s"] for r in results for c in r["llm_calls"]), 3),
+        },
+        "tokens": run_log.token_totals([c for r in results for c in r["llm_calls"]]),
+        "trace_ms": _sum_traces(results),
+        "jobs": results,
+    }
+    manifest_path = os.path.join(out_dir, "manifest.json")
+    with open(manifest_path, "w", encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+    print(f"\n📋 Manifest saved to: {manifest_path} ({manifest['succeeded']}/{manifest['total_jobs']} succeeded)")
+    print(f"♻️  Render cache: {manifest['render_cache']['hits']} hits, {manifest['render_cache']['misses']} misses")
+    if manifest["trace_ms"]:
+        print(f"🧭 Time by kind (ms, summed over jobs): {manifest['trace_ms']}")
+    tokens = manifest["tokens"]["total"]
+    print(f"🧮 Tokens: {tokens['prompt_tokens']} in / {tokens['response_tokens']} out (~${tokens['cost_usd']:.4f})")
+    return manifest
+
+def main():
+    parser = argparse.ArgumentParser(description="Tailor the master portfolio against many job descriptions.")
+    parser.add_argument("source", help="Folder of .txt/.md JDs or a .jsonl file with {\"id\", \"jd\"} records")
+    parser.add_argument("--out", default=BATCH_OUTPUT_DIR, help="Output folder (one sub-folder per JD)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Max jobs running at once")
+    parser.add_argument("--no-cache", action="store_true", help="Always call the API, ignoring cached responses")
+    parser.add_argument("--provider", choices=sorted(providers.PROVIDERS), default=providers.PROVIDER_NAME,
+                        help="LLM backend (replay = recorded responses, no network)")
+    parser.add_argument("--stream", action="store_true", help="Stream LLM responses and process sections as they arrive")
+    parser.add_argument("--formats", type=renderers.parse_formats, default=main1.OUTPUT_FORMATS,
+                        help=f"Comma-separated resume outputs ({', '.join(renderers.FORMATS)}); default pdf")
+    parser.add_argument("--trace", metavar="DIR", help="Write a span trace per job to DIR")
+    parser.add_argument("--chrome-trace", action="store_true", help="Also write Chrome trace-event files (with --trace)")
+    parser.add_argument("--rpm", type=int, default=scheduler.REQUESTS_PER_MIN, help="LLM requests/min budget (0 = unlimited)")
+    parser.add_argument("--tpm", type=int, default=scheduler.TOKENS_PER_MIN, help="LLM tokens/min budget (0 = unlimited)")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="Redo every stage instead of only those whose inputs changed since the last run")
+    parser.add_argument("--keep-boilerplate", action="store_true",
+                        help="Send each JD whole instead of stripping benefits/EEO/about-us sections")
+    parser.add_argument("--no-dedupe", action="store_true",
+                        help="Run every JD, even near-duplicates of ones already processed")
+    parser.add_argument("--token-budget", type=int, default=main1.TOKEN_BUDGET,
+                        help="Max prompt tokens per tailoring call; JD/portfolio are trimmed to fit (0 = no cap)")
+    args = parser.parse_args()
+    if args.no_cache:
+        utils.LLM_CACHE_ENABLED = False
+    if args.stream:
+        main1.STREAM_RESPONSES = True
+    scheduler.limiter.configure(args.rpm, args.tpm)
+    utils.set_provider(args.provider)
+    main1.OUTPUT_FORMATS = args.formats
+    if args.trace:
+        tracing.TRACE_DIR = args.trace
+        tracing.CHROME_TRACE = tracing.CHROME_TRACE or args.chrome_trace
+    main1.TOKEN_BUDGET = args.token_budget
+    if args.keep_boilerplate:
+        jd.STRIP_BOILERPLATE = False
+    if args.no_dedupe:
+        jd.DEDUPE_ENABLED = False
+    job_state.REBUILD = args.rebuild
+    run_batch(args.source, out_dir=args.out, workers=max(1, args.workers))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Token and latency comparison of the resume formats used in the interview prompt:
+the old LaTeX-escaped json.dumps(indent=2) against the plain minified JSON and
+terse line formats of interview_agent.compact_resume.
+
+    python -m bench.bench_interview_prompt --resumes 200 --calls 20
+"""
+import os
+import copy
+import time
+import argparse
+import statistics
+import main1
+from src import interview_agent
+from src.utils import estimate_tokens
+from bench.samples import sample_response, sample_jd_text
+from bench.stub_gemini import StubGeminiServer
+
+def plain_and_escaped(seed):
+    plain = main1.clean_skills(main1.layout_check(main1.normalize_keys(sample_response(seed)["resume"])))
+    return plain, main1.escape_resume(copy.deepcopy(plain))
+
+VARIANTS = {
+    "escaped pretty (old)": lambda plain, escaped: interview_agent.compact_resume(escaped, "pretty"),
+    "plain minified json": lambda plain, escaped: interview_agent.compact_resume(plain, "json"),
+    "plain text": lambda plain, escaped: interview_agent.compact_resume(plain, "text"),
+}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--resumes", type=int, default=200)
+    parser.add_argument("--calls", type=int, default=20, help="Stubbed interview calls per variant")
+    parser.add_argument("--prefill-ms", type=float, default=0.2, help="Stub prompt processing time per token")
+    args = parser.parse_args()
+
+    resumes = [plain_and_escaped(seed) for seed in range(args.resumes)]
+    print(f"{'format':<22}{'tokens/resume':>14}{'serialize µs':>14}")
+    baseline = None
+    for name, fn in VARIANTS.items():
+        start = time.perf_counter()
+        texts = [fn(plain, escaped) for plain, escaped in resumes]
+        micros = (time.perf_counter() - start) / len(texts) * 1e6
+        tokens = statistics.mean(estimate_tokens(t) for t in texts)
+        baseline = baseline or tokens
+        print(f"{name:<22}{tokens:>14.0f}{micros:>14.1f}   ({(1 - tokens / baseline) * 100:.0f}% fewer)")
+
+    # End-to-end: full interview prompt against a stub whose latency grows with prompt size
+    server = StubGeminiServer(response={"strategy_log": "-", "hook": "-", "technical_q_and_a": [], "behavioral": {}},
+                              prefill_per_token=args.prefill_ms / 1000).start()
+    os.environ.setdefault("GEMINI_API_KEY", "stub-key")
+    import src.utils as utils
+    utils.GEMINI_BASE_URL, utils.GEMINI_API_KEY = server.base_url, os.environ["GEMINI_API_KEY"]
+    utils.LLM_CACHE_ENABLED = False
+    utils.reset_client()
+    from src import run_log
+
+    print(f"\n{'format':<22}{'prompt tokens':>14}{'call ms':>10}")
+    jd_text = sample_jd_text()
+    for name, fmt, which in (("escaped pretty (old)", "pretty", 1), ("plain minified json", "json", 0),
+                             ("plain text", "text", 0)):
+        interview_agent.RESUME_PROMPT_FORMAT = fmt
+        log = run_log.start_job(name)
+        for i in range(args.calls):
+            interview_agent.generate_interview_guide(jd_text, resumes[i % len(resumes)][which], f"bench_{i}",
+                                                     output_dir=os.path.join(".cache", "bench_prep"))
+        calls = log["llm_calls"]
+        print(f"{name:<22}{statistics.mean(c['prompt_tokens'] for c in calls):>14.0f}"
+              f"{statistics.mean(c['seconds'] for c in calls) * 1000:>10.1f}")
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
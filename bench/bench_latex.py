@@ -0,0 +1,55 @@
+"""
+Cold pdflatex runs vs compiles against the precompiled preamble format.
+
+    python -m bench.bench_latex --runs 5
+"""
+import os
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+import contextlib
+from src import render_cache, resume_builder
+from bench.samples import sample_final_data
+
+def _time_builds(backend, runs, out_dir, first_seed=0):
+    resume_builder.LATEX_BACKEND = backend
+    timings = []
+    for i in range(first_seed, first_seed + runs):
+        data = sample_final_data(seed=i)
+        start = time.perf_counter()
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            path = resume_builder.build_pdf(data, output_filename=os.path.join(out_dir, f"{backend}_{i}.pdf"))
+        if not path:
+            raise SystemExit(f"{backend} build failed; run build_pdf directly to see the LaTeX log.")
+        timings.append(time.perf_counter() - start)
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    if not shutil.which(resume_builder.LATEX_COMPILER):
+        raise SystemExit(f"{resume_builder.LATEX_COMPILER} not found on PATH; nothing to benchmark.")
+
+    # Every build must really compile, and each one gets its own resume (seed)
+    render_cache.ENABLED = False
+    out_dir = tempfile.mkdtemp(prefix="bench_latex_")
+    cold = _time_builds('cold', args.runs, out_dir)
+
+    # The first warm build pays for dumping the format; report it separately.
+    start = time.perf_counter()
+    _time_builds('format', 1, out_dir, first_seed=args.runs)
+    first = time.perf_counter() - start
+    warm = _time_builds('format', args.runs, out_dir, first_seed=args.runs + 1)
+
+    print(f"cold compile      mean {statistics.mean(cold):.3f} s   p50 {statistics.median(cold):.3f} s")
+    print(f"format dump+build once {first:.3f} s")
+    print(f"warm compile      mean {statistics.mean(warm):.3f} s   p50 {statistics.median(warm):.3f} s")
+    print(f"speedup           {statistics.mean(cold) / statistics.mean(warm):.2f}x per resume")
+    shutil.rmtree(out_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Per-call overhead of building a genai.Client for every request vs reusing the
+shared pooled client from src.utils, measured against a local stub server.
+
+    python -m bench.bench_llm_client --calls 200
+"""
+import os
+import time
+import argparse
+import statistics
+from bench.stub_gemini import StubGeminiServer
+
+def _time_calls(make_client, calls, prompt):
+    from google.genai import types
+    timings = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        client = make_client()
+        client.models.generate_content(
+            model="gemini-2.5-flash",
+            contents=prompt,
+            config=types.GenerateContentConfig(temperature=0.0, response_mime_type="application/json"),
+        )
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+def _report(label, timings, server, connections_before):
+    print(f"{label:<22} mean {statistics.mean(timings):7.2f} ms   "
+          f"p50 {statistics.median(timings):7.2f} ms   "
+          f"new connections {server.connections - connections_before}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=100)
+    args = parser.parse_args()
+
+    server = StubGeminiServer().start()
+    os.environ["GEMINI_BASE_URL"] = server.base_url
+    os.environ.setdefault("GEMINI_API_KEY", "stub-key")
+    os.environ["LLM_CACHE"] = "0"
+
+    from google import genai
+    from google.genai import types
+    import src.utils as utils
+    utils.GEMINI_BASE_URL = server.base_url
+    utils.GEMINI_API_KEY = os.environ["GEMINI_API_KEY"]
+    utils.reset_client()
+
+    prompt = "x" * 20000  # Roughly a portfolio + JD sized prompt
+
+    # Warm up imports and the stub before measuring.
+    _time_calls(utils.get_client, 3, prompt)
+
+    before = server.connections
+    fresh = _time_calls(
+        lambda: genai.Client(api_key=utils.GEMINI_API_KEY, http_options=types.HttpOptions(base_url=server.base_url)),
+        args.calls, prompt,
+    )
+    _report("new client per call", fresh, server, before)
+
+    before = server.connections
+    shared = _time_calls(utils.get_client, args.calls, prompt)
+    _report("shared pooled client", shared, server, before)
+
+    saved = statistics.mean(fresh) - statistics.mean(shared)
+    print(f"\nOverhead saved per call: {saved:.2f} ms ({args.calls} calls, stub server adds no latency)")
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+End-to-end pipeline benchmark and regression gate, fully offline.
+
+Synthetic tailoring and interview responses are recorded for N jobs and served
+by the replay provider, then each job runs the same stages as main1.run_job:
+LLM -> main1.prepare_resume -> PDF (or render only with --no-compile) ->
+interview LLM -> guide formatting. prepare_resume is timed as a whole and, from
+its trace spans, per step (normalize_keys, layout_check, clean_skills,
+sanitize_static, escape). Reports per-stage latency percentiles, throughput
+and peak RSS.
+
+    python -m bench.bench_pipeline --jobs 200 --no-compile
+    python -m bench.bench_pipeline --jobs 200 --no-compile --save-baseline .cache/bench_baseline.json
+    python -m bench.bench_pipeline --jobs 200 --no-compile --baseline .cache/bench_baseline.json   # exit 1 on regression
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import argparse
+import resource
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import main1
+import src.utils as utils
+from src import interview_agent, providers, render_cache, resume_builder, run_log, tracing
+from src.portfolio import parse_portfolio
+from bench.samples import (sample_response, sample_interview_response, sample_static_data,
+                           sample_portfolio_text, sample_jd_text)
+
+STAGES = ["tailor_llm", "prepare", "normalize", "sanity", "clean_skills", "sanitize_static", "escape", "pdf",
+          "interview_llm", "interview_format"]
+# prepare_resume's trace spans -> the stage each one is reported as
+PREPARE_SPANS = {"clean.normalize_keys": "normalize", "clean.layout_check": "sanity",
+                 "clean.clean_skills": "clean_skills", "clean.sanitize_static": "sanitize_static",
+                 "clean.escape_resume": "escape"}
+GATE_TOLERANCE = 0.25       # Allowed p50 slowdown vs the baseline
+GATE_SLACK_MS = 0.5         # Ignore differences below this (timer noise on µs-scale stages)
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered: return 0.0
+    k = (len(ordered) - 1) * pct / 100
+    lo, hi = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+def build_corpus(n, replay_dir):
+    """Records a tailoring + interview response for each synthetic JD; returns [(jd_text, portfolio_text)]."""
+    text = sample_portfolio_text()
+    index = parse_portfolio(text)
+    index["sha256"] = hashlib.sha256(text.encode('utf-8')).hexdigest()
+    jobs = []
+    for seed in range(n):
+        jd_text, portfolio_text = main1.fit_to_budget(sample_jd_text(seed), index)
+        response = sample_response(seed)
+        providers.record(main1.build_tailor_prompt(jd_text, portfolio_text), "resume",
+                         json.dumps(response), replay_dir=replay_dir)
+        plain = main1.clean_skills(main1.layout_check(main1.normalize_keys(response["resume"])))
+        providers.record(interview_agent.build_interview_prompt(jd_text, plain), "interview",
+                         json.dumps(sample_interview_response(seed)), replay_dir=replay_dir)
+        jobs.append((jd_text, portfolio_text))
+    return jobs
+
+def run_one(i, jd_text, portfolio_text, static_data, out_dir, compile_pdf):
+    timings = {}
+    def timed(name, fn, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            timings[name] = (time.perf_counter() - start) * 1000
+
+    log = tracing.enable(run_log.start_job(f"job_{i}"))
+    response = timed("tailor_llm", main1.analyze_and_tailor, jd_text, portfolio_text)
+    if not response: return timings, "tailor returned nothing"
+    log["_spans"].clear()
+    prepared = timed("prepare", main1.prepare_resume, response, static_data, pdf=True)
+    for span in log["_spans"]:
+        if span["name"] in PREPARE_SPANS:
+            stage = PREPARE_SPANS[span["name"]]
+            timings[stage] = timings.get(stage, 0.0) + span["duration_ms"]
+    plain, final = prepared["plain_data"], prepared["final_data"]
+    if compile_pdf:
+        ok = timed("pdf", resume_builder.build_pdf, final, output_filename=os.path.join(out_dir, f"job_{i}.pdf"),
+                   clean=False)
+    else:
+        ok = timed("pdf", resume_builder.render_tex, final, clean=False)
+    if not ok: return timings, "pdf failed"
+
+    guide = timed("interview_llm", utils.get_llm_response,
+                  interview_agent.build_interview_prompt(jd_text, plain), stage="interview")
+    if not guide: return timings, "interview returned nothing"
+    text = timed("interview_format", interview_agent.format_interview_guide, guide, f"job_{i}")
+    if "INTERVIEW PREP GUIDE" not in text: return timings, "guide formatting failed"
+    return timings, None
+
+def check_gate(report, baseline_path, tolerance):
+    """Compares p50s and throughput with a saved baseline report; returns the regressions found."""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressions = []
+    for stage, stats in report["stages"].items():
+        base = baseline["stages"].get(stage)
+        if not base: continue
+        limit = base["p50_ms"] * (1 + tolerance) + GATE_SLACK_MS
+        if stats["p50_ms"] > limit:
+            regressions.append(f"{stage}: p50 {stats['p50_ms']:.2f} ms > {limit:.2f} ms (baseline {base['p50_ms']:.2f})")
+    if report["jobs_per_s"] < baseline["jobs_per_s"] / (1 + tolerance):
+        regressions.append(f"throughput {report['jobs_per_s']:.1f} jobs/s < baseline {baseline['jobs_per_s']:.1f}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--no-compile", action="store_true", help="Render the LaTeX but skip pdflatex")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Simulated seconds per LLM call")
+    parser.add_argument("--report", help="Write the JSON report here")
+    parser.add_argument("--save-baseline", help="Write the report as the new baseline")
+    parser.add_argument("--baseline", help="Fail (exit 1) if slower than this baseline report")
+    parser.add_argument("--tolerance", type=float, default=GATE_TOLERANCE)
+    args = parser.parse_args()
+
+    compile_pdf = not args.no_compile
+    if compile_pdf and not shutil.which(resume_builder.LATEX_COMPILER):
+        print(f"⚠️  {resume_builder.LATEX_COMPILER} not found, running with --no-compile")
+        compile_pdf = False
+
+    scratch = tempfile.mkdtemp(prefix="bench_pipeline_")
+    replay_dir = os.path.join(scratch, "replay")
+    utils.LLM_CACHE_ENABLED = False
+    render_cache.ENABLED = False  # Every job should pay for its own compile
+    provider = utils.set_provider("replay")
+    provider.replay_dir, provider.latency = replay_dir, args.llm_latency
+
+    print(f"📼 Recording {args.jobs} synthetic jobs...")
+    jobs = build_corpus(args.jobs, replay_dir)
+    static_data = sample_static_data()
+
+    # The pipeline prints progress per call; keep the benchmark output readable
+    quiet = open(os.devnull, 'w')
+    stdout, sys.stdout = sys.stdout, quiet
+    lock = threading.Lock()
+    results = []
+    start = time.perf_counter()
+    try:
+        def work(i):
+            result = run_one(i, *jobs[i], static_data, scratch, compile_pdf)
+            with lock: results.append(result)
+        with ThreadPoolExecutor(max_workers=args.workers) as pool:
+            list(pool.map(work, range(len(jobs))))
+    finally:
+        sys.stdout = stdout
+        quiet.close()
+    wall = time.perf_counter() - start
+    shutil.rmtree(scratch, ignore_errors=True)
+
+    errors = [e for _, e in results if e]
+    report = {
+        "jobs": len(results), "workers": args.workers, "compile": compile_pdf, "errors": len(errors),
+        "wall_s": round(wall, 3), "jobs_per_s": round(len(results) / wall, 2),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "peak_child_rss_mb": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1),
+        "stages": {},
+    }
+    print(f"\n{'stage':<18}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for stage in STAGES:
+        values = [t[stage] for t, _ in results if stage in t]
+        if not values: continue
+        stats = {f"p{p}_ms": round(percentile(values, p), 3) for p in (50, 90, 99)}
+        stats["max_ms"] = round(max(values), 3)
+        report["stages"][stage] = stats
+        print(f"{stage:<18}{stats['p50_ms']:>10.3f}{stats['p90_ms']:>10.3f}{stats['p99_ms']:>10.3f}{stats['max_ms']:>10.3f}")
+    print(f"\n{report['jobs']} jobs in {report['wall_s']} s = {report['jobs_per_s']} jobs/s "
+          f"(compile: {compile_pdf}, workers: {args.workers})")
+    print(f"peak RSS {report['peak_rss_mb']} MB (children {report['peak_child_rss_mb']} MB)")
+
+    for path in (args.report, args.save_baseline):
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+
+    failed = False
+    if errors:
+        print(f"❌ {len(errors)} jobs failed, e.g. {errors[0]}")
+        failed = True
+    if args.baseline:
+        regressions = check_gate(report, args.baseline, args.tolerance)
+        for line in regressions:
+            print(f"❌ Regression: {line}")
+        if not regressions:
+            print(f"✅ Within {args.tolerance:.0%} of baseline {args.baseline}")
+        failed = failed or bool(regressions)
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Billed input tokens and time-to-first-token of the tailoring prompt layouts,
+against the local Gemini stub (whose prefill time grows with uncached tokens):
+
+  jd first (old)       JD, then the per-JD portfolio selection, no caching
+  prefix first         instructions + per-JD selection, then JD; no context cache
+  shared prefix cache  instructions + whole portfolio in one context cache, JD after
+
+    python -m bench.bench_prompt_cache --jobs 20 --projects 12
+"""
+import os
+import time
+import argparse
+import statistics
+import hashlib
+import main1
+import src.utils as utils
+from src.portfolio import parse_portfolio, portfolio_for_jd, render_portfolio, shortlist_names
+from bench.samples import sample_response, sample_portfolio_text, sample_jd_text
+from bench.stub_gemini import StubGeminiServer
+
+def billed(usage):
+    cached = usage.get("context_cached_tokens", 0)
+    return usage["prompt_tokens"] - cached * (1 - utils.CONTEXT_CACHE_PRICE_RATIO)
+
+def run_variant(provider, jobs, layout):
+    """Streams every job's prompt; returns (mean billed input tokens, median TTFT ms, mean cached tokens)."""
+    tokens, ttfts, cached = [], [], []
+    for jd_text, index in jobs:
+        if layout == "jd first (old)":
+            prefix, prompt = "", main1.build_tailor_suffix(jd_text) + main1.build_tailor_prefix(portfolio_for_jd(index, jd_text))
+        elif layout == "prefix first":
+            prefix, prompt = main1.build_tailor_prefix(portfolio_for_jd(index, jd_text)), main1.build_tailor_suffix(jd_text)
+        else:
+            prefix = main1.build_tailor_prefix(render_portfolio(index))
+            prompt = main1.build_tailor_suffix(jd_text, shortlist_names(index, jd_text))
+        start = time.perf_counter()
+        first, usage = None, None
+        for text, chunk_usage in provider.stream(prompt, stage="resume", prefix=prefix):
+            if first is None and text:
+                first = time.perf_counter() - start
+            usage = chunk_usage or usage
+        ttfts.append(first * 1000)
+        tokens.append(billed(usage))
+        cached.append(usage.get("context_cached_tokens", 0))
+    return statistics.mean(tokens), statistics.median(ttfts), statistics.mean(cached)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=20)
+    parser.add_argument("--projects", type=int, default=12, help="Projects in the synthetic portfolio")
+    parser.add_argument("--prefill-ms", type=float, default=0.2, help="Stub prompt processing time per uncached token")
+    args = parser.parse_args()
+
+    server = StubGeminiServer(response=sample_response(), prefill_per_token=args.prefill_ms / 1000,
+                              latency=0.02, chunk_delay=0.005).start()
+    os.environ.setdefault("GEMINI_API_KEY", "stub-key")
+    utils.GEMINI_BASE_URL, utils.GEMINI_API_KEY = server.base_url, os.environ["GEMINI_API_KEY"]
+    utils.reset_client()
+    provider = utils.set_provider("gemini")
+
+    text = sample_portfolio_text(projects=args.projects)
+    index = parse_portfolio(text)
+    index["sha256"] = hashlib.sha256(text.encode('utf-8')).hexdigest()
+    jobs = [(sample_jd_text(seed), index) for seed in range(args.jobs)]
+    print(f"Portfolio: {args.projects} projects, ~{utils.estimate_tokens(render_portfolio(index))} tokens")
+
+    print(f"\n{'layout':<22}{'billed in/job':>14}{'cached/job':>12}{'TTFT p50 ms':>13}")
+    baseline = None
+    for layout in ("jd first (old)", "prefix first", "shared prefix cache"):
+        provider.prefix_cache = layout == "shared prefix cache"
+        tokens, ttft, cached = run_variant(provider, jobs, layout)
+        baseline = baseline or (tokens, ttft)
+        print(f"{layout:<22}{tokens:>14.0f}{cached:>12.0f}{ttft:>13.1f}   "
+              f"({(tokens / baseline[0] - 1) * 100:+.0f}% tokens, {(ttft / baseline[1] - 1) * 100:+.0f}% TTFT)")
+    print(f"\nContext caches created: {len(server.caches)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Template render cost: a fresh Jinja environment per call (the old build_pdf
+behaviour) vs the shared, compile-once environment in resume_builder.
+
+    python -m bench.bench_render --renders 500
+"""
+import time
+import argparse
+import jinja2
+from src import resume_builder
+from bench.samples import sample_final_data
+
+def _fresh_env_render(data):
+    env = jinja2.Environment(
+        loader=jinja2.FileSystemLoader(searchpath=resume_builder.TEMPLATE_DIR),
+        block_start_string='((*', block_end_string='*))',
+        variable_start_string='\\VAR{', variable_end_string='}',
+        comment_start_string='\\#{', comment_end_string='}',
+        line_statement_prefix='%%', line_comment_prefix='%#',
+        trim_blocks=True, autoescape=False,
+    )
+    env.filters['escape_tex'] = resume_builder.escape_latex_chars
+    return env.get_template("resume_template.tex").render(resume_builder.clean_text(data))
+
+def _time(render, corpus):
+    start = time.perf_counter()
+    outputs = [render(data) for data in corpus]
+    return time.perf_counter() - start, outputs
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--renders", type=int, default=300)
+    args = parser.parse_args()
+
+    corpus = [sample_final_data(seed=i % 50) for i in range(args.renders)]
+
+    fresh_s, fresh_out = _time(_fresh_env_render, corpus)
+    shared_s, shared_out = _time(resume_builder.render_tex, corpus)
+    assert fresh_out == shared_out, "shared environment rendered different LaTeX"
+
+    per_fresh = fresh_s / args.renders * 1000
+    per_shared = shared_s / args.renders * 1000
+    print(f"fresh env per render   {per_fresh:.3f} ms/render   total {fresh_s:.2f} s")
+    print(f"shared compiled env    {per_shared:.3f} ms/render   total {shared_s:.2f} s")
+    print(f"saved                  {per_fresh - per_shared:.3f} ms/render ({fresh_s - shared_s:.2f} s over {args.renders} renders)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""
+Offline BM25 pre-selection throughput: rank a synthetic portfolio against
+thousands of JDs, and compare prompt size with and without pre-selection.
+
+    python -m bench.bench_retrieval --jds 5000 --projects 200
+"""
+import time
+import argparse
+from src.portfolio import parse_portfolio, render_portfolio, select_entries
+from src.retrieval import get_bm25_index
+from bench.samples import sample_portfolio_text, sample_jd_text
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--jds", type=int, default=5000)
+    parser.add_argument("--projects", type=int, default=200)
+    args = parser.parse_args()
+
+    index = parse_portfolio(sample_portfolio_text(projects=args.projects))
+    start = time.perf_counter()
+    get_bm25_index(index)
+    build_s = time.perf_counter() - start
+
+    jds = [sample_jd_text(seed=i) for i in range(args.jds)]
+    start = time.perf_counter()
+    selections = [select_entries(index, jd) for jd in jds]
+    rank_s = time.perf_counter() - start
+
+    full_chars = len(render_portfolio(index))
+    selected_chars = sum(len(render_portfolio(index, s)) for s in selections) / len(selections)
+    print(f"index build          {build_s * 1000:.1f} ms for {len(index['entries'])} entries")
+    print(f"ranking              {args.jds} JDs in {rank_s:.2f} s ({rank_s / args.jds * 1e6:.0f} us/JD)")
+    print(f"portfolio in prompt  {full_chars} chars full -> {selected_chars:.0f} chars selected "
+          f"({100 * (1 - selected_chars / full_chars):.0f}% smaller)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Equivalence check and benchmark for the single-pass LaTeX escaper.
+Compares main1.escape_latex_chars / recursive_sanitize(flatten=True) against
+the original regex + chained str.replace implementation (kept below as the
+reference) over random strings and a large synthetic resume corpus.
+test/test_escape.py runs the same equivalence checks (plus edge cases) under pytest.
+
+    python -m bench.bench_sanitize --resumes 2000
+"""
+import re
+import time
+import random
+import argparse
+import main1
+from src.resume_builder import clean_text
+from bench.samples import sample_response, sample_static_data
+
+def legacy_escape_latex_chars(text):
+    if not isinstance(text, str): return text
+    text = re.sub(r'\*\*(.*?)\*\*', r'\1', text).replace('*', '')
+    replacements = {
+        '&': r'\&', '%': r'\%', '$': r'\$', '#': r'\#', '_': r'\_', '{': r'\{', '}': r'\}',
+        '<': r'$<$', '>': r'$>$', '~': r'\textasciitilde{}', '^': r'\textasciicircum{}'
+    }
+    for char, replacement in replacements.items():
+        text = text.replace(char, replacement)
+    return text
+
+def legacy_recursive_sanitize(obj):
+    if isinstance(obj, str):
+        return legacy_escape_latex_chars(obj)
+    elif isinstance(obj, list):
+        return [legacy_recursive_sanitize(i) for i in obj]
+    elif isinstance(obj, dict):
+        return {k: legacy_recursive_sanitize(v) for k, v in obj.items()}
+    return obj
+
+def legacy_clean_text(obj):
+    if isinstance(obj, str):
+        return obj.replace("\n", " ").replace("\r", "").strip()
+    elif isinstance(obj, list):
+        return [legacy_clean_text(x) for x in obj]
+    elif isinstance(obj, dict):
+        return {k: legacy_clean_text(v) for k, v in obj.items()}
+    return obj
+
+_ALPHABET = "ab Z9*&%$#_{}<>~^\\\n\r\t.,-**"
+
+def check_equivalence(samples, seed=0):
+    rng = random.Random(seed)
+    for _ in range(samples):
+        text = "".join(rng.choice(_ALPHABET) for _ in range(rng.randint(0, 40)))
+        expected = legacy_escape_latex_chars(text)
+        actual = main1.escape_latex_chars(text)
+        assert actual == expected, f"escape mismatch for {text!r}: {actual!r} != {expected!r}"
+        flat = main1.recursive_sanitize(text, flatten=True)
+        assert flat == legacy_clean_text(expected), f"fused mismatch for {text!r}"
+        assert clean_text(text) == legacy_clean_text(text), f"clean_text mismatch for {text!r}"
+
+def _corpus(n):
+    corpus = []
+    for i in range(n):
+        doc = sample_static_data()
+        doc["resume"] = sample_response(seed=i)["resume"]
+        corpus.append(doc)
+    return corpus
+
+def _time(fn, corpus):
+    start = time.perf_counter()
+    out = [fn(doc) for doc in corpus]
+    return time.perf_counter() - start, out
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--resumes", type=int, default=2000)
+    parser.add_argument("--samples", type=int, default=50000, help="Random strings for the equivalence check")
+    args = parser.parse_args()
+
+    check_equivalence(args.samples)
+    print(f"equivalence: {args.samples} random strings match the legacy escaper")
+
+    corpus = _corpus(args.resumes)
+    legacy_s, legacy_out = _time(lambda d: legacy_clean_text(legacy_recursive_sanitize(d)), corpus)
+    fused_s, fused_out = _time(lambda d: main1.recursive_sanitize(d, flatten=True), corpus)
+    assert legacy_out == fused_out, "fused sanitize + clean walk differs from the legacy two-pass result"
+
+    print(f"legacy escape + clean_text (2 walks)   {legacy_s * 1000 / args.resumes:.3f} ms/resume")
+    print(f"single-pass fused walk                 {fused_s * 1000 / args.resumes:.3f} ms/resume")
+    print(f"speedup                                {legacy_s / fused_s:.1f}x over {args.resumes} resumes")
+
+if __name__ == "__main__":
+    main()
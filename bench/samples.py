@@ -0,0 +1,99 @@
+"""Synthetic resume data shared by the benchmarks."""
+import copy
+import random
+
+CONTACT = {
+    "name": "Sample Candidate", "email": "sample@example.com", "phone": "+1 555 0100",
+    "linkedin_url": "https://linkedin.com/in/sample", "github_url": "https://github.com/sample",
+    "kaggle_url": "https://kaggle.com/sample",
+}
+
+EDUCATION = [{"school": "State University", "graduation_date": "May 2026",
+              "degree": "B.Tech in Computer Science (CGPA: 9.1/10, 93%)", "location": "Pune, India"}]
+
+LEADERSHIP = [{"org": "Coding Club", "date": "2023 -- 2024", "role": "Lead", "location": "Campus",
+               "bullets": ["Organised 12 workshops & hackathons for 300+ students"]}]
+
+_TOOLS = ["Python", "FastAPI", "Redis", "Docker", "PostgreSQL", "React", "Node.js", "Kafka",
+          "PyTorch", "LangChain", "AWS", "Kubernetes", "C++", "gRPC", "Celery", "Next.js"]
+
+_VERBS = ["Engineered", "Orchestrated", "Optimized", "Built", "Designed", "Scaled", "Automated"]
+
+def _bullet(rng):
+    a, b = rng.sample(_TOOLS, 2)
+    return (f"{rng.choice(_VERBS)} a **{a}** pipeline with {b} & caching, cutting p95 latency "
+            f"by {rng.randint(10, 80)}% (<{rng.randint(20, 90)}ms) for 10k+ req/s_{rng.randint(1, 9)}")
+
+def sample_response(seed=0):
+    """A raw (un-normalized, un-escaped) tailoring response like Gemini returns."""
+    rng = random.Random(seed)
+    return {
+        "meta": {"company": f"Company {seed}", "role": "Backend Engineer Intern"},
+        "resume": {
+            "experience": [{
+                "company": "InfoAxon Technologies", "role": "AI Intern", "dates": "Oct 2025 -- Dec 2025",
+                "location": "Noida, UP", "bullets": [_bullet(rng) for _ in range(3)],
+            }],
+            "projects": [{
+                "name": f"Project {i} #{seed}", "tech_stack": ", ".join(rng.sample(_TOOLS, 5)),
+                "date": "2025", "bullets": [_bullet(rng) for _ in range(4)],
+            } for i in range(3)],
+            "skills": {"languages": ["Python", "C++", "SQL"], "tools": "Git, Docker, AWS",
+                       "frameworks": ["FastAPI", "React", "PyTorch"]},
+        },
+    }
+
+def sample_interview_response(seed=0):
+    """A raw interview-prep response like Gemini returns."""
+    rng = random.Random(seed)
+    return {
+        "strategy_log": f"JD #{seed} stresses {', '.join(rng.sample(_TOOLS, 3))}; lead with the matching projects.",
+        "hook": "Final-year CS student who ships backend systems. " + _bullet(rng),
+        "technical_q_and_a": [{"question": f"How did you use {tool} in Project {i}?", "answer": "I " + _bullet(rng)}
+                              for i, tool in enumerate(rng.sample(_TOOLS, 6))],
+        "behavioral": {"question": "Tell me about a time you missed a deadline.",
+                       "talking_points": "Situation, Task, Action, Result: " + _bullet(rng)},
+    }
+
+def sample_static_data():
+    return {"contact_info": dict(CONTACT), "education": copy.deepcopy(EDUCATION),
+            "leadership": copy.deepcopy(LEADERSHIP)}
+
+def sample_final_data(seed=0):
+    """Fully cleaned data in the shape build_pdf expects."""
+    import main1
+    resume = main1.clean_skills(main1.sanity_check(main1.normalize_keys(sample_response(seed)["resume"])))
+    static = main1.recursive_sanitize(sample_static_data())
+    final = {**static["contact_info"], **resume}
+    final["education"] = static["education"]
+    final["leadership"] = static["leadership"]
+    return final
+
+_DOMAINS = ["Backend Engineering", "Machine Learning", "Full Stack", "Systems Programming",
+            "Data Engineering", "DevOps", "Computer Vision", "NLP"]
+
+def sample_portfolio_text(projects=40, experiences=4, seed=0):
+    """A master_portfolio.md in the documented ## ..._ENTRY format."""
+    rng = random.Random(seed)
+    blocks = ["# Master Portfolio\nSummary: Final-year CS student."]
+    for i in range(experiences):
+        blocks.append("\n".join([
+            "## EXPERIENCE_ENTRY", f"Title: {rng.choice(['AI', 'Backend', 'Data'])} Intern",
+            f"Company: Company {i}", "Dates: 2025", "Content:",
+            *(f"- {_bullet(rng)}" for _ in range(4)),
+        ]))
+    for i in range(projects):
+        tools = rng.sample(_TOOLS, 6)
+        blocks.append("\n".join([
+            "## PROJECT_ENTRY", f"Name: Project {i}", f"Type: {', '.join(rng.sample(_DOMAINS, 2))}",
+            "Complexity: High", "Date: 2025", "Technical Skills",
+            f"Languages: {tools[0]}, {tools[1]}", f"Developer Tools: {tools[2]}, {tools[3]}",
+            f"Technologies/Frameworks: {tools[4]}, {tools[5]}", "-- CONTENT --",
+            f"Context: {_bullet(rng)}", f"Action: {_bullet(rng)}", f"Result: {_bullet(rng)}",
+        ]))
+    return "\n\n".join(blocks)
+
+def sample_jd_text(seed=0):
+    rng = random.Random(seed)
+    return (f"We are hiring a {rng.choice(_DOMAINS)} intern. Must know {', '.join(rng.sample(_TOOLS, 4))}. "
+            f"Nice to have: {', '.join(rng.sample(_TOOLS, 3))}. You will build scalable services.")
@@ -0,0 +1,146 @@
+"""
+Minimal local stand-in for the Gemini REST API, used by the benchmarks.
+Point the app at it with GEMINI_BASE_URL=http://127.0.0.1:<port>.
+
+It also implements cachedContents.create: a request naming a cached content is
+billed with cachedContentTokenCount and skips the prefill delay for that part.
+"""
+import json
+import time
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_RESPONSE = {"ok": True}
+
+class StubGeminiServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port=0, response=None, latency=0.0, stream_chunks=8, chunk_delay=0.0,
+                 fail_rate=0.0, fail_status=429, seed=0, prefill_per_token=0.0):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.fail_rate = fail_rate              # Fraction of requests answered with fail_status
+        self.fail_status = fail_status
+        self.rejected = 0
+        self._rng = random.Random(seed)
+        self.response = response if response is not None else DEFAULT_RESPONSE
+        self.latency = latency
+        self.prefill_per_token = prefill_per_token  # Extra seconds per prompt token (models prompt processing)
+        self.stream_chunks = stream_chunks      # streamGenerateContent splits the reply into this many events
+        self.chunk_delay = chunk_delay          # Seconds between streamed events
+        self.requests = 0
+        self.request_times = []                 # time.monotonic() of each generate request
+        self.connections = 0
+        self.caches = {}                        # cachedContents name -> token count
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def should_fail(self):
+        with self._lock:
+            return self._rng.random() < self.fail_rate
+
+    def count(self, field):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, like the real API
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.server.count("connections")
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        if self.path.split("?")[0].endswith("/cachedContents"):
+            self._create_cache(request)
+            return
+        self.server.count("requests")
+        with self.server._lock:
+            self.server.request_times.append(time.monotonic())
+        if self.server.should_fail():
+            self.server.count("rejected")
+            self._error(self.server.fail_status)
+            return
+        cached_tokens = 0
+        if request.get("cachedContent"):
+            cached_tokens = self.server.caches.get(request["cachedContent"])
+            if cached_tokens is None:
+                self._error(404)
+                return
+        new_tokens = len(json.dumps(request.get("contents", ""))) // 4
+        delay = self.server.latency + self.server.prefill_per_token * new_tokens
+        if delay:
+            threading.Event().wait(delay)
+
+        text = json.dumps(self.server.response)
+        usage = {
+            "promptTokenCount": new_tokens + cached_tokens,
+            "candidatesTokenCount": len(text) // 4,
+            "totalTokenCount": new_tokens + cached_tokens + len(text) // 4,
+        }
+        if cached_tokens:
+            usage["cachedContentTokenCount"] = cached_tokens
+        if "streamGenerateContent" in self.path:
+            self._stream(text, usage)
+            return
+
+        self._json(200, {
+            "candidates": [{"content": {"role": "model", "parts": [{"text": text}]}, "finishReason": "STOP"}],
+            "usageMetadata": usage,
+        })
+
+    def _create_cache(self, request):
+        tokens = len(json.dumps(request.get("contents", ""))) // 4
+        with self.server._lock:
+            name = f"cachedContents/stub-{len(self.server.caches) + 1}"
+            self.server.caches[name] = tokens
+        self._json(200, {"name": name, "model": request.get("model"), "displayName": request.get("displayName"),
+                         "usageMetadata": {"totalTokenCount": tokens}})
+
+    def _json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status):
+        messages = {404: ("Cached content not found.", "NOT_FOUND"),
+                    429: ("Resource has been exhausted (e.g. check quota).", "RESOURCE_EXHAUSTED")}
+        message, status_name = messages.get(status, ("The service is currently unavailable.", "UNAVAILABLE"))
+        self._json(status, {"error": {"code": status, "message": message, "status": status_name}})
+
+    def _stream(self, text, usage):
+        """Server-sent events over chunked transfer encoding, like ?alt=sse on the real API."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        n = max(1, self.server.stream_chunks)
+        size = -(-len(text) // n)
+        pieces = [text[i:i + size] for i in range(0, len(text), size)]
+        for i, piece in enumerate(pieces):
+            event = {"candidates": [{"content": {"role": "model", "parts": [{"text": piece}]}}]}
+            if i == len(pieces) - 1:
+                event["candidates"][0]["finishReason"] = "STOP"
+                event["usageMetadata"] = usage
+            data = f"data: {json.dumps(event)}\r\n\r\n".encode("utf-8")
+            self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+            if self.server.chunk_delay and i < len(pieces) - 1:
+                threading.Event().wait(self.server.chunk_delay)
+        self.wfile.write(b"0\r\n\r\n")
@@ -0,0 +1,314 @@
+# daemon.py
+"""
+Long-running worker. It loads the imports, the .env, the Gemini client, the parsed
+templates and the portfolio once, then works through the durable job queue in
+src/job_queue.py until stopped:
+
+    python daemon.py submit jds/                       # queue a folder of JDs or a .jsonl (as batch.py)
+    python daemon.py run --llm-workers 8 --latex-workers 4
+    python daemon.py status [--job ID]
+
+Each job runs in two stages with their own worker pools. The LLM stage
+(tailoring, the text formats and interview prep) mostly waits on the network,
+so it can have many workers. The LaTeX stage (the PDF) is CPU-bound pdflatex,
+so it should have about one worker per core. A job that was mid-stage when the
+daemon died is picked up again on the next start.
+"""
+import os
+import json
+import time
+import signal
+import argparse
+import threading
+import src.utils as utils
+from src import fit, jd, job_queue, providers, renderers, run_log, scheduler
+from src.job_queue import STAGE_LLM, STAGE_LATEX
+from src.resume_builder import build_pdf, get_latex_env
+from src.portfolio import load_portfolio_index, shortlist_names
+import src.interview_agent as interview_agent
+import batch
+import main1
+from main1 import PORTFOLIO_PATH, STATIC_PATH
+
+# --- CONFIGURATION ---
+DAEMON_OUTPUT_DIR = "daemon_output"
+LLM_WORKERS = int(os.getenv("DAEMON_LLM_WORKERS", "4"))
+LATEX_WORKERS = int(os.getenv("DAEMON_LATEX_WORKERS", str(os.cpu_count() or 2)))
+POLL_S = 1.0                # Idle workers re-check the queue this often
+
+class Inputs:
+    """Portfolio index and static data, reloaded only when one of their files changes."""
+    def __init__(self, portfolio_path=PORTFOLIO_PATH, static_path=STATIC_PATH):
+        self.paths = (portfolio_path, static_path)
+        self.portfolio_index, self.static_data = None, None
+        self._stamp = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        with self._lock:
+            stamp = tuple(os.stat(p).st_mtime_ns if os.path.exists(p) else None for p in self.paths)
+            if stamp != self._stamp:
+                self.portfolio_index = load_portfolio_index(self.paths[0])
+                self.static_data = utils.load_json(self.paths[1])
+                self._stamp = stamp
+            return self.portfolio_index, self.static_data
+
+def warm(inputs):
+    """Pays the one-off startup costs before the first job: API client, templates, portfolio."""
+    start = time.perf_counter()
+    if utils.get_provider().name == "gemini":
+        utils.get_client()
+    get_latex_env().get_template("resume_template.tex")
+    for template in renderers.TEMPLATES.values():
+        renderers.get_text_env().get_template(template)
+    inputs.get()
+    print(f"🔥 Warmed up in {time.perf_counter() - start:.2f}s")
+
+def _timed(timings, phase, fn, *args, **kwargs):
+    start = time.perf_counter()
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        timings[phase] = round(time.perf_counter() - start, 3)
+
+def _first_error(result, formats):
+    for phase in ["pdf", *[f for f in formats if f != "pdf"], "interview"]:
+        if phase in result["errors"]:
+            return result["errors"][phase]
+    return None
+
+def llm_stage(job, inputs, out_dir):
+    """
+    Tailors the resume, writes the text formats and the interview guide.
+    Returns (next stage, payload): STAGE_LATEX with what the PDF needs, or
+    job_queue.DONE with the result when no PDF was asked for.
+    Raises on failures worth retrying.
+    """
+    portfolio_index, static_data = inputs.get()
+    if not (portfolio_index and static_data):
+        raise RuntimeError("Portfolio or static data not found")
+    formats = job["formats"]
+    job_dir = os.path.join(out_dir, job["id"])
+    result = {"job_id": job["id"], "base_name": None, "pdf_path": None, "outputs": {}, "prep_path": None,
+              "error": None, "errors": {}, "timings": {}}
+    timings = result["timings"]
+
+    jd_text = jd.clean_jd(job["jd"])
+    jd_text, portfolio_text = main1.fit_to_budget(jd_text, portfolio_index)
+    if jd_text is None:
+        result["error"] = result["errors"]["tailor"] = "Token budget too small"
+        return job_queue.DONE, result
+    shortlist = shortlist_names(portfolio_index, jd_text) if main1.shares_prefix(portfolio_index) else None
+    response = _timed(timings, "tailor", main1.analyze_and_tailor, jd_text, portfolio_text, shortlist=shortlist)
+    if not response:
+        raise RuntimeError("AI returned no response")
+
+    prepared = main1.prepare_resume(response, static_data, pdf="pdf" in formats)
+    base_name = result["base_name"] = prepared["base_name"]
+    os.makedirs(job_dir, exist_ok=True)
+    output_path = os.path.join(job_dir, f"Resume_Om_Asanani_{base_name}.pdf")
+
+    text_formats = [f for f in formats if f != "pdf"]
+    if text_formats:
+        result["outputs"] = _timed(timings, "render", renderers.write_outputs, prepared["plain_final"],
+                                   text_formats, os.path.splitext(output_path)[0])
+        for fmt in text_formats:
+            if fmt not in result["outputs"]:
+                result["errors"][fmt] = f"{fmt.upper()} generation failed"
+
+    result["prep_path"] = _timed(timings, "interview", interview_agent.generate_interview_guide,
+                                 jd_text, prepared["plain_data"], base_name, output_dir=job_dir)
+    if not result["prep_path"]:
+        result["errors"]["interview"] = "Interview prep generation failed"
+
+    if "pdf" not in formats:
+        result["error"] = _first_error(result, formats)
+        return job_queue.DONE, result
+    return STAGE_LATEX, {"jd_text": jd_text, "final_data": prepared["final_data"], "output_path": output_path,
+                         "result": result}
+
+def latex_stage(job):
+    """Builds the PDF from the LLM stage's payload. Returns (job_queue.DONE, result)."""
+    payload = job["payload"]
+    result = payload["result"]
+    if fit.FIT_ONE_PAGE:
+        path, result["fit"] = _timed(result["timings"], "pdf", fit.build_fitted, payload["final_data"],
+                                     payload["output_path"], jd_text=payload["jd_text"], clean=False)
+    else:
+        path = _timed(result["timings"], "pdf", build_pdf, payload["final_data"],
+                      output_filename=payload["output_path"], clean=False)
+    result["pdf_path"] = path
+    if path:
+        result["outputs"]["pdf"] = path
+    else:
+        result["errors"]["pdf"] = "PDF generation failed"
+    result["error"] = _first_error(result, job["formats"])
+    return job_queue.DONE, result
+
+class Daemon:
+    """Worker threads for both stages plus a heartbeat that keeps their leases alive."""
+    def __init__(self, queue, out_dir=DAEMON_OUTPUT_DIR, llm_workers=LLM_WORKERS, latex_workers=LATEX_WORKERS,
+                 inputs=None):
+        self.queue = queue
+        self.out_dir = out_dir
+        self.workers = {STAGE_LLM: llm_workers, STAGE_LATEX: latex_workers}
+        self.inputs = inputs or Inputs()
+        self.stop = threading.Event()
+        self._wake = {STAGE_LLM: threading.Event(), STAGE_LATEX: threading.Event()}
+        self._held = {}     # job_id -> lease owner, for the heartbeat
+        self._held_lock = threading.Lock()
+        self._threads = []
+        self._done = threading.Event()     # Set once every worker has exited
+
+    def start(self):
+        released = self.queue.recover()
+        if released:
+            print(f"🩹 Recovered {len(released)} job(s) left mid-stage by a stopped daemon: {', '.join(released)}")
+        for stage, count in self.workers.items():
+            for i in range(count):
+                thread = threading.Thread(target=self._work, args=(stage, f"{stage}-{i}"),
+                                          name=f"{stage}-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        threading.Thread(target=self._heartbeat, name="heartbeat", daemon=True).start()
+        print(f"👷 Daemon up: {self.workers[STAGE_LLM]} LLM / {self.workers[STAGE_LATEX]} LaTeX workers "
+              f"-> {self.out_dir}/")
+
+    def shutdown(self):
+        """Stops claiming new jobs; workers finish the one they are on."""
+        self.stop.set()
+        for event in self._wake.values():
+            event.set()
+
+    def join(self):
+        for thread in self._threads:
+            thread.join()
+        self._done.set()
+
+    def busy(self):
+        with self._held_lock:
+            return bool(self._held)
+
+    def _heartbeat(self):
+        # Keeps running after shutdown() while workers finish their last job
+        while not self._done.wait(job_queue.LEASE_S / 3):
+            with self._held_lock:
+                held = list(self._held.items())
+            for job_id, owner in held:
+                self.queue.renew(job_id, owner)
+
+    def _work(self, stage, name):
+        owner = job_queue.make_owner(name)
+        while not self.stop.is_set():
+            job = self.queue.claim(stage, owner)
+            if job is None:
+                self._wake[stage].wait(POLL_S)
+                self._wake[stage].clear()
+                continue
+            with self._held_lock:
+                self._held[job["id"]] = owner
+            try:
+                self._run(job, stage, owner)
+            finally:
+                with self._held_lock:
+                    self._held.pop(job["id"], None)
+
+    def _run(self, job, stage, owner):
+        start = time.perf_counter()
+        log = run_log.start_job(job["id"])
+        try:
+            if stage == STAGE_LLM:
+                next_stage, payload = llm_stage(job, self.inputs, self.out_dir)
+            else:
+                next_stage, payload = latex_stage(job)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            print(f"⚠️  [{job['id']}] {stage} attempt {job['attempts']}/{job_queue.MAX_ATTEMPTS} failed: {error}")
+            self.queue.retry(job["id"], owner, error)
+            return
+
+        result = payload if next_stage == job_queue.DONE else payload["result"]
+        result.setdefault("llm_calls", []).extend(run_log.summary(log)["llm_calls"])
+        result["tokens"] = run_log.token_totals(result["llm_calls"])
+        result["seconds"] = round(result.get("seconds", 0.0) + time.perf_counter() - start, 3)
+        if next_stage == job_queue.DONE:
+            if self.queue.finish(job["id"], owner, result):
+                status = "✅" if not result["error"] else "❌"
+                print(f"{status} [{job['id']}] {result['seconds']}s {result['error'] or ''}")
+        elif self.queue.advance(job["id"], owner, next_stage, payload):
+            self._wake[next_stage].set()
+
+def run(queue, out_dir=DAEMON_OUTPUT_DIR, llm_workers=LLM_WORKERS, latex_workers=LATEX_WORKERS, drain=False):
+    """
+    Runs the daemon until SIGINT/SIGTERM (in-flight jobs are finished first; a
+    second signal quits at once and leaves them to crash recovery). With `drain`,
+    it also stops once the queue has nothing left to run.
+    """
+    inputs = Inputs()
+    warm(inputs)
+    daemon = Daemon(queue, out_dir, llm_workers, latex_workers, inputs)
+
+    def on_signal(signum, frame):
+        if daemon.stop.is_set():
+            raise SystemExit(1)
+        print("\n🛑 Finishing in-flight jobs (signal again to quit now)...")
+        daemon.shutdown()
+
+    signal.signal(signal.SIGINT, on_signal)
+    signal.signal(signal.SIGTERM, on_signal)
+    daemon.start()
+    while not daemon.stop.wait(POLL_S):
+        if drain and not daemon.busy():
+            counts = queue.counts()
+            if not counts.get(STAGE_LLM) and not counts.get(STAGE_LATEX):
+                daemon.shutdown()
+    daemon.join()
+    print(f"📋 Queue: {queue.counts()}")
+
+def submit(queue, source, formats):
+    jobs = batch.load_jobs(source)
+    queued = sum(queue.submit(job_id, jd_text, formats) for job_id, jd_text in jobs)
+    print(f"📥 Queued {queued} of {len(jobs)} jobs ({len(jobs) - queued} already queued or running)")
+    return queued
+
+def main():
+    parser = argparse.ArgumentParser(description="Resume-tailoring worker daemon with a persistent job queue.")
+    parser.add_argument("--queue", default=job_queue.QUEUE_PATH, help="SQLite queue file")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    submit_cmd = commands.add_parser("submit", help="Queue job descriptions")
+    submit_cmd.add_argument("source", help="Folder of .txt/.md JDs or a .jsonl file with {\"id\", \"jd\"} records")
+    submit_cmd.add_argument("--formats", type=renderers.parse_formats, default=main1.OUTPUT_FORMATS,
+                            help=f"Comma-separated resume outputs ({', '.join(renderers.FORMATS)}); default pdf")
+
+    run_cmd = commands.add_parser("run", help="Work through the queue until stopped")
+    run_cmd.add_argument("--out", default=DAEMON_OUTPUT_DIR, help="Output folder (one sub-folder per job)")
+    run_cmd.add_argument("--llm-workers", type=int, default=LLM_WORKERS, help="Jobs in the LLM stage at once")
+    run_cmd.add_argument("--latex-workers", type=int, default=LATEX_WORKERS, help="PDF builds at once")
+    run_cmd.add_argument("--drain", action="store_true", help="Exit once the queue is empty")
+    run_cmd.add_argument("--provider", choices=sorted(providers.PROVIDERS), default=providers.PROVIDER_NAME,
+                         help="LLM backend (replay = recorded responses, no network)")
+    run_cmd.add_argument("--rpm", type=int, default=scheduler.REQUESTS_PER_MIN, help="LLM requests/min budget (0 = unlimited)")
+    run_cmd.add_argument("--tpm", type=int, default=scheduler.TOKENS_PER_MIN, help="LLM tokens/min budget (0 = unlimited)")
+
+    status_cmd = commands.add_parser("status", help="Show job counts per stage")
+    status_cmd.add_argument("--job", help="Print one job's result")
+    args = parser.parse_args()
+
+    queue = job_queue.JobQueue(args.queue)
+    if args.command == "submit":
+        submit(queue, args.source, args.formats)
+    elif args.command == "run":
+        scheduler.limiter.configure(args.rpm, args.tpm)
+        utils.set_provider(args.provider)
+        run(queue, args.out, max(1, args.llm_workers), max(1, args.latex_workers), drain=args.drain)
+    elif args.job:
+        job = queue.get(args.job)
+        if not job:
+            print(f"❌ No job '{args.job}' in {args.queue}"); return
+        print(json.dumps({k: job[k] for k in ("id", "stage", "attempts", "error", "result")}, indent=2))
+    else:
+        print(json.dumps(queue.counts(), indent=2))
+
+if __name__ == "__main__":
+    main()
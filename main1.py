@@ -1,8 +1,15 @@
 import os
 import re
+import json
+import time
 import datetime
-from src.utils import load_file, load_json, get_llm_response
-from src.resume_builder import build_pdf
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from src.utils import (load_file, load_json, get_llm_response, get_llm_response_stream, get_provider,
+                       estimate_tokens, truncate_to_tokens)
+from src.resume_builder import build_pdf, clean_text, TEMPLATE_DIR
+from src.portfolio import load_portfolio_index, portfolio_for_jd, render_portfolio, select_entries, shortlist_names
+from src import fit, jd, job_state, render_cache, renderers, run_log, tracing
 import src.interview_agent as interview_agent 
 
 # --- CONFIGURATION ---
@@ -10,119 +17,209 @@ DATA_DIR = "data"
 PORTFOLIO_PATH = os.path.join(DATA_DIR, "master_portfolio.md")
 JD_PATH = os.path.join(DATA_DIR, "job_description.txt")
 STATIC_PATH = os.path.join(DATA_DIR, "static_data.json")
+# LLM_STREAM=1 streams responses and cleans each section as soon as it arrives.
+STREAM_RESPONSES = os.getenv("LLM_STREAM", "0") == "1"
+# The interview prompt only needs the tailored resume text, so its LLM call runs while pdflatex compiles.
+OVERLAP_PHASES = True
+TAILOR_STREAM_PATHS = [("meta",), ("resume", "experience", "*"), ("resume", "projects", "*")]
+# Hard cap on the tailoring prompt's (estimated) tokens; 0 = no cap. Over budget,
+# the JD is cut to JD_BUDGET_SHARE of the room left after the instructions and
+# the lowest-ranked portfolio entries are dropped.
+TOKEN_BUDGET = int(os.getenv("LLM_TOKEN_BUDGET", "0"))
+JD_BUDGET_SHARE = 0.4
+RUN_REPORT_PATH = os.path.join("output", "run_report.json")
+# Resume outputs per run, any of renderers.FORMATS: pdf, md, html, txt, docx (e.g. OUTPUT_FORMATS=pdf,docx)
+OUTPUT_FORMATS = renderers.parse_formats(os.getenv("OUTPUT_FORMATS", "pdf"))
 
-def escape_latex_chars(text):
+# Every special char maps straight to its LaTeX-safe form (markdown '*' is dropped),
+# so one str.translate pass gives the same result as stripping **bold** and then
+# replacing char by char: no replacement produces a character handled later.
+LATEX_ESCAPES = {
+    '*': None,             # Markdown bold/italics artifacts
+    '&': r'\&',            # Ampersand
+    '%': r'\%',            # Percent
+    '$': r'\$',            # Dollar sign
+    '#': r'\#',            # Hashtag
+    '_': r'\_',            # Underscore
+    '{': r'\{',            # Curly braces
+    '}': r'\}',
+    '<': r'$<$',           # Less than (Math mode)
+    '>': r'$>$',           # Greater than (Math mode)
+    '~': r'\textasciitilde{}',
+    '^': r'\textasciicircum{}',
+}
+_ESCAPE_TABLE = str.maketrans(LATEX_ESCAPES)
+# Same table plus the newline flattening build_pdf's clean_text applies.
+_ESCAPE_FLAT_TABLE = str.maketrans({**LATEX_ESCAPES, '\n': ' ', '\r': None})
+
+def escape_latex_chars(text, flatten=False):
     """
     CRITICAL FIX: Converts special characters to safe LaTeX equivalents.
     Prevents < becoming ! and % crashing the build.
+    With flatten=True it also applies build_pdf's clean_text (to non-strings too).
     """
-    if not isinstance(text, str): return text
-    
-    # 1. Strip Markdown Artifacts (Remove **bold**)
-    text = re.sub(r'\*\*(.*?)\*\*', r'\1', text).replace('*', '')
-
-    # 2. Escape LaTeX Special Chars (Order matters!)
-    replacements = {
-        '&': r'\&',        # Ampersand
-        '%': r'\%',        # Percent
-        '$': r'\$',        # Dollar sign
-        '#': r'\#',        # Hashtag
-        '_': r'\_',        # Underscore
-        '{': r'\{',        # Curly braces
-        '}': r'\}',
-        '<': r'$<$',       # Less than (Math mode)
-        '>': r'$>$',       # Greater than (Math mode)
-        '~': r'\textasciitilde{}',
-        '^': r'\textasciicircum{}'
-    }
-    
-    for char, replacement in replacements.items():
-        text = text.replace(char, replacement)
-    
-    return text
+    if not isinstance(text, str): return clean_text(text) if flatten else text
+    if flatten: return text.translate(_ESCAPE_FLAT_TABLE).strip()
+    return text.translate(_ESCAPE_TABLE)
 
-def recursive_sanitize(obj):
-    """Recursively applies LaTeX escaping to any strings in a dict/list."""
+def recursive_sanitize(obj, flatten=False):
+    """
+    Recursively applies LaTeX escaping to any strings in a dict/list.
+    With flatten=True it also does build_pdf's newline/whitespace cleanup in the
+    same walk, so the result can go to build_pdf(..., clean=False).
+    """
     if isinstance(obj, str):
-        return escape_latex_chars(obj)
+        if flatten: return obj.translate(_ESCAPE_FLAT_TABLE).strip()
+        return obj.translate(_ESCAPE_TABLE)
     elif isinstance(obj, list):
-        return [recursive_sanitize(i) for i in obj]
+        return [recursive_sanitize(i, flatten) for i in obj]
     elif isinstance(obj, dict):
-        return {k: recursive_sanitize(v) for k, v in obj.items()}
+        return {k: recursive_sanitize(v, flatten) for k, v in obj.items()}
     return obj
 
-def sanity_check(data):
-    """Guardrail: Fixes layout breaking issues AND sanitizes LaTeX"""
-    print("🛡️  Running Sanity Checks & LaTeX Cleaning...")
+def plain_text(text):
+    """Drops markdown bold/italics asterisks (the escaper drops them too, so this is safe before it)."""
+    return text.replace('*', '').strip()
+
+# Cleaning is split in two: layout_* fixes what would break the page layout and
+# keeps plain text (the interview prompt uses that), escape_* returns a
+# LaTeX-safe copy for the PDF. sanity_* does both, as before.
+
+def layout_experience(exp):
+    """Fills a missing role and tidies the bullets of one experience entry in place."""
+    company = exp.get('company', '')
     
+    # --- CHANGE IS HERE: We removed the re.sub trimming logic ---
+    # Now it will just keep the full company name found in your resume.
+        
+    if not exp.get('role'):
+        print(f"   ⚠️  Warning: Missing role for {company}. Defaulting to 'Intern'.")
+        exp['role'] = "Intern"
+    
+    if 'bullets' in exp and isinstance(exp['bullets'], list):
+        exp['bullets'] = [plain_text(b) for b in exp['bullets'] if isinstance(b, str)]
+    return exp
+
+def layout_project(p):
+    """Trims the tech stack / bullets of one project in place."""
+    stack = p.get('tech_stack', '')
+    if len(stack) > 90:
+        stack = stack[:90].rsplit(',', 1)[0]
+    p['tech_stack'] = stack.strip()
+
+    if 'bullets' in p and isinstance(p['bullets'], list):
+        clean_bullets = [plain_text(b) for b in p['bullets'] if isinstance(b, str)]
+        if len(clean_bullets) > 3:
+            clean_bullets = clean_bullets[:3]
+        p['bullets'] = clean_bullets
+    return p
+
+def layout_skills(skills):
+    for cat, val in skills.items():
+        if isinstance(val, list):
+            skills[cat] = ", ".join(val)
+    return skills
+
+def _escape_entry(entry, fields, flatten):
+    # `fields` (plus a bullets list) get escaped; with flatten, every other value
+    # gets clean_text in the same pass instead of a second walk over the tree
+    escaped_bullets = isinstance(entry.get('bullets'), list)
+    skip = (*fields, 'bullets') if escaped_bullets else fields
+    entry = {k: v if k in skip or not flatten else clean_text(v) for k, v in entry.items()}
+    for field in fields:
+        entry[field] = escape_latex_chars(entry.get(field, ''), flatten)
+    if escaped_bullets:
+        entry['bullets'] = [escape_latex_chars(b, flatten) for b in entry['bullets']]
+    return entry
+
+def escape_experience(exp, flatten=False):
+    """LaTeX-escaped copy of one experience entry (Strip Markdown + Escape LaTeX)."""
+    return _escape_entry(exp, ('company', 'role', 'location'), flatten)
+
+def escape_project(p, flatten=False):
+    return _escape_entry(p, ('name', 'tech_stack'), flatten)
+
+def escape_skills(skills, flatten=False):
+    return {cat: escape_latex_chars(val, flatten) for cat, val in skills.items()}
+
+def sanity_experience(exp):
+    return escape_experience(layout_experience(exp))
+
+def sanity_project(p):
+    return escape_project(layout_project(p))
+
+def sanity_skills(skills):
+    return escape_skills(layout_skills(skills))
+
+@tracing.traced("clean.layout_check")
+def layout_check(data):
+    """Guardrail: Fixes layout breaking issues (the text stays plain, un-escaped)"""
     # 1. Clean Experience (Company Names & Roles)
     for exp in data.get('experience', []):
-        company = exp.get('company', '')
-        
-        # --- CHANGE IS HERE: We removed the re.sub trimming logic ---
-        # Now it will just keep the full company name found in your resume.
-            
-        if not exp.get('role'):
-            print(f"   ⚠️  Warning: Missing role for {company}. Defaulting to 'Intern'.")
-            exp['role'] = "Intern"
-            
-        # Sanitize Content (Strip Markdown + Escape LaTeX)
-        exp['company'] = escape_latex_chars(exp.get('company', ''))
-        exp['role'] = escape_latex_chars(exp.get('role', ''))
-        exp['location'] = escape_latex_chars(exp.get('location', ''))
-        
-        if 'bullets' in exp and isinstance(exp['bullets'], list):
-            exp['bullets'] = [escape_latex_chars(b.strip()) for b in exp['bullets'] if isinstance(b, str)]
+        layout_experience(exp)
 
     # 2. Fix Projects
     for p in data.get('projects', []):
-        stack = p.get('tech_stack', '')
-        if len(stack) > 90:
-            stack = stack[:90].rsplit(',', 1)[0]
-        
-        # Sanitize Content
-        p['name'] = escape_latex_chars(p.get('name', ''))
-        p['tech_stack'] = escape_latex_chars(stack.strip())
-
-        if 'bullets' in p and isinstance(p['bullets'], list):
-            clean_bullets = [escape_latex_chars(b.strip()) for b in p['bullets'] if isinstance(b, str)]
-            if len(clean_bullets) > 3:
-                clean_bullets = clean_bullets[:3]
-            p['bullets'] = clean_bullets
+        layout_project(p)
             
     # 3. Clean Skills
     if 'skills' in data:
-        for cat, val in data['skills'].items():
-            if isinstance(val, str):
-                data['skills'][cat] = escape_latex_chars(val)
-            elif isinstance(val, list):
-                data['skills'][cat] = escape_latex_chars(", ".join(val))
-            
+        layout_skills(data['skills'])
     return data
 
+@tracing.traced("clean.escape_resume")
+def escape_resume(data, flatten=False):
+    """
+    LaTeX-escaped copy of layout-checked resume data; `data` itself is left plain.
+    flatten=True also does build_pdf's clean_text in the same walk (equal to
+    clean_text(escape_resume(data))), so the result can go to build_pdf(..., clean=False).
+    """
+    escaped = {k: clean_text(v) if flatten else v for k, v in data.items()
+               if k not in ('experience', 'projects', 'skills')}
+    escaped['experience'] = [escape_experience(exp, flatten) for exp in data.get('experience', [])]
+    escaped['projects'] = [escape_project(p, flatten) for p in data.get('projects', [])]
+    if 'skills' in data:
+        escaped['skills'] = escape_skills(data['skills'], flatten)
+    return escaped
+
+def sanity_check(data):
+    """Guardrail: Fixes layout breaking issues AND sanitizes LaTeX"""
+    print("🛡️  Running Sanity Checks & LaTeX Cleaning...")
+    return escape_resume(layout_check(data))
+
+def normalize_experience(exp):
+    if 'bullets' not in exp and 'description' in exp: 
+        exp['bullets'] = exp.pop('description')
+    if 'role' not in exp:
+        for k in ['title', 'position', 'job_title', 'designation']:
+            if k in exp:
+                exp['role'] = exp.pop(k); break
+    return exp
+
+def normalize_project(p):
+    if 'name' not in p:
+        for k in ['project_name', 'title', 'Name']: 
+            if k in p: p['name'] = p.pop(k)
+    if 'tech_stack' not in p:
+        for k in ['technologies', 'stack', 'skills']:
+            if k in p: 
+                val = p.pop(k)
+                p['tech_stack'] = ", ".join(val) if isinstance(val, list) else str(val)
+    return p
+
+@tracing.traced("clean.normalize_keys")
 def normalize_keys(data):
     if not data: return data
     data = {k.lower(): v for k, v in data.items()}
 
     for exp in data.get('experience', []):
-        if 'bullets' not in exp and 'description' in exp: 
-            exp['bullets'] = exp.pop('description')
-        if 'role' not in exp:
-            for k in ['title', 'position', 'job_title', 'designation']:
-                if k in exp:
-                    exp['role'] = exp.pop(k); break
+        normalize_experience(exp)
     
     for p in data.get('projects', []):
-        if 'name' not in p:
-            for k in ['project_name', 'title', 'Name']: 
-                if k in p: p['name'] = p.pop(k)
-        if 'tech_stack' not in p:
-            for k in ['technologies', 'stack', 'skills']:
-                if k in p: 
-                    val = p.pop(k)
-                    p['tech_stack'] = ", ".join(val) if isinstance(val, list) else str(val)
+        normalize_project(p)
     return data
 
+@tracing.traced("clean.clean_skills")
 def clean_skills(data):
     skills = data.get('skills', {})
     if skills:
@@ -132,16 +229,14 @@ def clean_skills(data):
     data['skills'] = skills
     return data
 
-def analyze_and_tailor(jd_text, portfolio_text):
-    prompt = f"""
+def build_tailor_prefix(portfolio_text):
+    """
+    The part of the tailoring prompt that doesn't depend on the JD: instructions,
+    output format and portfolio. It goes first so providers can cache it across jobs.
+    """
+    return f"""
     ROLE: Resume Strategist (ATS Optimizer).
-    TASK: Tailor the resume to match the JD using IMPACTFUL, CONCISE points.
-
-    --- JOB DESCRIPTION ---
-    {jd_text}
-
-    --- MASTER PORTFOLIO ---
-    {portfolio_text}
+    TASK: Tailor the resume to match the JOB DESCRIPTION (given after the portfolio) using IMPACTFUL, CONCISE points.
 
     --- STRATEGY INSTRUCTIONS ---
     1. SELECTION:
@@ -169,60 +264,424 @@ def analyze_and_tailor(jd_text, portfolio_text):
             "skills": {{ "languages": "...", "tools": "...", "frameworks": "..." }}
         }}
     }}
+
+    --- MASTER PORTFOLIO ---
+    {portfolio_text}
     """
-    return get_llm_response(prompt)
 
-def main():
-    print("📂 Loading inputs...")
-    static_data = load_json(STATIC_PATH)
-    portfolio = load_file(PORTFOLIO_PATH)
-    jd_text = load_file(JD_PATH)
+def build_tailor_suffix(jd_text, shortlist=None):
+    """The per-JD part of the tailoring prompt; `shortlist` names the best-matching portfolio entries."""
+    hint = f"\n    --- MOST RELEVANT ENTRIES ---\n    {', '.join(shortlist)}\n" if shortlist else ""
+    return f"""
+    --- JOB DESCRIPTION ---
+    {jd_text}
+    {hint}"""
 
-    if not (static_data and portfolio and jd_text): return
+def build_tailor_prompt(jd_text, portfolio_text, shortlist=None):
+    return build_tailor_prefix(portfolio_text) + build_tailor_suffix(jd_text, shortlist)
 
-    # --- PHASE 1: GENERATE RESUME ---
-    print("\n--- PHASE 1: TAILORING RESUME ---")
-    response = analyze_and_tailor(jd_text, portfolio)
-    if not response: 
-        print("❌ AI returned no response."); return
+@tracing.traced("tailor")
+def analyze_and_tailor(jd_text, portfolio_text, on_section=None, shortlist=None):
+    """
+    Asks the LLM for the tailored resume. With `on_section`, the response is
+    streamed and on_section(path, value) fires for meta and each experience /
+    project item as soon as it is complete (paths in TAILOR_STREAM_PATHS).
+    """
+    prefix, prompt = build_tailor_prefix(portfolio_text), build_tailor_suffix(jd_text, shortlist)
+    if on_section:
+        return get_llm_response_stream(prompt, TAILOR_STREAM_PATHS, on_section, prefix=prefix)
+    return get_llm_response(prompt, prefix=prefix)
 
-    response = {k.lower(): v for k, v in response.items()}
+def shares_prefix(portfolio_index, budget=None):
+    """
+    True when every JD should get the same (whole) portfolio: no token budget
+    forces a per-JD selection and the provider actually holds the prefix in a
+    context cache. Without a cache handle (caching off, prefix too small, cache
+    creation failed) the whole portfolio would be billed in full on every job,
+    so the BM25 selection is used instead.
+    """
+    budget = TOKEN_BUDGET if budget is None else budget
+    if budget > 0 or not portfolio_index["entries"]: return False
+    provider = get_provider()
+    if not getattr(provider, "prefix_cache", False): return False
+    return provider.cached_content(build_tailor_prefix(render_portfolio(portfolio_index))) is not None
 
-    meta = response.get('meta', {})
-    resume_data = response.get('resume', {})
+@tracing.traced("retrieval.fit_to_budget")
+def fit_to_budget(jd_text, portfolio_index, budget=None):
+    """
+    Returns (jd_text, portfolio_text) for the tailoring prompt, trimmed so the
+    whole prompt stays within `budget` estimated tokens (untrimmed if budget <= 0).
+    Returns (None, None) if even the bare instructions don't fit.
+    Unbudgeted, a provider with prefix caching gets the whole portfolio (identical
+    for every JD, so its cached prefix is reused); others get the BM25 selection.
+    """
+    budget = TOKEN_BUDGET if budget is None else budget
+    if shares_prefix(portfolio_index, budget):
+        return jd_text, render_portfolio(portfolio_index)
+    if budget <= 0:
+        return jd_text, portfolio_for_jd(portfolio_index, jd_text)
+
+    room = budget - estimate_tokens(build_tailor_prompt("", ""))
+    if room <= 0:
+        print(f"❌ Token budget {budget} is smaller than the prompt instructions.")
+        return None, None
+    full_jd = estimate_tokens(jd_text)
+    # The JD may use more than its share when the portfolio doesn't need the room
+    portfolio_need = estimate_tokens(portfolio_for_jd(portfolio_index, jd_text))
+    jd_room = max(int(room * JD_BUDGET_SHARE), room - portfolio_need)
+    if full_jd > jd_room:
+        jd_text = truncate_to_tokens(jd_text, jd_room)
+    portfolio_text = portfolio_for_jd(portfolio_index, jd_text, max_tokens=room - estimate_tokens(jd_text))
+    if estimate_tokens(jd_text) < full_jd or estimate_tokens(portfolio_text) < portfolio_need:
+        print(f"✂️  Trimmed prompt inputs to fit the {budget}-token budget.")
+    return jd_text, portfolio_text
 
+def tailor_inputs(jd_text, portfolio_index, portfolio_text, shortlist=None):
+    """
+    Digest of what the tailoring response depends on: the prompt instructions,
+    the JD, the model and the portfolio entries this JD draws on. In shared-prefix
+    mode those are the BM25-selected entries (by content hash), so editing an
+    entry the JD doesn't match leaves the response valid.
+    """
+    if shortlist is not None:
+        portfolio = [portfolio_index.get("preamble", ""), sorted(e["id"] for e in select_entries(portfolio_index, jd_text))]
+    else:
+        portfolio = portfolio_text
+    provider = get_provider()
+    return job_state.digest(build_tailor_prefix(""), build_tailor_suffix(jd_text, shortlist), portfolio,
+                            provider.name, provider.model)
+
+def _stream_cleaner(streamed):
+    """on_section callback that normalizes + layout-checks items while the rest is still generating."""
+    def on_section(path, value):
+        if path == ("meta",) and isinstance(value, dict):
+            print(f"🎯 Target: {value.get('role') or 'Unknown_Role'} @ {value.get('company') or 'Unknown_Company'} (streaming...)")
+        elif len(path) == 3 and isinstance(value, dict):
+            if path[1] == "experience":
+                streamed["experience"][path[2]] = layout_experience(normalize_experience(value))
+            elif path[1] == "projects":
+                streamed["projects"][path[2]] = layout_project(normalize_project(value))
+    return on_section
+
+@tracing.traced("clean.merge_streamed")
+def _merge_streamed(resume_data, streamed):
+    """Builds the layout-checked resume from items already processed during streaming (checking any it missed)."""
+    data = {k.lower(): v for k, v in resume_data.items()}
+    for section, normalize, layout in (("experience", normalize_experience, layout_experience),
+                                       ("projects", normalize_project, layout_project)):
+        done = streamed[section]
+        data[section] = [done[i] if i in done else layout(normalize(item))
+                         for i, item in enumerate(data.get(section, []))]
+    if 'skills' in data:
+        layout_skills(data['skills'])
+    return data
+
+def build_base_name(meta):
     company = meta.get('company') or "Unknown_Company"
     role = meta.get('role') or "Unknown_Role"
     clean_company = re.sub(r'[^a-zA-Z0-9]', '', company)
     clean_role = re.sub(r'[^a-zA-Z0-9]', '', role)
-    base_name = f"{clean_company}_{clean_role}"
+    return f"{clean_company}_{clean_role}"
+
+def prepare_resume(response, static_data, pdf=True, streamed=None):
+    """
+    Cleans a tailoring response into what the outputs are built from: a dict with
+    meta, base_name, plain_data (checked resume sections, for the interview prompt),
+    plain_final (plus static data, for the text formats) and final_data (LaTeX-
+    escaped, for the PDF; None unless `pdf`). `streamed` holds the sections already
+    cleaned while a streamed response arrived.
+    """
+    response = {k.lower(): v for k, v in response.items()}
+
+    meta = response.get('meta', {})
+    resume_data = response.get('resume', {})
+    base_name = build_base_name(meta)
     
-    print(f"🎯 Target: {role} @ {company}")
+    print(f"🎯 Target: {meta.get('role') or 'Unknown_Role'} @ {meta.get('company') or 'Unknown_Company'}")
 
     # DATA CLEANING
-    resume_data = normalize_keys(resume_data)
-    resume_data = sanity_check(resume_data) # Cleans AI data
-    resume_data = clean_skills(resume_data)
+    if pdf:
+        print("🛡️  Running Sanity Checks & LaTeX Cleaning...")
+    if streamed is not None:
+        plain_data = _merge_streamed(resume_data, streamed) # Items were checked as they streamed in
+    else:
+        plain_data = layout_check(normalize_keys(resume_data))
+    plain_data = clean_skills(plain_data)
     
-    # --- CRITICAL FIX: Sanitize Static Data (Education & Leadership) ---
-    # This prevents crashes from symbols like "%" in "93%"
-    static_data = recursive_sanitize(static_data)
-    # -------------------------------------------------------------------
-    
-    final_data = {**static_data['contact_info'], **resume_data}
-    final_data['education'] = static_data['education']
-    final_data['leadership'] = static_data['leadership']
+    # Markdown/HTML/text/DOCX render from the plain data with their own escaping
+    plain_final = {**static_data['contact_info'], **plain_data,
+                   'education': static_data['education'], 'leadership': static_data['leadership']}
+
+    final_data = None
+    if pdf:
+        # --- CRITICAL FIX: Sanitize Static Data (Education & Leadership) ---
+        # This prevents crashes from symbols like "%" in "93%"
+        # (flatten=True also does build_pdf's text cleanup in the same pass)
+        with tracing.span("clean.sanitize_static"):
+            static_data = recursive_sanitize(static_data, flatten=True)
+        # -------------------------------------------------------------------
+
+        # The interview prompt and non-PDF outputs keep the plain text; only the PDF is escaped
+        final_data = {**static_data['contact_info'], **escape_resume(plain_data, flatten=True)}
+        final_data['education'] = static_data['education']
+        final_data['leadership'] = static_data['leadership']
+
+    return {"meta": meta, "base_name": base_name, "plain_data": plain_data,
+            "plain_final": plain_final, "final_data": final_data}
+
+def _timed(timings, phase, fn, *args, **kwargs):
+    start = time.perf_counter()
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        timings[phase] = round(time.perf_counter() - start, 3)
+
+@tracing.traced("job")
+def run_job(jd_text, portfolio_index, static_data, output_dir="output", prep_dir="interview_prep",
+            stream=STREAM_RESPONSES, overlap=OVERLAP_PHASES, formats=None, incremental=None):
+    """
+    Runs both phases for a single JD and returns a summary dict
+    (base_name, pdf_path, outputs, prep_path, error, errors, timings) instead of
+    bailing out silently. `formats` lists the resume outputs (see
+    renderers.FORMATS, default OUTPUT_FORMATS); `outputs` maps each to its path. `portfolio_index` comes from src.portfolio.load_portfolio_index.
+    With overlap=True the PDF compile and the interview LLM call run concurrently;
+    `errors` holds a message per failed phase and `timings` the seconds per phase.
+    Inside a run_log job, `tokens` holds the token/cost totals per stage, and
+    with tracing enabled `trace_ms` says where the time went. With FIT_ONE_PAGE,
+    `fit` reports the cuts made to keep the PDF on one page (see src.fit).
+    With `incremental` (default job_state.ENABLED), stages whose inputs haven't
+    changed since the last run into `output_dir` are skipped and listed in `reused`.
+    """
+    job_start = time.perf_counter()
+    timings = {}
+    formats = OUTPUT_FORMATS if formats is None else formats
+    result = {"base_name": None, "pdf_path": None, "outputs": {}, "prep_path": None, "error": None,
+              "errors": {}, "timings": timings, "reused": []}
+    incremental = job_state.ENABLED if incremental is None else incremental
+    state = job_state.JobState(os.path.join(output_dir, job_state.STATE_FILENAME)) if incremental else None
+
+    # --- PHASE 1: GENERATE RESUME ---
+    print("\n--- PHASE 1: TAILORING RESUME ---")
+    raw_tokens = estimate_tokens(jd_text)
+    jd_text = jd.clean_jd(jd_text)
+    if estimate_tokens(jd_text) < raw_tokens:
+        print(f"🧹 Stripped JD boilerplate: ~{raw_tokens} -> ~{estimate_tokens(jd_text)} tokens")
+    jd_text, portfolio_text = fit_to_budget(jd_text, portfolio_index)
+    if jd_text is None:
+        result["error"] = result["errors"]["tailor"] = "Token budget too small"
+        return _finish_job(result, job_start)
+    # With the whole portfolio in a shared prefix, the BM25 ranking goes in the JD part instead
+    shortlist = shortlist_names(portfolio_index, jd_text) if shares_prefix(portfolio_index) else None
+    streamed = {"experience": {}, "projects": {}}
+    inputs = tailor_inputs(jd_text, portfolio_index, portfolio_text, shortlist) if state else None
+    previous = state.fresh("tailor", inputs) if state else None
+    if previous:
+        print("♻️  JD and matching portfolio entries unchanged, reusing the tailored resume.")
+        response = previous["response"]
+        result["reused"].append("tailor")
+    else:
+        response = _timed(timings, "tailor", analyze_and_tailor,
+            jd_text, portfolio_text,
+            on_section=_stream_cleaner(streamed) if stream else None,
+            shortlist=shortlist,
+        )
+    if not response: 
+        print("❌ AI returned no response.")
+        result["error"] = result["errors"]["tailor"] = "AI returned no response"
+        return _finish_job(result, job_start)
+    if state and not previous:
+        state.record("tailor", inputs, response=response)
+
+    prepared = prepare_resume(response, static_data, pdf="pdf" in formats,
+                              streamed=streamed if stream else None)
+    base_name = result["base_name"] = prepared["base_name"]
+    plain_data, plain_final, final_data = prepared["plain_data"], prepared["plain_final"], prepared["final_data"]
 
     pdf_filename = f"Resume_Om_Asanani_{base_name}.pdf"
-    output_path = os.path.join("output", pdf_filename)
-    if not os.path.exists("output"): os.makedirs("output")
-    
-    print(f"🔨 Building PDF: {output_path}...")
-    build_pdf(final_data, output_filename=output_path)
+    output_path = os.path.join(output_dir, pdf_filename)
+    if not os.path.exists(output_dir): os.makedirs(output_dir, exist_ok=True)
+
+    def interview_phase():
+        print("\n--- PHASE 2: GENERATING INTERVIEW PREP ---")
+        inputs = job_state.digest(interview_agent.build_interview_prompt(jd_text, plain_data),
+                                  get_provider().model, base_name, prep_dir) if state else None
+        previous = state.fresh("interview", inputs, [state.stages.get("interview", {}).get("path")]) if state else None
+        if previous:
+            print(f"♻️  Interview inputs unchanged, keeping {previous['path']}")
+            result["reused"].append("interview")
+            return previous["path"]
+        with tracing.span("interview"):
+            path = _timed(timings, "interview", interview_agent.generate_interview_guide,
+                          jd_text, plain_data, base_name, output_dir=prep_dir, stream=stream)
+        if state and path:
+            state.record("interview", inputs, path=path)
+        return path
+
+    def pdf_phase():
+        inputs = job_state.digest(final_data, render_cache.assets_hash(TEMPLATE_DIR), fit.FIT_ONE_PAGE,
+                                  fit.MAX_PAGES, jd_text if fit.FIT_ONE_PAGE else None) if state else None
+        previous = state.fresh("pdf", inputs, [output_path]) if state else None
+        if previous:
+            print(f"♻️  PDF inputs unchanged, keeping {output_path}")
+            result["reused"].append("pdf")
+            if previous.get("fit"): result["fit"] = previous["fit"]
+            return output_path
+        print(f"🔨 Building PDF: {output_path}...")
+        with tracing.span("pdf"):
+            if not fit.FIT_ONE_PAGE:
+                path = _timed(timings, "pdf", build_pdf, final_data, output_filename=output_path, clean=False)
+            else:
+                path, result["fit"] = _timed(timings, "pdf", fit.build_fitted, final_data, output_path,
+                                             jd_text=jd_text, clean=False)
+        if state and path:
+            state.record("pdf", inputs, fit=result.get("fit"))
+        return path
+
+    interview_future = None
+    if overlap:
+        # final_data is a cleaned copy, so the two phases never share mutable data.
+        pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="interview")
+        interview_future = pool.submit(contextvars.copy_context().run, interview_phase)
+        pool.shutdown(wait=False)
+
+    text_formats = [f for f in formats if f != "pdf"]
+    if text_formats:
+        base_path = os.path.splitext(output_path)[0]
+        render_inputs = job_state.digest(plain_final, render_cache.assets_hash(TEMPLATE_DIR)) if state else None
+        kept = [f for f in text_formats if state and state.fresh(f"render.{f}", render_inputs, [f"{base_path}.{f}"])]
+        if kept:
+            result["reused"].extend(f"render.{f}" for f in kept)
+            result["outputs"] = {f: f"{base_path}.{f}" for f in kept}
+        stale = [f for f in text_formats if f not in kept]
+        if stale:
+            result["outputs"].update(_timed(timings, "render", renderers.write_outputs, plain_final, stale, base_path))
+        for fmt in stale:
+            if state and fmt in result["outputs"]:
+                state.record(f"render.{fmt}", render_inputs)
+        for fmt in text_formats:
+            if fmt in result["outputs"]:
+                print(f"📝 {fmt.upper()} resume saved to: {result['outputs'][fmt]}")
+            else:
+                result["errors"][fmt] = f"{fmt.upper()} generation failed"
+
+    if "pdf" in formats:
+        try:
+            result["pdf_path"] = pdf_phase()
+        except Exception as e:
+            result["errors"]["pdf"] = f"{type(e).__name__}: {e}"
+        if result["pdf_path"]:
+            result["outputs"]["pdf"] = result["pdf_path"]
+        else:
+            result["errors"].setdefault("pdf", "PDF generation failed")
+
+    try:
+        result["prep_path"] = interview_future.result() if interview_future else interview_phase()
+    except Exception as e:
+        result["errors"]["interview"] = f"{type(e).__name__}: {e}"
+
+    if not result["prep_path"]:
+        result["errors"].setdefault("interview", "Interview prep generation failed")
+
+    # Resume outputs first (the PDF before the others), then the interview prep
+    for phase in ["pdf", *text_formats, "interview"]:
+        if phase in result["errors"]:
+            result["error"] = result["errors"][phase]
+            break
+
+    if state:
+        state.save()
+
+    # What the same job would have taken with the phases run back to back
+    timings["sequential"] = round(sum(timings.get(k, 0) for k in ("tailor", "render", "pdf", "interview")), 3)
+    _finish_job(result, job_start)
+    print(f"⏱️  Job wall time {timings['wall']}s (phases back to back: {timings['sequential']}s)")
+    return result
+
+def run_context(portfolio_index, static_data):
+    """Digest of everything besides the JD that a job's outputs depend on."""
+    return job_state.digest(portfolio_index.get("sha256"), static_data, render_cache.assets_hash(TEMPLATE_DIR),
+                            get_provider().model)
+
+def find_reusable(jd_index, jd_text, job_id, context, formats=None):
+    """
+    (fingerprint, result) for a JD: `result` is the stored result of an earlier,
+    near-identical posting built from the same `context` (see run_context) that
+    has the requested `formats` on disk, else None. The job's own earlier runs
+    are skipped; job_state decides what to redo for those.
+    """
+    fingerprint = jd.simhash(jd.clean_jd(jd_text))
+    entry = jd_index.find(fingerprint, where=lambda e: e["job_id"] != job_id and
+                          (e.get("result") or {}).get("context") == context)
+    return fingerprint, jd.reusable(entry, OUTPUT_FORMATS if formats is None else formats)
+
+def reused_result(job_id, previous):
+    """A job result that points at the outputs of an earlier run of the same posting."""
+    print(f"♻️  Same posting as '{previous['job_id']}', reusing its resume and interview prep.")
+    return {"base_name": previous.get("base_name"), "pdf_path": previous.get("pdf_path"),
+            "outputs": dict(previous["outputs"]), "prep_path": previous.get("prep_path"), "error": None,
+            "errors": {}, "timings": {}, "duplicate_of": previous["job_id"]}
+
+def remember_result(jd_index, fingerprint, job_id, result, context):
+    """Indexes a successful job so later copies of the posting can reuse it."""
+    if result.get("error") or result.get("duplicate_of"): return
+    jd_index.add(fingerprint, job_id, {"job_id": job_id, "context": context, **{k: result.get(k) for k in
+                                       ("base_name", "pdf_path", "outputs", "prep_path")}})
+
+def _finish_job(result, job_start):
+    """Stamps wall time and, when a run log is active, the job's token usage."""
+    result["timings"]["wall"] = round(time.perf_counter() - job_start, 3)
+    log = run_log.current()
+    if log is not None:
+        result["tokens"] = run_log.token_totals(log["llm_calls"])
+        if "_spans" in log:
+            result["trace_ms"] = tracing.summarize(log["_spans"])  # llm / latex / io / python
+    return result
+
+def write_run_report(results, path=RUN_REPORT_PATH, extra=None):
+    """Writes a JSON report (per-job results plus token/cost totals across all of them)."""
+    calls = [c for r in results for c in r.get("llm_calls", [])]
+    report = {
+        "generated_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        **(extra or {}),
+        "tokens": run_log.token_totals(calls),
+        "jobs": results,
+    }
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    return report
+
+def main():
+    log = run_log.start_job("main")
+    if tracing.TRACE_DIR:
+        tracing.enable(log)
+
+    print("📂 Loading inputs...")
+    static_data = load_json(STATIC_PATH)
+    portfolio_index = load_portfolio_index(PORTFOLIO_PATH)
+    jd_text = load_file(JD_PATH)
+
+    if not (static_data and portfolio_index and jd_text): return
 
-    # --- PHASE 2: INTERVIEW PREP ---
-    print("\n--- PHASE 2: GENERATING INTERVIEW PREP ---")
-    interview_agent.generate_interview_guide(jd_text, resume_data, base_name)
+    jd_index = jd.JdIndex() if jd.DEDUPE_ENABLED else None
+    if jd_index:
+        context = run_context(portfolio_index, static_data)
+        fingerprint, previous = find_reusable(jd_index, jd_text, JD_PATH, context)
+        if previous:
+            reused_result(JD_PATH, previous)
+            return
+    result = run_job(jd_text, portfolio_index, static_data)
+    if jd_index:
+        remember_result(jd_index, fingerprint, JD_PATH, result, context)
+    result["llm_calls"] = run_log.summary(log)["llm_calls"]
+    if tracing.TRACE_DIR:
+        stamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        result["trace_path"] = tracing.write(log, os.path.join(tracing.TRACE_DIR, f"{result['base_name'] or 'job'}_{stamp}"))
+        print(f"🧭 Trace saved to: {result['trace_path']} ({result['trace_ms']})")
+    report = write_run_report([result])
+    total = report["tokens"]["total"]
+    print(f"🧮 Tokens: {total['prompt_tokens']} in / {total['response_tokens']} out "
+          f"(~${total['cost_usd']:.4f}), report: {RUN_REPORT_PATH}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
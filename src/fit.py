@@ -0,0 +1,229 @@
+# fit.py
+"""
+Keeps the PDF resume on one page without compiling it over and over.
+
+Before the first compile, estimate_height() predicts how tall the page will be
+from Computer Modern character widths and the template's spacing, and trim_once()
+makes cheap cuts (the bullet least relevant to the JD, the longest tech stack)
+until the prediction fits. The compile then reports the real page count from the
+pdflatex log (resume_builder.parse_latex_log); only if the estimate was off does
+build_fitted() tighten it and rebuild, at most MAX_COMPILES times.
+"""
+import os
+import re
+import copy
+from . import tracing
+from .retrieval import tokenize
+from .resume_builder import build_pdf, build_pdf_async
+
+# CONFIGURATION
+# Off by default: the height constants below are not yet calibrated against pdflatex output
+FIT_ONE_PAGE = os.getenv("FIT_ONE_PAGE", "0") == "1"
+MAX_PAGES = 1
+MAX_COMPILES = 3            # Including the first build
+MAX_TRIMS = 12              # Cuts allowed per job, so a huge resume can't be gutted silently
+MIN_BULLETS = 1             # Every experience/project keeps at least this many bullets
+MIN_STACK_ITEMS = 3         # Tech stacks are never cut below this many items
+RETRY_SHRINK = 0.95         # After an overflow, aim this much lower than the last estimate
+
+# Page geometry of templates/resume_template.tex (pt): letterpaper + fullpage, widened margins
+TEXT_WIDTH_PT = 553.7
+BULLET_WIDTH_PT = 528.0     # Minus the itemize indent
+PAGE_HEIGHT_PT = 751.0
+LINE_PT = 12.0              # \small baselineskip in an 11pt document
+HEIGHT_PT = {
+    "header": 46.0,         # Name + contact line
+    "section": 24.0,        # Title, rule and the spacing around them
+    "subheading": 28.0,     # Two-row \resumeSubheading
+    "project": 16.0,        # One-row \resumeProjectHeading
+    "bullet_gap": 1.0,      # Between \resumeItems
+    "list_end": 4.0,        # \resumeItemListEnd
+}
+
+# Character widths (pt) of cmr10 at 10pt, i.e. \small in an 11pt document
+_WIDTHS = {
+    **dict(zip("abcdefghijklmnopqrstuvwxyz",
+               [5.0, 5.56, 4.44, 5.56, 4.44, 3.06, 5.0, 5.56, 2.78, 3.06, 5.28, 2.78, 8.33,
+                5.56, 5.0, 5.56, 5.28, 3.92, 3.94, 3.89, 5.56, 5.28, 7.22, 5.28, 5.28, 4.44])),
+    **dict(zip("ABCDEFGHIJKLMNOPQRSTUVWXYZ",
+               [7.5, 7.08, 7.22, 7.64, 6.81, 6.53, 7.85, 7.5, 3.61, 5.14, 7.78, 6.25, 9.17,
+                7.5, 7.78, 6.81, 7.78, 7.36, 5.56, 7.22, 7.5, 7.5, 10.28, 7.5, 7.5, 6.11])),
+    **{d: 5.0 for d in "0123456789"},
+    " ": 3.33, ".": 2.78, ",": 2.78, ":": 2.78, ";": 2.78, "-": 3.33, "(": 3.89, ")": 3.89,
+    "/": 5.0, "%": 8.33, "&": 7.78, "'": 2.78, "|": 2.78, "+": 7.78,
+}
+_DEFAULT_WIDTH = 5.0
+_BOLD = 1.1                 # cmbx is roughly this much wider than cmr
+
+# LaTeX escapes from main1.LATEX_ESCAPES back to the characters they print
+_UNESCAPE = re.compile(r'\\textasciitilde\{\}|\\textasciicircum\{\}|\$([<>])\$|\\([&%$#_{}])')
+
+def unescape(text):
+    return _UNESCAPE.sub(lambda m: m.group(1) or m.group(2) or ("~" if "tilde" in m.group(0) else "^"), text)
+
+def text_width(text, scale=1.0):
+    """Printed width (pt) of escaped LaTeX text set in \\small."""
+    return sum(_WIDTHS.get(c, _DEFAULT_WIDTH) for c in unescape(text or "")) * scale
+
+def _lines(text, width=BULLET_WIDTH_PT):
+    """Lines a paragraph wraps to, breaking at spaces like TeX's ragged-right would."""
+    lines, used = 1, 0.0
+    space = _WIDTHS[" "]
+    for word in unescape(text or "").split():
+        w = text_width(word)
+        if used and used + space + w > width:
+            lines, used = lines + 1, w
+        else:
+            used += (space if used else 0) + w
+    return lines
+
+def _bullets_height(bullets):
+    if not bullets: return 0.0
+    return sum(_lines(b) * LINE_PT + HEIGHT_PT["bullet_gap"] for b in bullets) + HEIGHT_PT["list_end"]
+
+def estimate_height(data):
+    """Predicted height (pt) of the rendered resume."""
+    h = HEIGHT_PT["header"]
+    for key in ("education", "experience", "leadership"):
+        entries = data.get(key) or []
+        if not entries and key == "leadership": continue
+        h += HEIGHT_PT["section"]
+        for entry in entries:
+            h += HEIGHT_PT["subheading"] + _bullets_height(entry.get('bullets'))
+    h += HEIGHT_PT["section"]
+    for project in data.get('projects') or []:
+        h += HEIGHT_PT["project"] + _bullets_height(project.get('bullets'))
+    skills = data.get('skills') or {}
+    h += HEIGHT_PT["section"] + sum(_lines(f"{label}: {skills.get(key, '')}", TEXT_WIDTH_PT) * LINE_PT
+                                    for label, key in (("Languages", "languages"), ("Developer Tools", "tools"),
+                                                       ("Technologies/Frameworks", "frameworks")))
+    return h
+
+def estimate_pages(data):
+    return int(estimate_height(data) // PAGE_HEIGHT_PT) + 1
+
+def _stack_items(project):
+    return [s.strip() for s in (project.get('tech_stack') or "").split(",") if s.strip()]
+
+def _heading_width(project):
+    return (text_width(project.get('name', ''), _BOLD) + text_width(" | ") +
+            text_width(project.get('tech_stack', '')) + text_width(project.get('date', ''), _BOLD))
+
+def fix_wide_headings(data):
+    """Drops trailing tech-stack items from project headings wider than the page. Returns the cuts made."""
+    cuts = []
+    for project in data.get('projects') or []:
+        items = _stack_items(project)
+        while len(items) > MIN_STACK_ITEMS and _heading_width(project) > TEXT_WIDTH_PT:
+            items.pop()
+            project['tech_stack'] = ", ".join(items)
+            cuts.append(f"stack: {project.get('name', '')}")
+    return cuts
+
+def _relevance(bullet, jd_terms):
+    return len(set(tokenize(unescape(bullet))) & jd_terms)
+
+def trim_once(data, jd_terms):
+    """
+    Makes the cheapest single cut: the bullet sharing the fewest terms with the JD
+    (ties go to the later, longer bullet), else one item off the longest tech stack.
+    Returns a description of the cut, or None when nothing is left to trim.
+    """
+    candidates = []
+    for key in ("experience", "projects"):
+        for entry in data.get(key) or []:
+            bullets = entry.get('bullets') or []
+            if len(bullets) <= MIN_BULLETS: continue
+            for i, bullet in enumerate(bullets):
+                candidates.append((_relevance(bullet, jd_terms), -i, -len(bullet), key, entry, i))
+    if candidates:
+        _, _, _, key, entry, i = min(candidates, key=lambda c: c[:3])
+        entry['bullets'].pop(i)
+        return f"bullet: {entry.get('company') or entry.get('name', '')} #{i + 1}"
+
+    projects = [p for p in data.get('projects') or [] if len(_stack_items(p)) > MIN_STACK_ITEMS]
+    if projects:
+        project = max(projects, key=lambda p: text_width(p.get('tech_stack', '')))
+        project['tech_stack'] = ", ".join(_stack_items(project)[:-1])
+        return f"stack: {project.get('name', '')}"
+    return None
+
+def trim_to_fit(data, jd_terms, target_pt, trims):
+    """Cuts until estimate_height(data) <= target_pt, appending each cut to `trims`."""
+    while estimate_height(data) > target_pt and len(trims) < MAX_TRIMS:
+        cut = trim_once(data, jd_terms)
+        if not cut: break
+        trims.append(cut)
+
+def _fit_steps(data, jd_text, max_pages, info):
+    """
+    The fitting loop as a generator, so sync and async builds share it: yields
+    `data` whenever it should be compiled and is sent that build's (path, report).
+    """
+    jd_terms = set(tokenize(jd_text or ""))
+    target = PAGE_HEIGHT_PT * max_pages
+    trim_to_fit(data, jd_terms, target, info["trims"])
+    info["predicted_pages"] = estimate_pages(data)
+
+    while info["compiles"] < MAX_COMPILES:
+        path, report = yield data
+        info["compiles"] += 1
+        info["pages"] = report.get("pages")
+        if report.get("overfull_pt"):
+            info["overfull_pt"] = report["overfull_pt"]
+        if not path or not info["pages"] or info["pages"] <= max_pages:
+            return
+        # The estimate was optimistic: aim lower than what just overflowed
+        print(f"📏 Resume came out at {info['pages']} pages, trimming and rebuilding...")
+        target = min(target, estimate_height(data)) * RETRY_SHRINK
+        trimmed = len(info["trims"])
+        trim_to_fit(data, jd_terms, target, info["trims"])
+        if len(info["trims"]) == trimmed:
+            print(f"⚠️  Nothing left to trim, keeping {info['pages']} pages.")
+            return
+
+def _start(data):
+    data = copy.deepcopy(data)
+    return data, {"compiles": 0, "trims": fix_wide_headings(data), "pages": None, "predicted_pages": None}
+
+def _done(info, max_pages):
+    if info["trims"]:
+        print(f"✂️  Fit to {max_pages} page(s) with {len(info['trims'])} cut(s) in {info['compiles']} compile(s).")
+
+@tracing.traced("fit")
+def build_fitted(data, output_filename, jd_text="", max_pages=MAX_PAGES, **build_kwargs):
+    """
+    build_pdf() that trims `data` (LaTeX-escaped, as build_pdf takes it) until the
+    PDF is at most `max_pages` long. The caller's data is left untouched.
+    Returns (pdf_path or None, info) where info has compiles, trims, pages and predicted_pages.
+    """
+    data, info = _start(data)
+    steps = _fit_steps(data, jd_text, max_pages, info)
+    path = None
+    try:
+        attempt = next(steps)
+        while True:
+            report = {}
+            path = build_pdf(attempt, output_filename=output_filename, report=report, **build_kwargs)
+            attempt = steps.send((path, report))
+    except StopIteration:
+        pass
+    _done(info, max_pages)
+    return path, info
+
+async def build_fitted_async(data, output_filename, jd_text="", max_pages=MAX_PAGES, **build_kwargs):
+    """build_fitted() on resume_builder.build_pdf_async, for asyncio callers."""
+    data, info = _start(data)
+    steps = _fit_steps(data, jd_text, max_pages, info)
+    path = None
+    with tracing.span("fit"):
+        try:
+            attempt = next(steps)
+            while True:
+                report = {}
+                path = await build_pdf_async(attempt, output_filename=output_filename, report=report, **build_kwargs)
+                attempt = steps.send((path, report))
+        except StopIteration:
+            pass
+    _done(info, max_pages)
+    return path, info
@@ -1,12 +1,47 @@
 import os
 import json
+import asyncio
 import datetime
-from .utils import get_llm_response
+from . import tracing
+from .utils import get_llm_response, get_llm_response_async, get_llm_response_stream
 
-def generate_interview_guide(jd_text, resume_data, base_filename):
-    print("🎤 Consulting Interview Coach...")
+INTERVIEW_STREAM_PATHS = [("strategy_log",), ("hook",), ("technical_q_and_a", "*"), ("behavioral",)]
+# How resume_data goes into the prompt: "text" (terse lines), "json" (minified) or "pretty" (indent=2)
+RESUME_PROMPT_FORMAT = os.getenv("INTERVIEW_RESUME_FORMAT", "text")
+
+def _join(*parts, sep=" | "):
+    return sep.join(str(p) for p in parts if p)
+
+def compact_resume(resume_data, fmt=None):
+    """
+    Serializes the tailored resume for the prompt. resume_data should be the
+    plain (un-escaped) version; "text" drops the JSON punctuation entirely.
+    """
+    fmt = fmt or RESUME_PROMPT_FORMAT
+    if fmt == "pretty":
+        return json.dumps(resume_data, indent=2)
+    if fmt == "json":
+        return json.dumps(resume_data, separators=(",", ":"), ensure_ascii=False)
 
-    prompt = f"""
+    lines = []
+    if resume_data.get('experience'):
+        lines.append("EXPERIENCE")
+        for exp in resume_data['experience']:
+            lines.append("- " + _join(exp.get('role'), exp.get('company'), exp.get('dates'), exp.get('location')))
+            lines.extend(f"  * {b}" for b in exp.get('bullets') or [])
+    if resume_data.get('projects'):
+        lines.append("PROJECTS")
+        for p in resume_data['projects']:
+            lines.append("- " + _join(p.get('name'), p.get('tech_stack')))
+            lines.extend(f"  * {b}" for b in p.get('bullets') or [])
+    skills = resume_data.get('skills') or {}
+    if skills:
+        lines.append("SKILLS")
+        lines.extend(f"- {cat}: {val}" for cat, val in skills.items() if val)
+    return "\n".join(lines)
+
+def build_interview_prompt(jd_text, resume_data):
+    return f"""
     ROLE: Expert Technical Interviewer & Career Coach.
     GOAL: Prepare the candidate (Om Asanani) for an interview by generating Questions AND Ideal Answers.
     
@@ -14,7 +49,7 @@ def generate_interview_guide(jd_text, resume_data, base_filename):
     {jd_text}
     
     --- CANDIDATE RESUME (Source of Truth for Answers) ---
-    {json.dumps(resume_data, indent=2)}
+    {compact_resume(resume_data)}
     
     --- INSTRUCTIONS ---
     1. ANALYZE: Look for matches between the JD and the Candidate's Projects.
@@ -43,19 +78,89 @@ def generate_interview_guide(jd_text, resume_data, base_filename):
         }}
     }}
     """
+
+def generate_interview_guide(jd_text, resume_data, base_filename, output_dir="interview_prep", stream=False):
+    """
+    Writes Prep_<base_filename>.txt and returns its path (None on failure).
+    With stream=True each section is appended to a .part file as soon as the
+    model finishes it, and the final guide replaces it when the response ends.
+    """
+    print("🎤 Consulting Interview Coach...")
+
+    prompt = build_interview_prompt(jd_text, resume_data)
     
-    # Get structured JSON from Gemini
-    data = get_llm_response(prompt)
+    if not os.path.exists(output_dir): os.makedirs(output_dir, exist_ok=True)
+    filename = f"Prep_{base_filename}.txt"
+    full_path = os.path.join(output_dir, filename)
+
+    part_path = f"{full_path}.part"
+    try:
+        # Get structured JSON from Gemini
+        if stream:
+            data = _stream_guide(prompt, base_filename, part_path)
+        else:
+            data = get_llm_response(prompt, stage="interview")
+        if not data:
+            print("❌ Error: Could not generate interview prep."); return None
+
+        _save_guide(format_interview_guide(data, base_filename), full_path)
+        return full_path
+    finally:
+        # Only the finished guide is kept; a failed stream leaves no half file behind
+        if os.path.exists(part_path):
+            os.remove(part_path)
+
+def _save_guide(output_text, full_path):
+    with tracing.span("io.write_guide"), open(full_path, "w", encoding='utf-8') as f:
+        f.write(output_text)
+        
+    print(f"✅ Interview Prep saved to: {full_path}")
+
+async def generate_interview_guide_async(jd_text, resume_data, base_filename, output_dir="interview_prep",
+                                         report=None):
+    """
+    generate_interview_guide for asyncio callers (no streaming). Pass a dict as
+    `report` to also get the guide's text ("text") and the model's JSON ("data").
+    """
+    print("🎤 Consulting Interview Coach...")
+    prompt = build_interview_prompt(jd_text, resume_data)
+    full_path = os.path.join(output_dir, f"Prep_{base_filename}.txt")
+
+    data = await get_llm_response_async(prompt, stage="interview")
     if not data:
-        print("❌ Error: Could not generate interview prep."); return
+        print("❌ Error: Could not generate interview prep."); return None
+
+    output_text = format_interview_guide(data, base_filename)
+    await asyncio.to_thread(os.makedirs, output_dir, exist_ok=True)
+    await asyncio.to_thread(_save_guide, output_text, full_path)
+    if report is not None:
+        report.update(text=output_text, data=data)
+    return full_path
+
+def _header_lines(base_filename):
+    return [
+        "="*50,
+        "INTERVIEW PREP GUIDE (WITH ANSWERS)",
+        f"Target: {base_filename}",
+        f"Date: {datetime.date.today()}",
+        "="*50,
+    ]
+
+def _qa_lines(idx, item):
+    q = item.get('question', 'Unknown Question')
+    a = item.get('answer', 'No answer provided.')
+    return [f"\nQ{idx}: {q}", f"💡 ANSWER: {a}", "-" * 20]
+
+def _behavioral_lines(beh):
+    if isinstance(beh, dict):
+        return [f"Q: {beh.get('question', '')}", f"🗣️ POINTS: {beh.get('talking_points', '')}"]
+    return [str(beh)]
 
+@tracing.traced("interview.format")
+def format_interview_guide(data, base_filename):
+    """Renders the model's JSON guide as the plain-text prep file."""
     # --- FORMATTING THE OUTPUT AS TEXT ---
-    output_text = []
-    output_text.append("="*50)
-    output_text.append("INTERVIEW PREP GUIDE (WITH ANSWERS)")
-    output_text.append(f"Target: {base_filename}")
-    output_text.append(f"Date: {datetime.date.today()}")
-    output_text.append("="*50)
+    output_text = _header_lines(base_filename)
     
     output_text.append("\n🧠 STRATEGY LOG")
     output_text.append(data.get("strategy_log", "No strategy provided."))
@@ -68,30 +173,36 @@ def generate_interview_guide(jd_text, resume_data, base_filename):
     qa_list = data.get("technical_q_and_a", [])
     if isinstance(qa_list, list):
         for idx, item in enumerate(qa_list, 1):
-            q = item.get('question', 'Unknown Question')
-            a = item.get('answer', 'No answer provided.')
-            output_text.append(f"\nQ{idx}: {q}")
-            output_text.append(f"💡 ANSWER: {a}")
-            output_text.append("-" * 20)
+            output_text.extend(_qa_lines(idx, item))
     else:
         output_text.append("No technical questions generated.")
 
     output_text.append("\n⭐ BEHAVIORAL STAR")
-    beh = data.get("behavioral", {})
-    if isinstance(beh, dict):
-        output_text.append(f"Q: {beh.get('question', '')}")
-        output_text.append(f"🗣️ POINTS: {beh.get('talking_points', '')}")
-    else:
-        output_text.append(str(beh))
+    output_text.extend(_behavioral_lines(data.get("behavioral", {})))
     
     output_text.append("\n" + "="*50)
+    return "\n".join(output_text)
 
-    # Save to file
-    if not os.path.exists("interview_prep"): os.makedirs("interview_prep")
-    filename = f"Prep_{base_filename}.txt"
-    full_path = os.path.join("interview_prep", filename)
-    
-    with open(full_path, "w", encoding='utf-8') as f:
-        f.write("\n".join(output_text))
-        
-    print(f"✅ Interview Prep saved to: {full_path}")
\ No newline at end of file
+def _stream_guide(prompt, base_filename, part_path):
+    """Streams the guide, appending each finished section to part_path as it arrives."""
+    with open(part_path, "w", encoding='utf-8') as part:
+        part.write("\n".join(_header_lines(base_filename)) + "\n")
+        part.flush()
+
+        def on_item(path, value):
+            if path == ("strategy_log",):
+                lines = ["\n🧠 STRATEGY LOG", str(value)]
+            elif path == ("hook",):
+                lines = ["\n🎤 THE HOOK", f"\"{value}\""]
+            elif path[0] == "technical_q_and_a" and isinstance(value, dict):
+                lines = _qa_lines(path[1] + 1, value)
+                if path[1] == 0:
+                    lines.insert(0, "\n🔧 TECHNICAL DEEP DIVE")
+            elif path == ("behavioral",):
+                lines = ["\n⭐ BEHAVIORAL STAR", *_behavioral_lines(value)]
+            else:
+                return
+            part.write("\n".join(lines) + "\n")
+            part.flush()
+
+        return get_llm_response_stream(prompt, INTERVIEW_STREAM_PATHS, on_item, stage="interview")
@@ -0,0 +1,213 @@
+# jd.py
+"""
+Job-description ingestion: boilerplate stripping and near-duplicate detection.
+
+clean_jd() drops the sections every scraped posting carries but the resume never
+uses (EEO statements, benefits, "About us" blurbs, privacy notices) and normalizes
+whitespace. simhash() fingerprints the cleaned text, so the same posting scraped
+from two URLs (tracking params, reordered footer, a changed date) is recognized
+even though the text isn't byte-identical. JdIndex remembers the fingerprints of
+processed JDs on disk together with their results (the latest one per job id),
+so a repeat can reuse them.
+"""
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+import unicodedata
+from collections import Counter
+from . import tracing
+from .retrieval import tokenize
+
+# CONFIGURATION
+STRIP_BOILERPLATE = os.getenv("JD_STRIP_BOILERPLATE", "1") != "0"
+DEDUPE_ENABLED = os.getenv("JD_DEDUPE", "1") != "0"
+INDEX_PATH = os.path.join(".cache", "jd_index.jsonl")
+MAX_DISTANCE = 7            # SimHash bits that may differ for two JDs to count as the same posting
+SHINGLE = 2                 # Words per shingle
+BANDS = 8                   # Lookup bands; must exceed MAX_DISTANCE (see _bands)
+MIN_KEEP_RATIO = 0.3        # Keep the whole JD if stripping would leave less than this share of it
+
+# Section headings whose whole section is boilerplate (matched against the whole
+# heading, so "Benefits Platform Engineer" or "Legal Counsel" is not one)
+_BOILERPLATE_HEADINGS = re.compile(
+    r'(about (?!(the |this )?(role|job|position|opportunity|you)\b).{1,40}|who we are|'
+    r'our (company|story|mission|culture|values)|(company |employee |our )?benefits|perks( ?(&|and) ?benefits)?|'
+    r'what we offer|why (join|work)\b.{0,40}|compensation( ?(&|and) ?benefits)?|'
+    r'equal (employment )?opportunity( employer)?|eeo( statement)?|diversity( ?(&|and) ?inclusion)?|'
+    r'accommodations?|privacy( notice| policy)?|disclaimer|legal( notice| disclaimer)?|'
+    r'how to apply|application process)', re.IGNORECASE)
+# Sentences that are boilerplate wherever they appear
+_BOILERPLATE_TEXT = re.compile(
+    r'equal (employment )?opportunity|without regard to|regardless of (race|gender|age)|'
+    r'reasonable accommodation|e-verify|protected veteran|sexual orientation|'
+    r'applicant privacy|recruitment (agencies|fraud)|we do not accept unsolicited', re.IGNORECASE)
+# Headings of the sections the resume is tailored from, however they are capitalized
+_ROLE_HEADINGS = re.compile(
+    r'(about (the |this )?(role|job|position|opportunity|you)|the (role|job|opportunity)|'
+    r'(your |key )?(responsibilities|duties)( ?(&|and) ?(duties|responsibilities))?|'
+    r'(minimum |preferred |basic )?(requirements|qualifications)( ?(&|and) ?(requirements|qualifications|skills))?|'
+    r'what (you\'ll|you will|you\'d|you would) (do|bring|need|work on)|what (we\'re|we are) looking for|'
+    r'who you are|you (have|are|bring)|(nice|good) to haves?|bonus( points)?|(required |preferred )?skills|'
+    r'(your )?impact|(the |your )?day to day|(the |our )?team|tech stack|must haves?)', re.IGNORECASE)
+_HEADING = re.compile(r'^\s*(#{1,6}\s*)?([^\n.!?]{2,60}?)\s*:?\s*$')
+_BULLET = re.compile(r'^\s*([-*•·▪–]|\d+[.)])\s')
+_ZERO_WIDTH = dict.fromkeys(map(ord, "​‌‍﻿­"))
+
+def normalize_whitespace(text):
+    """NFKC, no zero-width characters, single spaces, at most one blank line in a row."""
+    text = unicodedata.normalize("NFKC", text).translate(_ZERO_WIDTH)
+    lines = [" ".join(line.split()) for line in text.splitlines()]
+    return re.sub(r'\n{3,}', '\n\n', "\n".join(lines)).strip()
+
+def _heading(line):
+    """
+    The heading text if `line` is an explicit section heading, else None: a short
+    unpunctuated line that ends in ":", starts with "#", or is the name of a known
+    role or boilerplate section. Title case alone doesn't count, since lists of
+    perks ("Health Insurance", "Unlimited PTO") look the same.
+    """
+    match = _HEADING.match(line)
+    if not match or _BULLET.match(line): return None
+    heading = match.group(2).lstrip("# ").strip()
+    if not heading or len(heading.split()) > 6: return None
+    if (line.rstrip().endswith(":") or line.lstrip().startswith("#")
+            or _ROLE_HEADINGS.fullmatch(heading) or _BOILERPLATE_HEADINGS.fullmatch(heading)):
+        return heading
+    return None
+
+def _strip_sentences(line):
+    """`line` without its boilerplate sentences (EEO, accommodation, privacy notices)."""
+    if not _BOILERPLATE_TEXT.search(line): return line
+    return " ".join(s for s in re.split(r'(?<=[.!?])\s+', line) if not _BOILERPLATE_TEXT.search(s))
+
+@tracing.traced("jd.clean")
+def clean_jd(text, strip=None):
+    """
+    The JD without boilerplate sections and sentences, whitespace normalized.
+    Headings are found line by line, so a boilerplate section ends at the next
+    explicit heading even without a blank line before it, and a boilerplate
+    sentence only takes itself out, not the list around it. `strip=False` (or
+    JD_STRIP_BOILERPLATE=0) only normalizes whitespace.
+    """
+    text = normalize_whitespace(text or "")
+    if not (STRIP_BOILERPLATE if strip is None else strip): return text
+    kept, skipping = [], False
+    for block in text.split("\n\n"):
+        lines = []
+        for line in block.split("\n"):
+            heading = _heading(line)
+            if heading is not None:
+                skipping = bool(_BOILERPLATE_HEADINGS.fullmatch(heading))
+            line = "" if skipping else _strip_sentences(line)
+            if line:
+                lines.append(line)
+        if lines:
+            kept.append("\n".join(lines))
+    cleaned = "\n\n".join(kept)
+    return cleaned if len(cleaned) >= len(text) * MIN_KEEP_RATIO else text
+
+def simhash(text, bits=64):
+    """64-bit SimHash over word shingles of the JD's terms, weighted by count."""
+    terms = tokenize(text)
+    shingles = Counter(" ".join(terms[i:i + SHINGLE]) for i in range(max(1, len(terms) - SHINGLE + 1)))
+    weights = [0] * bits
+    for shingle, count in shingles.items():
+        h = int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'big')
+        for bit in range(bits):
+            weights[bit] += count if h >> bit & 1 else -count
+    return sum(1 << bit for bit in range(bits) if weights[bit] > 0)
+
+def distance(a, b):
+    return bin(a ^ b).count("1")
+
+def _bands(fingerprint):
+    # Two fingerprints differing in fewer than BANDS bits agree on at least one of
+    # the BANDS 8-bit bands, so only JDs sharing a band need comparing.
+    return [(i, fingerprint >> (8 * i) & 0xFF) for i in range(BANDS)]
+
+class JdIndex:
+    """
+    SimHash fingerprints of processed JDs plus what each one produced, kept in
+    memory (banded, so a lookup touches a handful of candidates) and in a JSONL
+    file so later runs can reuse them. Each job id has one entry: adding it again
+    replaces the old one, and a file with superseded lines is compacted on load.
+    """
+    def __init__(self, path=INDEX_PATH):
+        self.path = path
+        self.entries = {}   # job_id -> entry, oldest first
+        self._bands = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            lines = 0
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    lines += 1
+                    try:
+                        self._add(json.loads(line))
+                    except (ValueError, KeyError):
+                        continue  # A torn last line from an interrupted run
+            if lines > len(self.entries):
+                self._rewrite()
+
+    def _add(self, entry):
+        """Indexes `entry` in memory; returns True if it replaced one for the same job id."""
+        old = self.entries.pop(entry["job_id"], None)
+        if old is not None:
+            for band in _bands(old["simhash"]):
+                self._bands[band] = [e for e in self._bands[band] if e is not old]
+        self.entries[entry["job_id"]] = entry
+        for band in _bands(entry["simhash"]):
+            self._bands.setdefault(band, []).append(entry)
+        return old is not None
+
+    def _rewrite(self):
+        """Replaces the file with the current entries, one line each."""
+        try:
+            tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.writelines(json.dumps(entry) + "\n" for entry in self.entries.values())
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"⚠️  Could not save JD index: {e}")
+
+    def find(self, fingerprint, max_distance=MAX_DISTANCE, where=None):
+        """The closest indexed entry within `max_distance` bits (and passing `where`, if given), or None."""
+        with self._lock:
+            candidates = {id(e): e for band in _bands(fingerprint) for e in self._bands.get(band, [])
+                          if where is None or where(e)}
+        best = min(candidates.values(), key=lambda e: distance(e["simhash"], fingerprint), default=None)
+        return best if best and distance(best["simhash"], fingerprint) <= max_distance else None
+
+    def add(self, fingerprint, job_id, result=None):
+        """
+        Indexes a processed JD, replacing any earlier entry for `job_id`; `result`
+        (JSON-safe) is what a duplicate will reuse.
+        """
+        entry = {"simhash": fingerprint, "job_id": job_id, "created": round(time.time()), "result": result}
+        with self._lock:
+            replaced = self._add(entry)
+            if not self.path: return entry
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                if replaced:
+                    self._rewrite()
+                    return entry
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(entry) + "\n")
+            except OSError as e:
+                print(f"⚠️  Could not save JD index: {e}")
+        return entry
+
+def reusable(entry, formats=()):
+    """
+    The stored result of an index entry if it has every output in `formats` and all
+    the files it points to still exist, else None.
+    """
+    result = (entry or {}).get("result")
+    if not result or not result.get("outputs"): return None
+    if any(fmt not in result["outputs"] for fmt in formats): return None
+    paths = list(result["outputs"].values()) + ([result["prep_path"]] if result.get("prep_path") else [])
+    return result if all(os.path.exists(p) for p in paths) else None
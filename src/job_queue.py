@@ -0,0 +1,184 @@
+# job_queue.py
+"""
+Durable job queue for daemon.py, in one SQLite file.
+
+A job moves through stages (STAGE_LLM -> STAGE_LATEX -> done, or failed). A
+worker claims the oldest ready job of its stage by taking a lease: its owner id
+and an expiry time. While it works it renews the lease, and every write it makes
+is fenced on still holding it. If a worker (or the whole daemon) dies, its leases
+simply expire and the job is claimed again, so processing is at-least-once: a
+stage can run twice, never zero times. Stages are safe to repeat because outputs
+are replaced atomically and LLM responses come back from llm_cache.
+"""
+import os
+import json
+import time
+import socket
+import sqlite3
+import threading
+
+# CONFIGURATION
+QUEUE_PATH = os.getenv("DAEMON_QUEUE", os.path.join(".cache", "jobs.sqlite3"))
+LEASE_S = 120.0             # A claimed job is given back if not renewed for this long
+MAX_ATTEMPTS = 3            # Claims per stage before a job is marked failed
+RETRY_DELAY_S = 10.0        # Wait before a failed attempt is claimed again
+
+STAGE_LLM = "llm"
+STAGE_LATEX = "latex"
+DONE = "done"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id          TEXT PRIMARY KEY,
+    jd          TEXT NOT NULL,
+    formats     TEXT NOT NULL,
+    stage       TEXT NOT NULL,
+    payload     TEXT,
+    result      TEXT,
+    error       TEXT,
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_until REAL NOT NULL DEFAULT 0,
+    created     REAL NOT NULL,
+    updated     REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (stage, lease_until, created);
+"""
+
+def make_owner(name):
+    """Lease owner id for a worker: host, pid and worker name."""
+    return f"{socket.gethostname()}:{os.getpid()}:{name}"
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def _row(row):
+    job = dict(row)
+    for key in ("formats", "payload", "result"):
+        job[key] = json.loads(job[key]) if job[key] else None
+    return job
+
+class JobQueue:
+    """The jobs table at `path`. Safe to share between threads (one connection per thread)."""
+    def __init__(self, path=QUEUE_PATH):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn().executescript(_SCHEMA)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")     # Readers don't block the writer
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def submit(self, job_id, jd_text, formats):
+        """
+        Queues a job. Submitting an id that is done or failed queues it again;
+        one still queued or running is left alone. Returns True if queued.
+        """
+        now = time.time()
+        cursor = self._conn().execute(
+            "INSERT INTO jobs (id, jd, formats, stage, created, updated) VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET jd=excluded.jd, formats=excluded.formats, stage=excluded.stage, "
+            "payload=NULL, result=NULL, error=NULL, attempts=0, lease_owner=NULL, lease_until=0, "
+            "created=excluded.created, updated=excluded.updated WHERE jobs.stage IN (?, ?)",
+            (job_id, jd_text, json.dumps(list(formats)), STAGE_LLM, now, now, DONE, FAILED))
+        return cursor.rowcount > 0
+
+    def claim(self, stage, owner, lease_s=LEASE_S):
+        """Leases the oldest ready job in `stage` to `owner`; returns it as a dict, or None."""
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")     # Take the write lock before looking, so two workers can't pick one job
+        try:
+            row = conn.execute("SELECT * FROM jobs WHERE stage = ? AND lease_until <= ? ORDER BY created LIMIT 1",
+                               (stage, now)).fetchone()
+            if row is None:
+                conn.execute("COMMIT"); return None
+            if row["attempts"] >= MAX_ATTEMPTS:
+                error = row["error"] or "Worker stopped without finishing (lease expired)"
+                conn.execute("UPDATE jobs SET stage = ?, error = ?, lease_owner = NULL, updated = ? WHERE id = ?",
+                             (FAILED, error, now, row["id"]))
+                conn.execute("COMMIT")
+                print(f"❌ [{row['id']}] gave up after {row['attempts']} attempts: {error}")
+                return self.claim(stage, owner, lease_s)
+            conn.execute("UPDATE jobs SET lease_owner = ?, lease_until = ?, attempts = attempts + 1, updated = ? "
+                         "WHERE id = ?", (owner, now + lease_s, now, row["id"]))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        job = _row(row)
+        job["attempts"] += 1
+        return job
+
+    def _fenced(self, job_id, owner, sql, params):
+        """Runs an UPDATE only while `owner` still holds the job's lease. Returns False if it was lost."""
+        cursor = self._conn().execute(f"{sql} WHERE id = ? AND lease_owner = ?", (*params, job_id, owner))
+        if cursor.rowcount == 0:
+            print(f"⚠️  [{job_id}] lease lost to another worker, dropping this attempt's update")
+            return False
+        return True
+
+    def renew(self, job_id, owner, lease_s=LEASE_S):
+        return self._fenced(job_id, owner, "UPDATE jobs SET lease_until = ?", (time.time() + lease_s,))
+
+    def advance(self, job_id, owner, stage, payload):
+        """Hands the job to the next stage with `payload` (JSON-safe), releasing the lease."""
+        return self._fenced(job_id, owner,
+                            "UPDATE jobs SET stage = ?, payload = ?, attempts = 0, error = NULL, "
+                            "lease_owner = NULL, lease_until = 0, updated = ?",
+                            (stage, json.dumps(payload), time.time()))
+
+    def finish(self, job_id, owner, result):
+        return self._fenced(job_id, owner,
+                            "UPDATE jobs SET stage = ?, result = ?, payload = NULL, lease_owner = NULL, "
+                            "lease_until = 0, updated = ?", (DONE, json.dumps(result), time.time()))
+
+    def retry(self, job_id, owner, error, delay_s=RETRY_DELAY_S):
+        """Gives the job back after a failed attempt; it is claimable again after `delay_s`."""
+        return self._fenced(job_id, owner,
+                            "UPDATE jobs SET error = ?, lease_owner = NULL, lease_until = ?, updated = ?",
+                            (error, time.time() + delay_s, time.time()))
+
+    def recover(self):
+        """
+        Releases leases held by processes on this host that no longer exist (a
+        daemon killed mid-job), so their jobs don't wait for the lease to expire.
+        Returns the ids released.
+        """
+        host = socket.gethostname()
+        released = []
+        rows = self._conn().execute("SELECT id, lease_owner FROM jobs WHERE lease_owner IS NOT NULL "
+                                    "AND stage NOT IN (?, ?)", (DONE, FAILED)).fetchall()
+        for row in rows:
+            owner_host, pid, _ = (row["lease_owner"].split(":", 2) + ["", ""])[:3]
+            if owner_host == host and pid.isdigit() and not _alive(int(pid)):
+                self._conn().execute("UPDATE jobs SET lease_owner = NULL, lease_until = 0 "
+                                     "WHERE id = ? AND lease_owner = ?", (row["id"], row["lease_owner"]))
+                released.append(row["id"])
+        return released
+
+    def get(self, job_id):
+        row = self._conn().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _row(row) if row else None
+
+    def counts(self):
+        """{stage: number of jobs}, plus "leased" for the ones being worked on right now."""
+        conn = self._conn()
+        counts = {stage: n for stage, n in conn.execute("SELECT stage, COUNT(*) FROM jobs GROUP BY stage")}
+        counts["leased"] = conn.execute("SELECT COUNT(*) FROM jobs WHERE lease_owner IS NOT NULL "
+                                        "AND lease_until > ?", (time.time(),)).fetchone()[0]
+        return counts
@@ -0,0 +1,68 @@
+# job_state.py
+"""
+Per-job dependency tracking for incremental re-runs.
+
+Each artifact a job produces (the tailored LLM response, the PDF, each text
+format, the interview guide) is recorded with a digest of exactly the inputs it
+was derived from. On the next run a stage whose digest is unchanged, and whose
+files still exist, is skipped: e.g. editing static_data.json changes the PDF's
+inputs but not the tailoring call's, so only the PDF is rebuilt.
+"""
+import os
+import json
+import time
+import hashlib
+import threading
+
+# CONFIGURATION
+ENABLED = os.getenv("INCREMENTAL", "1") != "0"
+STATE_FILENAME = ".job_state.json"
+STATE_VERSION = 1
+REBUILD = False         # Ignore what was recorded (but record afresh), e.g. batch.py --rebuild
+
+def digest(*parts):
+    """Stable hash of JSON-serializable parts (dict key order doesn't matter)."""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class JobState:
+    """The stages recorded for one job, loaded from and saved to `path`."""
+    def __init__(self, path):
+        self.path = path
+        self.stages = {}
+        self._lock = threading.Lock()  # The interview phase records from its own thread
+        if REBUILD: return
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+            if stored.get("version") == STATE_VERSION:
+                self.stages = stored.get("stages", {})
+        except (OSError, ValueError):
+            pass
+
+    def fresh(self, stage, inputs, paths=()):
+        """The stage's record if it was built from `inputs` and its `paths` still exist, else None."""
+        entry = self.stages.get(stage)
+        if not entry or entry.get("inputs") != inputs: return None
+        if not all(p and os.path.exists(p) for p in paths): return None
+        return entry
+
+    def record(self, stage, inputs, **data):
+        with self._lock:
+            self.stages[stage] = {"inputs": inputs, "updated": round(time.time()), **data}
+
+    def forget(self, stage):
+        with self._lock:
+            self.stages.pop(stage, None)
+
+    def save(self):
+        with self._lock:
+            payload = {"version": STATE_VERSION, "stages": self.stages}
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(payload, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"⚠️  Could not save job state: {e}")
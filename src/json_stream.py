@@ -0,0 +1,120 @@
+# json_stream.py
+"""
+Incremental JSON parser for streamed LLM output.
+
+Feed it text chunks as they arrive; whenever a value at one of the watched
+paths closes (e.g. each item of resume.projects), it is parsed on its own and
+handed to the callback, long before the whole document is complete.
+
+Paths are tuples of object keys (matched case-insensitively) and '*' for any
+array index, e.g. ("resume", "projects", "*"). Objects, arrays and strings are
+reported; bare numbers/booleans are not.
+"""
+import json
+
+class JsonStreamParser:
+    def __init__(self, watch, on_item):
+        self.watch = [tuple(p.lower() if isinstance(p, str) else p for p in path) for path in watch]
+        self.on_item = on_item
+        self.text = ""          # Everything received so far
+        self.pos = 0            # Next char of self.text to scan
+        self.stack = []         # Open containers: {"type", "path", "start", "key", "index", "expect_key"}
+        self.in_string = False
+        self.escaped = False
+        self.string_start = None
+        self.started = False    # Skip anything before the first { or [
+        self.root_start = 0
+
+    def _matches(self, path):
+        for pattern in self.watch:
+            if len(pattern) != len(path): continue
+            if all((p == '*' and isinstance(v, int)) or p == v for p, v in zip(pattern, path)):
+                return True
+        return False
+
+    def _child_path(self):
+        if not self.stack: return ()
+        frame = self.stack[-1]
+        if frame["type"] == "obj":
+            return frame["path"] + ((frame["key"] or "").lower(),)
+        return frame["path"] + (frame["index"],)
+
+    def _emit(self, path, start, end):
+        try:
+            value = json.loads(self.text[start:end])
+        except json.JSONDecodeError:
+            return
+        self.on_item(path, value)
+
+    def feed(self, chunk):
+        self.text += chunk
+        text = self.text
+        i = self.pos
+        n = len(text)
+        while i < n:
+            ch = text[i]
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif ch == '\\':
+                    self.escaped = True
+                elif ch == '"':
+                    self.in_string = False
+                    self._close_string(self.string_start, i + 1)
+                else:
+                    # Jump to the next quote or backslash in one go
+                    q = text.find('"', i)
+                    b = text.find('\\', i)
+                    nxt = min(x for x in (q, b, n) if x != -1)
+                    i = nxt
+                    continue
+            elif not self.started:
+                if ch in '{[':
+                    self.started = True
+                    self.root_start = i
+                    continue  # Re-read this char as the root container
+            elif ch == '"':
+                self.in_string = True
+                self.string_start = i
+            elif ch in '{[':
+                path = self._child_path()
+                self.stack.append({
+                    "type": "obj" if ch == '{' else "arr", "path": path,
+                    "start": i if self._matches(path) else None,
+                    "key": None, "index": 0, "expect_key": ch == '{',
+                })
+            elif ch in '}]':
+                if self.stack:
+                    frame = self.stack.pop()
+                    if frame["start"] is not None:
+                        self._emit(frame["path"], frame["start"], i + 1)
+            elif ch == ':':
+                if self.stack and self.stack[-1]["type"] == "obj":
+                    self.stack[-1]["expect_key"] = False
+            elif ch == ',':
+                if self.stack:
+                    frame = self.stack[-1]
+                    if frame["type"] == "obj":
+                        frame["expect_key"] = True
+                    else:
+                        frame["index"] += 1
+            i += 1
+        self.pos = i
+
+    def _close_string(self, start, end):
+        if not self.stack: return
+        frame = self.stack[-1]
+        if frame["type"] == "obj" and frame["expect_key"]:
+            try:
+                frame["key"] = json.loads(self.text[start:end])
+            except json.JSONDecodeError:
+                frame["key"] = self.text[start + 1:end - 1]
+            return
+        path = self._child_path()
+        if self._matches(path):
+            self._emit(path, start, end)
+
+    def close(self):
+        """Parses the complete document (raises json.JSONDecodeError if it is invalid)."""
+        value, _ = json.JSONDecoder().raw_decode(self.text, self.root_start)
+        return value
@@ -0,0 +1,94 @@
+# latex_format.py
+"""
+Warm pdflatex backend: the template preamble (all the \\usepackage lines) is
+dumped once into a precompiled format with mylatexformat, keyed by its hash,
+and every resume body is then compiled against that format instead of
+reloading fontawesome5, titlesec, hyperref, babel... on each run.
+"""
+import os
+import re
+import hashlib
+import threading
+import subprocess
+from . import tracing
+
+# CONFIGURATION
+FORMAT_DIR = os.path.join(".latex_cache", "formats")
+DUMP_MARKER = "\\endofdump"
+
+_lock = threading.Lock()
+_failed = set()     # Preamble hashes whose format could not be built or used
+_missing = set()    # Compilers that aren't installed (reported once)
+
+def split_for_dump(tex):
+    """
+    Returns (dumped_part, tex_with_marker), or (None, None) if the document has
+    no preamble to precompile. Only the package loading goes into the format;
+    everything after the last \\usepackage (glyphtounicode, page setup, macros)
+    is re-run on every compile because pdftex does not save all of it in a .fmt.
+    """
+    begin = tex.find("\\begin{document}")
+    if begin == -1: return None, None
+    preamble = tex[:begin]
+    last_package = None
+    for last_package in re.finditer(r'^[ \t]*\\usepackage.*$', preamble, re.MULTILINE):
+        pass
+    if last_package is None: return None, None
+    cut = last_package.end()
+    return preamble[:cut], f"{tex[:cut]}\n{DUMP_MARKER}\n{tex[cut:]}"
+
+def format_key(dumped_part, compiler):
+    return hashlib.sha256(f"{compiler}\n{dumped_part}".encode('utf-8')).hexdigest()[:16]
+
+def get_format(dumped_part, compiler):
+    """Builds the format for this preamble if needed. Returns its absolute path (no .fmt), or None."""
+    key = format_key(dumped_part, compiler)
+    if key in _failed or compiler in _missing: return None
+
+    name = f"resume_{key}"
+    fmt_base = os.path.abspath(os.path.join(FORMAT_DIR, name))
+    if os.path.exists(f"{fmt_base}.fmt"): return fmt_base
+
+    with _lock:
+        if os.path.exists(f"{fmt_base}.fmt"): return fmt_base
+        os.makedirs(FORMAT_DIR, exist_ok=True)
+        source = f"{name}_src.tex"
+        with open(os.path.join(FORMAT_DIR, source), "w", encoding='utf-8') as f:
+            f.write(f"{dumped_part}\n{DUMP_MARKER}\n\\begin{{document}}\n\\end{{document}}\n")
+
+        print(f"   (Precompiling preamble into {name}.fmt...)")
+        # Dump under a temporary jobname so a half-written .fmt is never picked up.
+        try:
+            with tracing.span("latex.build_format", key=key):
+                subprocess.run(
+                    [compiler, '-ini', '-interaction=nonstopmode', f'-jobname={name}_tmp',
+                     f'&{compiler}', 'mylatexformat.ltx', source],
+                    cwd=FORMAT_DIR, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+                )
+        except OSError as e:
+            if compiler not in _missing:
+                print(f"   ⚠️  Could not run {compiler} ({e}); is a TeX distribution installed? Using cold compiles.")
+            _missing.add(compiler)
+            return None
+        tmp_fmt = os.path.join(FORMAT_DIR, f"{name}_tmp.fmt")
+        if not os.path.exists(tmp_fmt):
+            print("   ⚠️  Could not precompile the preamble (is mylatexformat installed?). Using cold compiles.")
+            _failed.add(key)
+            return None
+        os.replace(tmp_fmt, f"{fmt_base}.fmt")
+    return fmt_base
+
+def prepare(rendered_tex, compiler):
+    """
+    Returns (tex_to_write, extra_compiler_args, key) for a warm compile, or
+    (rendered_tex, [], None) when the document has to be compiled cold.
+    """
+    dumped_part, marked_tex = split_for_dump(rendered_tex)
+    if dumped_part is None: return rendered_tex, [], None
+    fmt_base = get_format(dumped_part, compiler)
+    if not fmt_base: return rendered_tex, [], None
+    return marked_tex, [f'-fmt={fmt_base}'], format_key(dumped_part, compiler)
+
+def mark_failed(key):
+    """Stops using a format whose compile did not produce a PDF."""
+    _failed.add(key)
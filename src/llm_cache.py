@@ -0,0 +1,94 @@
+# llm_cache.py
+import os
+import json
+import time
+import hashlib
+import threading
+
+# CONFIGURATION
+CACHE_DIR = os.getenv("LLM_CACHE_DIR", ".llm_cache")
+MAX_CACHE_BYTES = 200 * 1024 * 1024     # Oldest entries are evicted past this size
+MAX_AGE_SECONDS = 30 * 24 * 3600        # Entries older than this count as a miss
+EVICT_EVERY = 50                        # Run an eviction sweep every N writes
+
+_lock = threading.Lock()
+_writes = 0
+
+def make_key(model, config, prompt):
+    """Content address of a request: same model + config + prompt -> same key."""
+    payload = json.dumps({"model": model, "config": config, "prompt": prompt}, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def _path(key):
+    # Two-level fan-out keeps directory listings short on big caches.
+    return os.path.join(CACHE_DIR, key[:2], f"{key}.json")
+
+def get(key, max_age=MAX_AGE_SECONDS):
+    """Returns the cached response text for `key`, or None on a miss/expired entry."""
+    path = _path(key)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            entry = json.load(f)
+        # Age counts from when the response was stored; mtime only tracks last use
+        created = entry.get("created") or os.path.getmtime(path)
+        if time.time() - created > max_age:
+            _remove(path)
+            return None
+        os.utime(path)  # Mark as recently used for LRU eviction
+        return entry.get("text")
+    except (OSError, ValueError):
+        return None
+
+def put(key, text, model=None):
+    """Stores a response atomically so concurrent writers never leave a torn file."""
+    global _writes
+    path = _path(key)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"model": model, "created": time.time(), "text": text}, f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"⚠️  LLM cache write failed: {e}"); return
+
+    with _lock:
+        _writes += 1
+        sweep = _writes % EVICT_EVERY == 0
+    if sweep:
+        evict()
+
+def evict(max_bytes=MAX_CACHE_BYTES, max_age=MAX_AGE_SECONDS):
+    """Drops expired entries, then least recently used ones until under `max_bytes`."""
+    entries = []
+    now = time.time()
+    for root, _, files in os.walk(CACHE_DIR):
+        for name in files:
+            path = os.path.join(root, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            # Unused for max_age means created even earlier; entries still being hit
+            # past their age are dropped by get() instead of reading every file here
+            if now - st.st_mtime > max_age or (name.endswith(".tmp") and now - st.st_mtime > 3600):
+                _remove(path)
+            elif name.endswith(".json"):
+                entries.append((st.st_mtime, st.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes: break
+        _remove(path)
+        total -= size
+    return total
+
+def clear():
+    """Removes every cached response."""
+    return evict(max_bytes=0)
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -0,0 +1,163 @@
+# portfolio.py
+"""
+Parser and persisted index for data/master_portfolio.md.
+
+The portfolio is a list of '## EXPERIENCE_ENTRY' / '## PROJECT_ENTRY' blocks
+(see data/proj_format.txt). Parsing it once lets the tailoring prompt carry
+only the entries relevant to a JD instead of the whole file.
+"""
+import os
+import re
+import json
+import hashlib
+from .retrieval import get_bm25_index
+from .utils import estimate_tokens, truncate_to_tokens
+
+# CONFIGURATION
+INDEX_PATH = os.path.join(".cache", "portfolio_index.json")
+INDEX_VERSION = 1
+MAX_PROJECTS = 6        # Projects sent to the LLM (it picks 3 of them)
+MAX_EXPERIENCES = 3
+
+ENTRY_KINDS = {"EXPERIENCE_ENTRY": "experience", "PROJECT_ENTRY": "project"}
+_ENTRY_HEADER = re.compile(r'^##\s*(EXPERIENCE_ENTRY|PROJECT_ENTRY)\s*$', re.MULTILINE)
+_FIELD = re.compile(r'^\s*([A-Za-z][A-Za-z /&-]*?)\s*:\s*(.*)$')
+_CONTENT_MARKERS = ("-- CONTENT --", "Content:")
+_SKILLS_HEADER = "Technical Skills"
+
+def _parse_entry(kind, block):
+    fields, skills, content = {}, {}, []
+    section = "fields"
+    for line in block.strip().splitlines():
+        stripped = line.strip()
+        if not stripped: continue
+        if stripped in _CONTENT_MARKERS:
+            section = "content"; continue
+        if section != "content" and stripped == _SKILLS_HEADER:
+            section = "skills"; continue
+
+        match = _FIELD.match(stripped)
+        if section == "content" or not match:
+            content.append(stripped.lstrip("-• ").strip())
+        elif section == "skills":
+            skills[match.group(1)] = match.group(2).strip()
+        else:
+            fields[match.group(1).lower()] = match.group(2).strip()
+
+    name = fields.get("name") or fields.get("company") or fields.get("title") or "Untitled"
+    raw = f"## {kind}\n{block.strip()}"
+    return {
+        "id": hashlib.sha1(raw.encode('utf-8')).hexdigest()[:12],
+        "kind": ENTRY_KINDS[kind],
+        "name": name,
+        "fields": fields,
+        "skills": skills,
+        "content": content,
+        "raw": raw,
+    }
+
+def parse_portfolio(text):
+    """
+    Splits the portfolio into entries. Anything before the first entry header
+    (summary, global skills...) is kept as the preamble and always sent along.
+    """
+    headers = list(_ENTRY_HEADER.finditer(text))
+    if not headers:
+        return {"preamble": text.strip(), "entries": []}
+
+    entries = []
+    for i, header in enumerate(headers):
+        end = headers[i + 1].start() if i + 1 < len(headers) else len(text)
+        block = text[header.end():end]
+        if block.strip():
+            entries.append(_parse_entry(header.group(1), block))
+    return {"preamble": text[:headers[0].start()].strip(), "entries": entries}
+
+def load_portfolio_index(path, index_path=INDEX_PATH):
+    """
+    Returns the parsed index for `path`, re-parsing only when the file changed.
+    The stored mtime/size are checked first; the content hash only when they differ.
+    Returns None if the portfolio file does not exist.
+    """
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        print(f"❌ Error: File not found at {path}"); return None
+
+    stored = None
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            stored = json.load(f)
+    except (OSError, ValueError):
+        pass
+
+    if stored and stored.get("version") == INDEX_VERSION and stored.get("source") == os.path.abspath(path):
+        if (stored.get("mtime_ns"), stored.get("size")) == (st.st_mtime_ns, st.st_size):
+            return stored
+
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    sha = hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    if stored and stored.get("version") == INDEX_VERSION and stored.get("sha256") == sha:
+        index = stored  # Touched but unchanged: just refresh the stat signature
+    else:
+        print("📇 Indexing master portfolio...")
+        index = parse_portfolio(text)
+        index["version"] = INDEX_VERSION
+        index["sha256"] = sha
+
+    index.update({"source": os.path.abspath(path), "mtime_ns": st.st_mtime_ns, "size": st.st_size})
+    _save_index(index, index_path)
+    return index
+
+def _save_index(index, index_path):
+    try:
+        os.makedirs(os.path.dirname(index_path) or ".", exist_ok=True)
+        tmp_path = f"{index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f)
+        os.replace(tmp_path, index_path)
+    except OSError as e:
+        print(f"⚠️  Could not save portfolio index: {e}")
+
+def select_entries(index, jd_text, max_projects=MAX_PROJECTS, max_experiences=MAX_EXPERIENCES, max_tokens=None):
+    """
+    Keeps the top BM25-ranked experiences and projects for the JD, in portfolio order.
+    With `max_tokens`, the lowest-scoring entries are dropped until the rendered
+    portfolio fits that many (estimated) tokens.
+    """
+    bm25 = get_bm25_index(index)
+    ranked = []
+    for kind, limit in (("experience", max_experiences), ("project", max_projects)):
+        ranked.extend(bm25.rank(jd_text, kind=kind, top_k=limit))
+    ranked.sort(key=lambda pair: pair[1], reverse=True)
+
+    picked = {e["id"] for e, _ in ranked}
+    selected = lambda: [e for e in index["entries"] if e["id"] in picked]
+    if max_tokens is not None:
+        while ranked and estimate_tokens(render_portfolio(index, selected())) > max_tokens:
+            dropped, _ = ranked.pop()
+            picked.discard(dropped["id"])
+    return selected()
+
+def render_portfolio(index, entries=None):
+    """Rebuilds portfolio markdown from the preamble plus `entries` (all entries by default)."""
+    entries = index["entries"] if entries is None else entries
+    parts = [index["preamble"]] if index.get("preamble") else []
+    parts.extend(e["raw"] for e in entries)
+    return "\n\n".join(parts)
+
+def shortlist_names(index, jd_text):
+    """Names of the entries select_entries would pick for this JD, best match first."""
+    bm25 = get_bm25_index(index)
+    ranked = bm25.rank(jd_text, kind="experience", top_k=MAX_EXPERIENCES) + bm25.rank(jd_text, kind="project", top_k=MAX_PROJECTS)
+    return [e["name"] for e, _ in sorted(ranked, key=lambda pair: pair[1], reverse=True)]
+
+def portfolio_for_jd(index, jd_text, max_tokens=None):
+    """The portfolio text to put in the tailoring prompt for this JD (cut to `max_tokens` if given)."""
+    if not index["entries"]:
+        text = index["preamble"]  # Unrecognised format: send the file as-is
+    else:
+        text = render_portfolio(index, select_entries(index, jd_text, max_tokens=max_tokens))
+    return truncate_to_tokens(text, max_tokens) if max_tokens is not None else text
@@ -0,0 +1,226 @@
+# providers.py
+"""
+LLM backends behind utils.get_llm_response. Pick one with LLM_PROVIDER:
+
+  gemini  - Google Gemini API (default)
+  ollama  - a local Ollama server (OLLAMA_MODEL, default llama3.1), for when API
+            quotas are exhausted. Needs `pip install ollama`.
+  replay  - serves responses recorded on disk (LLM_REPLAY_DIR), no network. Run
+            any provider with LLM_RECORD=1 to record them.
+
+A provider returns the raw response text plus its token usage
+({"prompt_tokens", "response_tokens"} or None when the backend has none).
+Calls may pass a `prefix`: static text that goes before the prompt. Gemini keeps
+it in an explicit context cache (LLM_PROMPT_CACHE) so repeated prefixes are
+billed at the cached rate; the others just prepend it.
+Providers with an `agenerate` coroutine are awaited directly by
+utils.get_llm_response_async; the rest run in a worker thread.
+"""
+import os
+import time
+import asyncio
+import hashlib
+import itertools
+import threading
+
+# CONFIGURATION
+PROVIDER_NAME = os.getenv("LLM_PROVIDER", "gemini")
+OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3.1")
+OLLAMA_CONTEXT = 8192
+REPLAY_DIR = os.getenv("LLM_REPLAY_DIR", os.path.join(".cache", "replay"))
+REPLAY_LATENCY = float(os.getenv("LLM_REPLAY_LATENCY", "0"))    # Simulated seconds per call
+REPLAY_CHUNKS = 8                                               # Streamed replies are split into this many chunks
+RECORD_RESPONSES = os.getenv("LLM_RECORD", "0") == "1"
+PROMPT_CACHE = os.getenv("LLM_PROMPT_CACHE", "1") != "0"
+PROMPT_CACHE_TTL_S = 3600
+PROMPT_CACHE_MIN_TOKENS = 1024  # Gemini rejects smaller explicit caches (implicit caching still applies)
+
+SYSTEM_PROMPT = ("You are a Resume API. You extract facts from the user portfolio and never output "
+                 "placeholders. You only output JSON.")
+
+class GeminiProvider:
+    name = "gemini"
+    rate_limited = True     # Goes through scheduler.limiter
+    cacheable = True        # Responses are stored in llm_cache
+    prefix_cache = PROMPT_CACHE
+
+    def __init__(self, model, config):
+        self.model = model
+        self.config = config
+        self._handles = {}  # sha256(model + prefix) -> (cachedContents name or None, expiry time)
+        self._handles_lock = threading.Lock()
+
+    def cached_content(self, prefix):
+        """
+        Name of a context cache holding `prefix`, created on first use and shared by
+        every later call (and thread) with the same prefix until it expires. None if
+        caching is off, the prefix is too small, or the cache can't be created.
+        """
+        if not (self.prefix_cache and prefix) or len(prefix) // 4 < PROMPT_CACHE_MIN_TOKENS: return None
+        key = hashlib.sha256(f"{self.model}\0{prefix}".encode('utf-8')).hexdigest()
+        with self._handles_lock:
+            name, expires = self._handles.get(key, (None, 0))
+            if time.time() < expires: return name
+            from google.genai import types
+            from .utils import get_client
+            try:
+                cache = get_client().caches.create(model=self.model, config=types.CreateCachedContentConfig(
+                    contents=[prefix], ttl=f"{PROMPT_CACHE_TTL_S}s", display_name=f"resume-prefix-{key[:12]}"))
+                name = cache.name
+                print(f"🗄️  Cached prompt prefix as {name}")
+            except Exception as e:
+                name = None     # Don't retry on every call; the full prompt is sent instead
+                print(f"⚠️  Could not cache prompt prefix ({e}), sending it in full")
+            # Renew a minute early so a call never races the server-side expiry
+            self._handles[key] = (name, time.time() + PROMPT_CACHE_TTL_S - 60)
+            return name
+
+    def forget(self, prefix):
+        with self._handles_lock:
+            self._handles.pop(hashlib.sha256(f"{self.model}\0{prefix}".encode('utf-8')).hexdigest(), None)
+
+    def _request(self, prompt, prefix=None):
+        from google.genai import types
+        handle = self.cached_content(prefix)
+        config = {**self.config, "cached_content": handle} if handle else self.config
+        return {"model": self.model, "contents": prompt if handle else (prefix or "") + prompt,
+                "config": types.GenerateContentConfig(**config)}
+
+    def _call(self, method, prompt, prefix=None):
+        from .utils import get_client
+        return getattr(get_client().models, method)(**self._request(prompt, prefix))
+
+    async def _acall(self, prompt, prefix=None):
+        from .utils import get_async_client
+        # Creating the context cache is a one-off blocking call; keep it off the event loop
+        request = await asyncio.to_thread(self._request, prompt, prefix)
+        return await get_async_client().models.generate_content(**request)
+
+    @staticmethod
+    def _usage(meta):
+        if meta is None or not meta.prompt_token_count: return None
+        return {"prompt_tokens": meta.prompt_token_count,
+                "response_tokens": (meta.candidates_token_count or 0) + (meta.thoughts_token_count or 0),
+                "context_cached_tokens": meta.cached_content_token_count or 0}
+
+    @staticmethod
+    def _expired(error):
+        # The server dropped the cache early (or it was deleted): 403/404 naming it
+        return getattr(error, "code", None) in (403, 404) and "cache" in str(error).lower()
+
+    def generate(self, prompt, stage=None, prefix=None):
+        try:
+            response = self._call("generate_content", prompt, prefix)
+        except Exception as e:
+            if not (prefix and self._expired(e)): raise
+            self.forget(prefix)
+            response = self._call("generate_content", prompt, prefix)
+        return response.text, self._usage(response.usage_metadata)
+
+    async def agenerate(self, prompt, stage=None, prefix=None):
+        """generate() on the SDK's async client (client.aio), for asyncio callers."""
+        try:
+            response = await self._acall(prompt, prefix)
+        except Exception as e:
+            if not (prefix and self._expired(e)): raise
+            self.forget(prefix)
+            response = await self._acall(prompt, prefix)
+        return response.text, self._usage(response.usage_metadata)
+
+    def stream(self, prompt, stage=None, prefix=None):
+        """Yields (text, usage) per chunk; usage is only set on the chunk that carries it."""
+        chunks = iter(self._call("generate_content_stream", prompt, prefix))
+        try:
+            first = next(chunks, None)      # The request is sent here
+        except Exception as e:
+            if not (prefix and self._expired(e)): raise
+            self.forget(prefix)
+            chunks = iter(self._call("generate_content_stream", prompt, prefix))
+            first = next(chunks, None)
+        for chunk in itertools.chain([first] if first is not None else [], chunks):
+            yield chunk.text or "", self._usage(chunk.usage_metadata)
+
+class OllamaProvider:
+    name = "ollama"
+    rate_limited = False    # Local hardware: no quota to respect
+    cacheable = True
+    prefix_cache = False    # Ollama reuses the KV cache of a matching prefix on its own
+
+    def __init__(self, model=OLLAMA_MODEL, config=None):
+        self.model = model
+        self.options = {"num_ctx": OLLAMA_CONTEXT, "temperature": (config or {}).get("temperature", 0.0)}
+
+    def _chat(self, prompt, stream):
+        import ollama
+        return ollama.chat(model=self.model, format="json", stream=stream, options=self.options, messages=[
+            {'role': 'system', 'content': SYSTEM_PROMPT},
+            {'role': 'user', 'content': prompt},
+        ])
+
+    @staticmethod
+    def _usage(response):
+        if not response.get('prompt_eval_count'): return None
+        return {"prompt_tokens": response['prompt_eval_count'], "response_tokens": response.get('eval_count') or 0}
+
+    def generate(self, prompt, stage=None, prefix=None):
+        response = self._chat((prefix or "") + prompt, stream=False)
+        return response['message']['content'], self._usage(response)
+
+    def stream(self, prompt, stage=None, prefix=None):
+        for chunk in self._chat((prefix or "") + prompt, stream=True):
+            yield chunk['message']['content'], self._usage(chunk) if chunk.get('done') else None
+
+def replay_key(prompt):
+    """Provider-independent key, so responses recorded from Gemini replay as-is."""
+    return hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+
+class ReplayProvider:
+    """
+    Offline stand-in. Serves <REPLAY_DIR>/<sha256(prompt)>.json when the exact
+    prompt was recorded, else <REPLAY_DIR>/<stage>.json (the latest recording
+    for that stage), so new JDs still run end to end for benchmarks.
+    """
+    name = "replay"
+    rate_limited = False
+    cacheable = False       # Already on disk
+    prefix_cache = False
+
+    def __init__(self, replay_dir=REPLAY_DIR, latency=REPLAY_LATENCY):
+        self.model = "replay"
+        self.replay_dir = replay_dir
+        self.latency = latency
+
+    def _load(self, prompt, stage):
+        for name in (replay_key(prompt), stage or "resume"):
+            path = os.path.join(self.replay_dir, f"{name}.json")
+            if os.path.exists(path):
+                with open(path, 'r', encoding='utf-8') as f:
+                    return f.read()
+        raise FileNotFoundError(f"No recorded response for this prompt or stage '{stage}' in {self.replay_dir}")
+
+    def generate(self, prompt, stage=None, prefix=None):
+        text = self._load((prefix or "") + prompt, stage)
+        if self.latency: time.sleep(self.latency)
+        return text, None
+
+    def stream(self, prompt, stage=None, prefix=None):
+        text = self._load((prefix or "") + prompt, stage)
+        step = max(1, len(text) // REPLAY_CHUNKS + 1)
+        for i in range(0, len(text), step):
+            if self.latency: time.sleep(self.latency / REPLAY_CHUNKS)
+            yield text[i:i + step], None
+
+def record(prompt, stage, text, replay_dir=REPLAY_DIR):
+    """Saves a response for ReplayProvider (by prompt hash and as the stage's fallback)."""
+    try:
+        os.makedirs(replay_dir, exist_ok=True)
+        for name in (replay_key(prompt), stage or "resume"):
+            path = os.path.join(replay_dir, f"{name}.json")
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(text)
+            os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"⚠️  Could not record response: {e}")
+
+PROVIDERS = {"gemini": GeminiProvider, "ollama": OllamaProvider, "replay": ReplayProvider}
@@ -0,0 +1,116 @@
+# render_cache.py
+"""
+Output memoization for build_pdf: a PDF is keyed by the hash of its rendered
+.tex plus the template/asset files, so re-running with byte-identical LaTeX
+copies the previous PDF instead of invoking the compiler.
+"""
+import os
+import json
+import shutil
+import hashlib
+import threading
+
+# CONFIGURATION
+CACHE_DIR = os.path.join(".latex_cache", "pdf")
+MAX_ENTRIES = 500       # Least recently used PDFs beyond this are evicted
+ENABLED = os.getenv("RENDER_CACHE", "1") != "0"
+
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0}
+_asset_hashes = {}      # asset dir -> (mtime signature, hash)
+
+def assets_hash(asset_dir):
+    """Hash of every file in the template directory, recomputed only when one changes."""
+    files = []
+    for root, _, names in os.walk(asset_dir):
+        for name in sorted(names):
+            path = os.path.join(root, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            files.append((path, st.st_mtime_ns, st.st_size))
+    files.sort()
+    signature = tuple(files)
+
+    cached = _asset_hashes.get(asset_dir)
+    if cached and cached[0] == signature:
+        return cached[1]
+
+    digest = hashlib.sha256()
+    for path, _, _ in files:
+        digest.update(os.path.relpath(path, asset_dir).encode('utf-8'))
+        with open(path, 'rb') as f:
+            digest.update(hashlib.sha256(f.read()).digest())
+    _asset_hashes[asset_dir] = (signature, digest.hexdigest())
+    return digest.hexdigest()
+
+def make_key(rendered_tex, compiler, asset_dir):
+    digest = hashlib.sha256()
+    for part in (compiler, assets_hash(asset_dir), rendered_tex):
+        digest.update(part.encode('utf-8'))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+def _path(key):
+    return os.path.join(CACHE_DIR, f"{key}.pdf")
+
+def lookup(key):
+    """Returns the cached PDF path for `key` (and counts a hit), or None (a miss)."""
+    path = _path(key)
+    hit = os.path.exists(path)
+    record(hits=int(hit), misses=int(not hit))
+    if not hit: return None
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return path
+
+def load_meta(key):
+    """What was stored alongside the PDF (e.g. its page count), or {}."""
+    try:
+        with open(f"{_path(key)[:-4]}.json", 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def store(key, pdf_path, meta=None):
+    """Copies a freshly built PDF (and optional metadata about it) into the cache."""
+    path = _path(key)
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        if meta:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(meta, f)
+            os.replace(tmp_path, f"{path[:-4]}.json")
+        shutil.copyfile(pdf_path, tmp_path)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"⚠️  Render cache write failed: {e}"); return
+    _evict()
+
+def _evict():
+    try:
+        entries = [os.path.join(CACHE_DIR, n) for n in os.listdir(CACHE_DIR) if n.endswith(".pdf")]
+    except OSError:
+        return
+    if len(entries) <= MAX_ENTRIES: return
+    entries.sort(key=lambda p: os.path.getmtime(p) if os.path.exists(p) else 0)
+    for path in entries[:len(entries) - MAX_ENTRIES]:
+        for victim in (path, f"{path[:-4]}.json"):
+            try:
+                os.remove(victim)
+            except OSError:
+                pass
+
+def record(hits=0, misses=0):
+    with _lock:
+        _stats["hits"] += hits
+        _stats["misses"] += misses
+
+def get_stats():
+    """Hit/miss counts for this process (merged with worker counts by build_pdfs)."""
+    with _lock:
+        return dict(_stats)
@@ -0,0 +1,176 @@
+# renderers.py
+"""
+Non-LaTeX resume outputs: Markdown, HTML, plain text and DOCX.
+
+They render straight from the plain (un-escaped) resume data in milliseconds,
+with escaping done per target (HTML autoescape, Markdown punctuation, XML for
+DOCX), so none of them pays for pdflatex. The PDF stays with
+resume_builder.build_pdf, which takes the LaTeX-escaped data instead.
+"""
+import io
+import os
+import re
+import zipfile
+import threading
+from xml.sax.saxutils import escape as xml_escape
+import jinja2
+from . import tracing
+from .resume_builder import TEMPLATE_DIR
+
+FORMATS = ("pdf", "md", "html", "txt", "docx")
+TEMPLATES = {"md": "resume_template.md", "html": "resume_template.html", "txt": "resume_template.txt"}
+
+_text_env = None
+_text_env_lock = threading.Lock()
+
+_MD_SPECIAL = re.compile(r'([\\`*_{}\[\]<>#|~])')
+
+def escape_markdown(val):
+    """Backslash-escapes characters Markdown would treat as formatting."""
+    if not isinstance(val, str): return val
+    return _MD_SPECIAL.sub(r'\\\1', val)
+
+def get_text_env():
+    """Shared Jinja environment for the .md/.html/.txt templates (HTML is autoescaped)."""
+    global _text_env
+    if _text_env is None:
+        with _text_env_lock:
+            if _text_env is None:
+                env = jinja2.Environment(
+                    loader=jinja2.FileSystemLoader(searchpath=TEMPLATE_DIR),
+                    autoescape=jinja2.select_autoescape(["html"]),
+                    undefined=jinja2.ChainableUndefined,  # Missing fields render empty
+                    trim_blocks=True,
+                    lstrip_blocks=True,
+                )
+                env.filters['md'] = escape_markdown
+                _text_env = env
+    return _text_env
+
+def plain_text(data):
+    """Collapses runs of whitespace inside every string (newlines from the LLM, stray tabs...)."""
+    if isinstance(data, str):
+        return " ".join(data.split())
+    if isinstance(data, list):
+        return [plain_text(i) for i in data]
+    if isinstance(data, dict):
+        return {k: plain_text(v) for k, v in data.items()}
+    return data
+
+def render_text(data, fmt):
+    """Renders `data` (plain, un-escaped) as 'md', 'html' or 'txt'."""
+    with tracing.span(f"template.render_{fmt}"):
+        return get_text_env().get_template(TEMPLATES[fmt]).render(plain_text(data))
+
+# --- DOCX (WordprocessingML written by hand, so no extra dependency) ---
+
+_DOCX_CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>
+</Types>"""
+
+_DOCX_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="word/document.xml"/>
+</Relationships>"""
+
+_DOCX_NS = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+# Characters XML 1.0 doesn't allow at all, even escaped (Word rejects the file)
+_XML_INVALID = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ud800-\udfff\ufffe\uffff]')
+
+def _run(text, bold=False, italic=False, size=None):
+    props = ("<w:b/>" if bold else "") + ("<w:i/>" if italic else "") + (f'<w:sz w:val="{size}"/>' if size else "")
+    props = f"<w:rPr>{props}</w:rPr>" if props else ""
+    return f'<w:r>{props}<w:t xml:space="preserve">{xml_escape(_XML_INVALID.sub("", str(text)))}</w:t></w:r>'
+
+def _para(*runs, align=None, bullet=False, heading=False):
+    props = ""
+    if align: props += f'<w:jc w:val="{align}"/>'
+    if bullet: props += '<w:ind w:left="360" w:hanging="220"/>'
+    if heading: props += '<w:pBdr><w:bottom w:val="single" w:sz="6" w:space="1" w:color="000000"/></w:pBdr><w:spacing w:before="200"/>'
+    props = f"<w:pPr>{props}</w:pPr>" if props else ""
+    if bullet: runs = (_run("• "),) + runs
+    return f"<w:p>{props}{''.join(runs)}</w:p>"
+
+def _join(*parts):
+    return " | ".join(p for p in parts if p)
+
+def _docx_body(d):
+    paras = [
+        _para(_run(d.get('name', ''), bold=True, size=36), align="center"),
+        _para(_run(_join(d.get('phone'), d.get('email'), d.get('linkedin_url'), d.get('github_url'),
+                         d.get('kaggle_url')), size=18), align="center"),
+        _para(_run("EDUCATION", bold=True), heading=True),
+    ]
+    for edu in d.get('education') or []:
+        paras.append(_para(_run(edu.get('school', ''), bold=True), _run(f"  {_join(edu.get('location'), edu.get('graduation_date'))}")))
+        paras.append(_para(_run(edu.get('degree', ''), italic=True)))
+
+    paras.append(_para(_run("EXPERIENCE", bold=True), heading=True))
+    for job in d.get('experience') or []:
+        paras.append(_para(_run(f"{job.get('role', '')}, {job.get('company', '')}", bold=True),
+                           _run(f"  {_join(job.get('location'), job.get('dates'))}")))
+        paras.extend(_para(_run(b), bullet=True) for b in job.get('bullets') or [])
+
+    paras.append(_para(_run("PROJECTS", bold=True), heading=True))
+    for project in d.get('projects') or []:
+        paras.append(_para(_run(project.get('name', ''), bold=True), _run(" | "),
+                           _run(project.get('tech_stack', ''), italic=True)))
+        paras.extend(_para(_run(b), bullet=True) for b in project.get('bullets') or [])
+
+    skills = d.get('skills') or {}
+    paras.append(_para(_run("TECHNICAL SKILLS", bold=True), heading=True))
+    for label, key in (("Languages", "languages"), ("Developer Tools", "tools"), ("Technologies/Frameworks", "frameworks")):
+        paras.append(_para(_run(f"{label}: ", bold=True), _run(skills.get(key, ''))))
+
+    if d.get('leadership'):
+        paras.append(_para(_run("LEADERSHIP / EXTRACURRICULAR", bold=True), heading=True))
+        for item in d['leadership']:
+            paras.append(_para(_run(f"{item.get('role', '')}, {item.get('org', '')}", bold=True),
+                               _run(f"  {_join(item.get('location'), item.get('date'))}")))
+            paras.extend(_para(_run(b), bullet=True) for b in item.get('bullets') or [])
+    return "".join(paras)
+
+def render_docx(data):
+    """Returns the bytes of a .docx for `data` (plain, un-escaped)."""
+    with tracing.span("template.render_docx"):
+        document = (f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n<w:document {_DOCX_NS}><w:body>'
+                    f'{_docx_body(plain_text(data))}<w:sectPr><w:pgMar w:top="720" w:right="720" w:bottom="720" '
+                    f'w:left="720"/></w:sectPr></w:body></w:document>')
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as docx:
+            docx.writestr("[Content_Types].xml", _DOCX_CONTENT_TYPES)
+            docx.writestr("_rels/.rels", _DOCX_RELS)
+            docx.writestr("word/document.xml", document)
+        return buffer.getvalue()
+
+def write_outputs(data, formats, base_path):
+    """
+    Writes <base_path>.<fmt> for every non-PDF format in `formats`.
+    Returns {fmt: path}; a format that fails is reported and left out.
+    """
+    paths = {}
+    for fmt in formats:
+        if fmt == "pdf": continue
+        path = f"{base_path}.{fmt}"
+        try:
+            content = render_docx(data) if fmt == "docx" else render_text(data, fmt).encode('utf-8')
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with tracing.span("io.write_output", format=fmt), open(tmp_path, 'wb') as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+            paths[fmt] = path
+        except Exception as e:
+            print(f"❌ Could not write {fmt.upper()} resume: {e}")
+    return paths
+
+def parse_formats(value):
+    """'pdf,md' -> ['pdf', 'md']; raises ValueError on unknown formats."""
+    formats = [f.strip().lower() for f in value.split(",") if f.strip()]
+    unknown = [f for f in formats if f not in FORMATS]
+    if unknown:
+        raise ValueError(f"Unknown output format(s): {', '.join(unknown)} (choose from {', '.join(FORMATS)})")
+    return formats
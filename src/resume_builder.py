@@ -1,9 +1,29 @@
 import os
+import re
+import asyncio
+import shutil
+import tempfile
+import threading
 import subprocess
 import jinja2
+from concurrent.futures import ProcessPoolExecutor
+from . import latex_format, render_cache, tracing
 
 # CONFIGURATION
 LATEX_COMPILER = 'pdflatex'
+# 'format' compiles against a precompiled preamble (see latex_format.py) and
+# falls back to 'cold' (a plain pdflatex run) if the format cannot be built.
+LATEX_BACKEND = os.getenv("LATEX_BACKEND", "format")
+TEMPLATE_DIR = "./templates"
+# Compiled templates are also cached as bytecode on disk so a fresh process
+# skips parsing too. Set TEMPLATE_CACHE_DIR to an empty string to disable.
+TEMPLATE_CACHE_DIR = os.getenv("TEMPLATE_CACHE_DIR", os.path.join(".latex_cache", "jinja"))
+
+_latex_env = None
+_latex_env_lock = threading.Lock()
+# The process umask, read once at import (os.umask can only be read by setting it)
+_UMASK = os.umask(0o022)
+os.umask(_UMASK)
 
 def escape_latex_chars(val):
     """
@@ -15,84 +35,292 @@ def escape_latex_chars(val):
     """
     return val 
 
-def build_pdf(data, template_name="resume_template.tex", output_filename="Generated_Resume.pdf"):
-    
-    template_loader = jinja2.FileSystemLoader(searchpath="./templates")
-    latex_env = jinja2.Environment(
-        loader=template_loader,
-        block_start_string='((*',    
-        block_end_string='*))',      
-        variable_start_string='\\VAR{',
-        variable_end_string='}',
-        comment_start_string='\\#{',
-        comment_end_string='}',
-        line_statement_prefix='%%',
-        line_comment_prefix='%#',
-        trim_blocks=True,
-        autoescape=False,
-    )
-    
-    # We keep the filter registration so the template doesn't crash,
-    # but the function itself now passes the text through unchanged.
-    latex_env.filters['escape_tex'] = escape_latex_chars
-
-    def clean_text(obj):
-        if isinstance(obj, str):
-            return obj.replace("\n", " ").replace("\r", "").strip()
-        elif isinstance(obj, list):
-            return [clean_text(x) for x in obj]
-        elif isinstance(obj, dict):
-            return {k: clean_text(v) for k, v in obj.items()}
-        return obj
-
-    # Clean the data before rendering
-    data = clean_text(data)
+def get_latex_env():
+    """
+    Module-wide Jinja environment, built on first use. It keeps every parsed
+    template in memory (re-checking only the file's mtime), so a batch of renders
+    parses resume_template.tex once.
+    """
+    global _latex_env
+    if _latex_env is None:
+        with _latex_env_lock:
+            if _latex_env is None:
+                bytecode_cache = None
+                if TEMPLATE_CACHE_DIR:
+                    os.makedirs(TEMPLATE_CACHE_DIR, exist_ok=True)
+                    bytecode_cache = jinja2.FileSystemBytecodeCache(TEMPLATE_CACHE_DIR)
+
+                latex_env = jinja2.Environment(
+                    loader=jinja2.FileSystemLoader(searchpath=TEMPLATE_DIR),
+                    bytecode_cache=bytecode_cache,
+                    block_start_string='((*',    
+                    block_end_string='*))',      
+                    variable_start_string='\\VAR{',
+                    variable_end_string='}',
+                    comment_start_string='\\#{',
+                    comment_end_string='}',
+                    line_statement_prefix='%%',
+                    line_comment_prefix='%#',
+                    trim_blocks=True,
+                    autoescape=False,
+                )
+                
+                # We keep the filter registration so the template doesn't crash,
+                # but the function itself now passes the text through unchanged.
+                latex_env.filters['escape_tex'] = escape_latex_chars
+                _latex_env = latex_env
+    return _latex_env
 
+_FLATTEN_TABLE = str.maketrans({"\n": " ", "\r": None})
+
+def clean_text(obj):
+    """Flattens newlines and trims whitespace in every string of a dict/list tree."""
+    if isinstance(obj, str):
+        return obj.translate(_FLATTEN_TABLE).strip()
+    elif isinstance(obj, list):
+        return [clean_text(x) for x in obj]
+    elif isinstance(obj, dict):
+        return {k: clean_text(v) for k, v in obj.items()}
+    return obj
+
+@tracing.traced("template.render")
+def render_tex(data, template_name="resume_template.tex", clean=True):
+    """
+    Renders the LaTeX source for `data` (raises jinja2 errors to the caller).
+    Pass clean=False when the data already went through clean_text (e.g. via
+    main1.recursive_sanitize(..., flatten=True)) to skip a second tree walk.
+    """
+    template = get_latex_env().get_template(template_name)
+    return template.render(clean_text(data) if clean else data)
+
+def build_pdf(data, template_name="resume_template.tex", output_filename="Generated_Resume.pdf", workdir=None, clean=True,
+              report=None):
+    """
+    Renders the template and compiles it. Returns the PDF path, or None on failure.
+    Each build runs in its own scratch directory (a fresh temp dir unless `workdir`
+    is given), so any number of builds can run side by side.
+    Pass a dict as `report` to get the page count and overfull boxes read from
+    the pdflatex log (see parse_latex_log) plus whether the render cache served it.
+    """
     try:
-        template = latex_env.get_template(template_name)
-        rendered_tex = template.render(data)
+        rendered_tex = render_tex(data, template_name, clean)
+
+        own_workdir = workdir is None
+        build_dir = tempfile.mkdtemp(prefix="resume_build_") if own_workdir else workdir
+        os.makedirs(build_dir, exist_ok=True)
+        try:
+            return _compile(rendered_tex, build_dir, output_filename, report)
+        finally:
+            if own_workdir:
+                shutil.rmtree(build_dir, ignore_errors=True)
+            
+    except jinja2.TemplateSyntaxError as e:
+        print(f"\nTEMPLATE ERROR in {template_name}:")
+        print(f"   Line {e.lineno}: {e.message}")
+        print("   -> Check for typos in your ((* ... *)) blocks.\n")
+    except Exception as e:
+        print(f"System Error: {e}")
+    return None
+
+_PAGES = re.compile(r'Output written on .*?\((\d+)\s+pages?', re.DOTALL)
+_OVERFULL = re.compile(r'Overfull \\hbox \((\d+(?:\.\d+)?)pt too wide\)')
+
+def parse_latex_log(log_text):
+    """Page count (None if no PDF was written) and overfull \\hbox widths (pt) from a pdflatex log."""
+    pages = _PAGES.search(log_text or "")
+    return {"pages": int(pages.group(1)) if pages else None,
+            "overfull_pt": [float(w) for w in _OVERFULL.findall(log_text or "")]}
+
+def _from_cache(rendered_tex, output_filename, report):
+    """(render cache key or None, output_filename if the cache already had this PDF else None)."""
+    if not render_cache.ENABLED: return None, None
+    cache_key = render_cache.make_key(rendered_tex, LATEX_COMPILER, TEMPLATE_DIR)
+    cached_pdf = render_cache.lookup(cache_key)
+    if not cached_pdf: return cache_key, None
+    report.update(render_cache.load_meta(cache_key), cached=True)
+    _move_into_place(cached_pdf, output_filename)
+    print(f"♻️  LaTeX unchanged, reused cached PDF: {output_filename}")
+    return cache_key, output_filename
 
-        output_tex = "temp_build.tex"
-        with open(output_tex, "w", encoding='utf-8') as f:
-            f.write(rendered_tex)
+@tracing.traced("latex.compile")
+def _compile(rendered_tex, build_dir, output_filename, report=None):
+    """Writes the .tex into build_dir, runs LATEX_COMPILER and moves the PDF into place."""
+    report = {} if report is None else report
+    cache_key, cached = _from_cache(rendered_tex, output_filename, report)
+    if cached: return cached
 
-        print(f"   (Compiling {output_tex}...)")
+    built_pdf = os.path.join(build_dir, "temp_build.pdf")
+    process = None
+    if LATEX_BACKEND == 'format':
+        tex, extra_args, fmt_key = latex_format.prepare(rendered_tex, LATEX_COMPILER)
+        if fmt_key:
+            process = _run_compiler(tex, build_dir, extra_args)
+            if not os.path.exists(built_pdf):
+                print("   ⚠️  Warm compile failed, retrying without the precompiled preamble...")
+                latex_format.mark_failed(fmt_key)
+                process = None
+    if process is None:
+        process = _run_compiler(rendered_tex, build_dir, [])
+    return _collect(build_dir, output_filename, cache_key, report, process.stdout or process.stderr)
+
+def _collect(build_dir, output_filename, cache_key, report, compiler_output):
+    """Reads the log into `report`, then caches and moves the built PDF into place (or prints the error)."""
+    built_pdf = os.path.join(build_dir, "temp_build.pdf")
+    log_path = os.path.join(build_dir, "temp_build.log")
+    if os.path.exists(log_path):
+        with open(log_path, 'r', encoding='utf-8', errors='replace') as f:
+            report.update(parse_latex_log(f.read()), cached=False)
+
+    if os.path.exists(built_pdf):
+        if cache_key:
+            render_cache.store(cache_key, built_pdf, meta={k: report[k] for k in ("pages", "overfull_pt") if k in report})
+        _move_into_place(built_pdf, output_filename)
+        print(f"✅ PDF Generated Successfully: {output_filename}")
         
-        # DEBUG COMPILER
-        process = subprocess.run(
-            [LATEX_COMPILER, '-interaction=nonstopmode', output_tex], 
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True
-        )
-
-        if os.path.exists("temp_build.pdf"):
-            if os.path.exists(output_filename):
-                os.remove(output_filename) 
-            os.rename("temp_build.pdf", output_filename)
-            print(f"✅ PDF Generated Successfully: {output_filename}")
-            
-            # Cleanup
-            for ext in ['.aux', '.log', '.out', '.tex']:
-                if os.path.exists(f"temp_build{ext}"):
-                    os.remove(f"temp_build{ext}")
+        # Cleanup
+        for ext in ['.aux', '.log', '.out', '.tex']:
+            leftover = os.path.join(build_dir, f"temp_build{ext}")
+            if os.path.exists(leftover):
+                os.remove(leftover)
+        return output_filename
+    else:
+        print("\n❌ PDF GENERATION FAILED!")
+        print("------------------------------------------------")
+        print("LaTeX Error Log (Last 20 lines):")
+        if compiler_output:
+            print("\n".join(compiler_output.splitlines()[-20:]))
         else:
-            print("\n❌ PDF GENERATION FAILED!")
-            print("------------------------------------------------")
-            print("LaTeX Error Log (Last 20 lines):")
-            log_output = process.stdout if process.stdout else process.stderr
-            if log_output:
-                print("\n".join(log_output.splitlines()[-20:]))
-            else:
-                print("No output captured from pdflatex.")
-            print("------------------------------------------------")
-            
+            print("No output captured from pdflatex.")
+        print("------------------------------------------------")
+        return None
+
+def _write_tex(tex, build_dir):
+    output_tex = "temp_build.tex"
+    with open(os.path.join(build_dir, output_tex), "w", encoding='utf-8') as f:
+        f.write(tex)
+    return output_tex
+
+def _run_compiler(tex, build_dir, extra_args):
+    output_tex = _write_tex(tex, build_dir)
+
+    print(f"   (Compiling {output_tex} in {build_dir}...)")
+    
+    # DEBUG COMPILER
+    with tracing.span("latex.pdflatex", warm=bool(extra_args)) as span:
+        try:
+            process = subprocess.run(
+                [LATEX_COMPILER, '-interaction=nonstopmode', *extra_args, output_tex], 
+                cwd=build_dir,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True
+            )
+        except FileNotFoundError:
+            process = subprocess.CompletedProcess([LATEX_COMPILER], 127, "", _not_installed())
+        span["returncode"] = process.returncode
+    return process
+
+def _not_installed():
+    return (f"{LATEX_COMPILER} is not installed or not on PATH. Install a TeX distribution "
+            f"(e.g. TeX Live or MiKTeX), or build only non-PDF formats (OUTPUT_FORMATS=md,docx).")
+
+async def build_pdf_async(data, template_name="resume_template.tex", output_filename="Generated_Resume.pdf",
+                          clean=True, report=None):
+    """
+    build_pdf() for asyncio callers: pdflatex runs as an asyncio subprocess and the
+    file work (render cache, moving the PDF) happens in worker threads, so many
+    builds can be awaited side by side on one event loop.
+    """
+    try:
+        rendered_tex = render_tex(data, template_name, clean)
+        build_dir = await asyncio.to_thread(tempfile.mkdtemp, prefix="resume_build_")
+        try:
+            return await _compile_async(rendered_tex, build_dir, output_filename, report)
+        finally:
+            await asyncio.to_thread(shutil.rmtree, build_dir, ignore_errors=True)
     except jinja2.TemplateSyntaxError as e:
         print(f"\nTEMPLATE ERROR in {template_name}:")
         print(f"   Line {e.lineno}: {e.message}")
         print("   -> Check for typos in your ((* ... *)) blocks.\n")
     except Exception as e:
         print(f"System Error: {e}")
+    return None
+
+async def _compile_async(rendered_tex, build_dir, output_filename, report=None):
+    report = {} if report is None else report
+    with tracing.span("latex.compile"):
+        cache_key, cached = await asyncio.to_thread(_from_cache, rendered_tex, output_filename, report)
+        if cached: return cached
+
+        built_pdf = os.path.join(build_dir, "temp_build.pdf")
+        output = None
+        if LATEX_BACKEND == 'format':
+            # May build the format file on first use; that's a blocking compile
+            tex, extra_args, fmt_key = await asyncio.to_thread(latex_format.prepare, rendered_tex, LATEX_COMPILER)
+            if fmt_key:
+                output = await _run_compiler_async(tex, build_dir, extra_args)
+                if not os.path.exists(built_pdf):
+                    print("   ⚠️  Warm compile failed, retrying without the precompiled preamble...")
+                    latex_format.mark_failed(fmt_key)
+                    output = None
+        if output is None:
+            output = await _run_compiler_async(rendered_tex, build_dir, [])
+        return await asyncio.to_thread(_collect, build_dir, output_filename, cache_key, report, output)
+
+async def _run_compiler_async(tex, build_dir, extra_args):
+    """Runs LATEX_COMPILER as an asyncio subprocess; returns its output (stdout, else stderr)."""
+    output_tex = await asyncio.to_thread(_write_tex, tex, build_dir)
+    print(f"   (Compiling {output_tex} in {build_dir}...)")
+    with tracing.span("latex.pdflatex", warm=bool(extra_args)) as span:
+        try:
+            process = await asyncio.create_subprocess_exec(
+                LATEX_COMPILER, '-interaction=nonstopmode', *extra_args, output_tex,
+                cwd=build_dir, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+        except FileNotFoundError:
+            span["returncode"] = 127
+            return _not_installed()
+        stdout, stderr = await process.communicate()
+        span["returncode"] = process.returncode
+    return (stdout or stderr).decode('utf-8', errors='replace')
+
+@tracing.traced("io.move_pdf")
+def _move_into_place(src, dst):
+    """
+    Atomically replaces dst with src, so readers never see a half-written PDF.
+    The temp dir may be on another filesystem, so stage a copy next to dst first.
+    mkstemp creates the copy as 0600; it gets the mode a plain open() would give.
+    """
+    dst_dir = os.path.dirname(os.path.abspath(dst))
+    os.makedirs(dst_dir, exist_ok=True)
+    fd, staged = tempfile.mkstemp(dir=dst_dir, suffix=".pdf.part")
+    os.close(fd)
+    try:
+        shutil.copyfile(src, staged)
+        os.chmod(staged, 0o666 & ~_UMASK)
+        os.replace(staged, dst)
+    except BaseException:
+        if os.path.exists(staged):
+            os.remove(staged)
+        raise
+
+def _build_job(job):
+    data, output_filename = job
+    before = render_cache.get_stats()
+    path = build_pdf(data, output_filename=output_filename)
+    after = render_cache.get_stats()
+    return path, {k: after[k] - before[k] for k in after}
+
+def build_pdfs(jobs, max_workers=None):
+    """
+    Compiles many resumes on all cores. `jobs` is a list of (data, output_filename);
+    returns the PDF paths (None for failed builds) in the same order.
+    """
+    paths = []
+    with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as pool:
+        for path, stats in pool.map(_build_job, jobs):
+            render_cache.record(**stats)  # Fold worker counts into this process
+            paths.append(path)
+    return paths
 
 if __name__ == "__main__":
     # Test Data
@@ -0,0 +1,112 @@
+# retrieval.py
+"""
+Local BM25 ranking of portfolio entries against a job description, used to
+pre-select the entries that go into the tailoring prompt.
+
+Terms from an entry's 'Technical Skills' lines (and its name/type header)
+count more than free-text content, BM25F-style. The index is an inverted
+posting list built once per portfolio version, so scoring a JD only touches
+the postings of the JD's own terms.
+"""
+import re
+import json
+import math
+import hashlib
+import threading
+from collections import Counter, OrderedDict, defaultdict
+
+# CONFIGURATION
+K1 = 1.2
+B = 0.75
+SKILLS_WEIGHT = 3.0     # Technical Skills lines
+HEADER_WEIGHT = 1.5     # Name / Type / Title / Company fields
+CONTENT_WEIGHT = 1.0
+MAX_INDEXES = 8         # Portfolio versions kept in memory
+
+_TOKEN = re.compile(r'[a-z0-9][a-z0-9+#.]*')
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have in is it its of on or that the to was were will with
+we you your our their this these those who what which can able using use used work working
+""".split())
+
+def tokenize(text):
+    tokens = []
+    for tok in _TOKEN.findall(text.lower()):
+        tok = tok.rstrip('.')  # "Node.js." at the end of a sentence -> "node.js"
+        if tok and tok not in STOPWORDS:
+            tokens.append(tok)
+    return tokens
+
+def _weighted_terms(entry):
+    terms = Counter()
+    for tok in tokenize(" ".join(entry["skills"].values())):
+        terms[tok] += SKILLS_WEIGHT
+    header = " ".join(v for k, v in entry["fields"].items() if k in ("name", "type", "title", "company", "role"))
+    for tok in tokenize(header):
+        terms[tok] += HEADER_WEIGHT
+    for tok in tokenize(" ".join(entry["content"])):
+        terms[tok] += CONTENT_WEIGHT
+    return terms
+
+class Bm25Index:
+    """Inverted index over portfolio entries with precomputed IDF and length norms."""
+
+    def __init__(self, entries):
+        self.entries = entries
+        self.postings = defaultdict(list)   # term -> [(entry position, weighted tf)]
+        lengths = []
+        for pos, entry in enumerate(entries):
+            terms = _weighted_terms(entry)
+            lengths.append(sum(terms.values()))
+            for term, tf in terms.items():
+                self.postings[term].append((pos, tf))
+
+        n = len(entries)
+        avg_len = (sum(lengths) / n) if n else 1.0
+        self.idf = {t: math.log(1 + (n - len(p) + 0.5) / (len(p) + 0.5)) for t, p in self.postings.items()}
+        # Per-entry constant part of the BM25 denominator
+        self.norms = [K1 * (1 - B + B * length / (avg_len or 1.0)) for length in lengths]
+
+    def scores(self, query_text):
+        """BM25 score of every entry (in index order) for the query."""
+        scores = [0.0] * len(self.entries)
+        for term in set(tokenize(query_text)):
+            postings = self.postings.get(term)
+            if not postings: continue
+            idf = self.idf[term]
+            for pos, tf in postings:
+                scores[pos] += idf * tf * (K1 + 1) / (tf + self.norms[pos])
+        return scores
+
+    def rank(self, query_text, kind=None, top_k=None):
+        """Entries sorted by score (ties keep portfolio order), optionally one kind only."""
+        scores = self.scores(query_text)
+        order = sorted(
+            (pos for pos, e in enumerate(self.entries) if kind is None or e["kind"] == kind),
+            key=lambda pos: -scores[pos],
+        )
+        if top_k is not None: order = order[:top_k]
+        return [(self.entries[pos], scores[pos]) for pos in order]
+
+_indexes = OrderedDict()   # content hash -> Bm25Index, least recently used first
+_indexes_lock = threading.Lock()
+
+def _content_hash(portfolio_index):
+    """The stored portfolio sha256, or a hash of the entries for indexes built in memory."""
+    sha = portfolio_index.get("sha256")
+    if sha: return sha
+    payload = json.dumps(portfolio_index["entries"], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def get_bm25_index(portfolio_index):
+    """Bm25Index for a portfolio index, built once per portfolio content hash."""
+    key = _content_hash(portfolio_index)
+    with _indexes_lock:
+        bm25 = _indexes.get(key)
+        if bm25 is None:
+            bm25 = _indexes[key] = Bm25Index(portfolio_index["entries"])
+            while len(_indexes) > MAX_INDEXES:
+                _indexes.popitem(last=False)
+        else:
+            _indexes.move_to_end(key)
+    return bm25
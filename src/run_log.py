@@ -0,0 +1,90 @@
+# run_log.py
+"""
+Per-job run log. start_job() binds a fresh log to the current context, and
+helpers deep in the pipeline (LLM calls, ...) append to it without the log
+being threaded through every function signature. Threads started with
+contextvars.copy_context() (like run_job's interview phase) share the log.
+
+A job started with quiet=True keeps its progress messages (the pipeline's
+print() calls) in log["messages"] instead of writing them to stdout, so library
+callers get them back as data and concurrent jobs don't interleave output.
+"""
+import sys
+import threading
+import contextvars
+
+_current = contextvars.ContextVar("run_log", default=None)
+_stdout_lock = threading.Lock()
+
+class _ContextStdout:
+    """sys.stdout stand-in that diverts writes from quiet jobs into their log."""
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, text):
+        log = _current.get()
+        if log is None or not log.get("_quiet"):
+            return self.stream.write(text)
+        with log["_lock"]:
+            buffered = log["_partial"] + text
+            *lines, log["_partial"] = buffered.split("\n")
+            log["messages"].extend(line for line in lines if line.strip())
+        return len(text)
+
+    def flush(self):
+        self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+def _capture_stdout():
+    with _stdout_lock:
+        if not isinstance(sys.stdout, _ContextStdout):
+            sys.stdout = _ContextStdout(sys.stdout)
+
+def start_job(job_id, quiet=False):
+    """Starts a log for `job_id` in the current context and returns it."""
+    log = {"job_id": job_id, "llm_calls": [], "_lock": threading.Lock()}
+    if quiet:
+        _capture_stdout()
+        log.update(messages=[], _quiet=True, _partial="")
+    _current.set(log)
+    return log
+
+def current():
+    return _current.get()
+
+def record_llm_call(**fields):
+    """Appends one LLM call record (stage, queue wait, retries...) to the current job, if any."""
+    log = _current.get()
+    if log is None: return
+    with log["_lock"]:
+        log["llm_calls"].append(fields)
+
+def summary(log):
+    """JSON-safe copy of a job log for manifests."""
+    return {k: v for k, v in log.items() if not k.startswith("_")}
+
+def token_totals(calls):
+    """
+    Token/cost totals for a list of LLM call records, overall and per stage.
+    Cached calls are counted under "cached_*" and not billed; prompt tokens the
+    provider served from a context cache are counted in "context_cached_tokens".
+    """
+    def empty():
+        return {"calls": 0, "prompt_tokens": 0, "response_tokens": 0, "context_cached_tokens": 0,
+                "cached_calls": 0, "cached_prompt_tokens": 0, "cost_usd": 0.0}
+
+    totals = {"total": empty(), "stages": {}}
+    for call in calls:
+        for bucket in (totals["total"], totals["stages"].setdefault(call.get("stage") or "other", empty())):
+            if call.get("cached"):
+                bucket["cached_calls"] += 1
+                bucket["cached_prompt_tokens"] += call.get("prompt_tokens", 0)
+                continue
+            bucket["calls"] += 1
+            bucket["prompt_tokens"] += call.get("prompt_tokens", 0)
+            bucket["response_tokens"] += call.get("response_tokens", 0)
+            bucket["context_cached_tokens"] += call.get("context_cached_tokens", 0)
+            bucket["cost_usd"] = round(bucket["cost_usd"] + call.get("cost_usd", 0.0), 6)
+    return totals
@@ -0,0 +1,195 @@
+# scheduler.py
+"""
+Client-side rate limiting and retries for LLM calls.
+
+Every call first takes a request slot and its estimated tokens from two
+sliding 60 s windows (requests/min and tokens/min), so no minute ever sees
+more than the configured budget, cold start included. Waiting callers are
+served strictly by priority, so resume tailoring never queues behind interview
+prep. Retryable failures (429, transient 5xx, dropped connections) are retried
+with jittered exponential backoff.
+"""
+import os
+import time
+import heapq
+import asyncio
+import collections
+import random
+import itertools
+import threading
+import httpx
+from google.genai import errors
+
+# CONFIGURATION (defaults match Gemini 2.5 Flash tier-1 quotas)
+REQUESTS_PER_MIN = int(os.getenv("LLM_RPM", "1000"))
+TOKENS_PER_MIN = int(os.getenv("LLM_TPM", "1000000"))
+MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "5"))
+WINDOW_S = 61.0         # The budgets are per minute; the extra second covers the gap between taking
+                        # a slot and the request reaching the server, which counts from arrival
+BACKOFF_BASE = 1.0      # Seconds before the first retry
+BACKOFF_MAX = 60.0
+
+PRIORITY_RESUME = 0     # Lower number = served first
+PRIORITY_INTERVIEW = 1
+STAGE_PRIORITIES = {"resume": PRIORITY_RESUME, "interview": PRIORITY_INTERVIEW}
+
+ASYNC_POLL_S = 0.05     # How often async callers re-check a busy limiter
+ASYNC_POLL_MAX_S = 1.0
+
+RETRYABLE_STATUS = (408, 429, 500, 502, 503, 504)
+_TRANSIENT_ERRORS = (httpx.TransportError,)
+
+class SlidingWindow:
+    """
+    At most `per_minute` units in any WINDOW_S seconds, tracked as a log of what
+    was taken when. (A token bucket that starts or refills to full lets through
+    up to twice its rate in the first minute after idling.)
+    """
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.taken = collections.deque()    # (time, amount), oldest first
+        self.used = 0.0
+        self.now = time.monotonic()
+
+    def refill(self, now):
+        """Forgets what was taken more than WINDOW_S before `now`."""
+        self.now = now
+        while self.taken and self.taken[0][0] <= now - WINDOW_S:
+            self.used -= self.taken.popleft()[1]
+
+    def wait_time(self, amount):
+        """Seconds until `amount` units are available (0 if they already are)."""
+        excess = self.used + min(amount, self.capacity) - self.capacity
+        if excess <= 1e-9: return 0.0
+        for when, taken in self.taken:
+            excess -= taken
+            if excess <= 1e-9:
+                return max(0.0, when + WINDOW_S - self.now)
+        return WINDOW_S
+
+    def take(self, amount):
+        amount = min(amount, self.capacity)
+        self.taken.append((self.now, amount))
+        self.used += amount
+
+class RateLimiter:
+    """Requests/min + tokens/min budget shared by every thread in the process."""
+
+    def __init__(self, requests_per_min=REQUESTS_PER_MIN, tokens_per_min=TOKENS_PER_MIN):
+        self.configure(requests_per_min, tokens_per_min)
+        self._cond = threading.Condition()
+        self._waiters = []
+        self._seq = itertools.count()
+
+    def configure(self, requests_per_min, tokens_per_min):
+        """A value <= 0 disables that budget."""
+        self.requests = SlidingWindow(requests_per_min) if requests_per_min > 0 else None
+        self.tokens = SlidingWindow(tokens_per_min) if tokens_per_min > 0 else None
+
+    def _buckets(self, tokens):
+        return [(b, n) for b, n in ((self.requests, 1), (self.tokens, tokens)) if b]
+
+    def acquire(self, tokens=0, priority=PRIORITY_RESUME):
+        """Blocks until the call fits in both budgets. Returns the seconds spent waiting."""
+        start = time.monotonic()
+        with self._cond:
+            ticket = (priority, next(self._seq))
+            heapq.heappush(self._waiters, ticket)
+            try:
+                while True:
+                    if self._waiters[0] != ticket:
+                        self._cond.wait()
+                        continue
+                    now = time.monotonic()
+                    wait = 0.0
+                    for bucket, amount in self._buckets(tokens):
+                        bucket.refill(now)
+                        wait = max(wait, bucket.wait_time(amount))
+                    if wait <= 0:
+                        for bucket, amount in self._buckets(tokens):
+                            bucket.take(amount)
+                        return time.monotonic() - start
+                    self._cond.wait(timeout=wait)
+            finally:
+                self._waiters.remove(ticket)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+
+    def try_acquire(self, tokens=0, priority=PRIORITY_RESUME):
+        """
+        Takes the budget if it fits now and no blocked caller of equal or higher
+        priority is ahead. Returns 0.0 on success, else the seconds to wait first.
+        """
+        with self._cond:
+            if self._waiters and self._waiters[0][0] <= priority: return ASYNC_POLL_S
+            now = time.monotonic()
+            wait = 0.0
+            for bucket, amount in self._buckets(tokens):
+                bucket.refill(now)
+                wait = max(wait, bucket.wait_time(amount))
+            if wait > 0: return wait
+            for bucket, amount in self._buckets(tokens):
+                bucket.take(amount)
+            return 0.0
+
+    async def acquire_async(self, tokens=0, priority=PRIORITY_RESUME):
+        """
+        acquire() for asyncio callers: sleeps on the event loop instead of holding
+        a thread. Async callers poll, so among themselves priority is best-effort.
+        """
+        start = time.monotonic()
+        while True:
+            wait = self.try_acquire(tokens, priority)
+            if wait <= 0: return time.monotonic() - start
+            await asyncio.sleep(min(wait, ASYNC_POLL_MAX_S))
+
+limiter = RateLimiter()
+
+def is_retryable(error):
+    if isinstance(error, errors.APIError):
+        return error.code in RETRYABLE_STATUS
+    if getattr(error, "status_code", None) in RETRYABLE_STATUS:  # e.g. ollama.ResponseError
+        return True
+    return isinstance(error, _TRANSIENT_ERRORS)
+
+def backoff_delay(attempt):
+    """Full-jitter exponential backoff: uniform(0, min(max, base * 2^attempt))."""
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+def call_with_retry(fn, stats, can_retry=lambda: True, max_retries=None):
+    """
+    Runs fn(), retrying retryable errors with backoff. `stats["retries"]` counts
+    the retries; can_retry() lets streaming callers stop once output was consumed.
+    """
+    max_retries = MAX_RETRIES if max_retries is None else max_retries
+    attempt = 0
+    while True:
+        try:
+            return fn()
+        except Exception as e:
+            if attempt >= max_retries or not is_retryable(e) or not can_retry():
+                raise
+            delay = backoff_delay(attempt)
+            code = getattr(e, "code", type(e).__name__)
+            print(f"   ⏳ LLM call failed ({code}), retry {attempt + 1}/{max_retries} in {delay:.1f}s")
+            time.sleep(delay)
+            attempt += 1
+            stats["retries"] = attempt
+
+async def call_with_retry_async(fn, stats, max_retries=None):
+    """call_with_retry for a coroutine function: awaits fn() and sleeps on the event loop between retries."""
+    max_retries = MAX_RETRIES if max_retries is None else max_retries
+    attempt = 0
+    while True:
+        try:
+            return await fn()
+        except Exception as e:
+            if attempt >= max_retries or not is_retryable(e):
+                raise
+            delay = backoff_delay(attempt)
+            code = getattr(e, "code", type(e).__name__)
+            print(f"   ⏳ LLM call failed ({code}), retry {attempt + 1}/{max_retries} in {delay:.1f}s")
+            await asyncio.sleep(delay)
+            attempt += 1
+            stats["retries"] = attempt
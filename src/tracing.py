@@ -0,0 +1,136 @@
+# tracing.py
+"""
+Lightweight span tracing for one job at a time.
+
+enable(log) turns tracing on for a run_log job. From then on, every
+`with span("name"):` block in that context (including threads started with
+contextvars.copy_context()) is recorded with its parent, thread and duration.
+Outside a traced job, span() costs one ContextVar lookup.
+
+write(log, base_path) saves the spans as JSON lines (<base>.trace.jsonl) and,
+optionally, as a Chrome trace-event file (<base>.trace.json) that opens in
+chrome://tracing or https://ui.perfetto.dev.
+"""
+import os
+import json
+import time
+import functools
+import itertools
+import threading
+import contextvars
+from contextlib import contextmanager
+from . import run_log
+
+# CONFIGURATION
+TRACE_DIR = os.getenv("TRACE_DIR")                  # Set to write a trace per job
+CHROME_TRACE = os.getenv("TRACE_CHROME", "0") == "1"
+
+# Span name prefix -> where the time went, for summarize()
+CATEGORIES = {"llm": "llm", "latex": "latex", "io": "io"}
+
+_parent = contextvars.ContextVar("trace_parent", default=None)
+_ids = itertools.count(1)
+_EPOCH_OFFSET = time.time() - time.perf_counter()
+
+def enable(log):
+    """Starts collecting spans into run_log job `log`."""
+    log["_spans"] = []
+    return log
+
+def _spans():
+    log = run_log.current()
+    if log is None: return None, None
+    return log, log.get("_spans")
+
+def _append(log, spans, name, span_id, start, end, attrs):
+    entry = {
+        "name": name, "span_id": span_id, "parent_id": _parent.get(), "job_id": log.get("job_id"),
+        "thread": threading.current_thread().name,
+        "start": round(start + _EPOCH_OFFSET, 6), "duration_ms": round((end - start) * 1000, 3),
+        **attrs,
+    }
+    with log["_lock"]:
+        spans.append(entry)
+
+def record(name, start, end=None, **attrs):
+    """Adds an already finished span (perf_counter start/end) under the current parent."""
+    log, spans = _spans()
+    if spans is None: return
+    _append(log, spans, name, next(_ids), start, time.perf_counter() if end is None else end, attrs)
+
+@contextmanager
+def span(name, **attrs):
+    """
+    Times the block as a child of the enclosing span. Yields a dict the block can
+    add attributes to; an exception is recorded as the span's error and re-raised.
+    """
+    log, spans = _spans()
+    if spans is None:
+        yield {}
+        return
+    span_id = next(_ids)
+    token = _parent.set(span_id)
+    start = time.perf_counter()
+    try:
+        yield attrs
+    except BaseException as e:
+        attrs["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        end = time.perf_counter()
+        _parent.reset(token)
+        _append(log, spans, name, span_id, start, end, attrs)
+
+def traced(name):
+    """Decorator form of span()."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
+
+def summarize(spans):
+    """
+    Milliseconds per category. Only leaf spans are counted (so nested time is not
+    double-counted); anything outside llm.* / latex.* / io.* is "python".
+    """
+    parents = {s["parent_id"] for s in spans}
+    totals = {"llm": 0.0, "latex": 0.0, "io": 0.0, "python": 0.0}
+    for s in spans:
+        if s["span_id"] in parents: continue
+        category = CATEGORIES.get(s["name"].split(".", 1)[0], "python")
+        totals[category] = round(totals[category] + s["duration_ms"], 3)
+    return totals
+
+def chrome_events(spans):
+    """Spans as Chrome trace-event 'complete' events (microseconds)."""
+    threads = {}
+    events = []
+    for s in spans:
+        tid = threads.setdefault(s["thread"], len(threads) + 1)
+        args = {k: v for k, v in s.items() if k not in ("name", "start", "duration_ms", "thread")}
+        events.append({"name": s["name"], "ph": "X", "pid": 1, "tid": tid,
+                       "ts": round(s["start"] * 1e6), "dur": round(s["duration_ms"] * 1000), "args": args})
+    events.extend({"name": "thread_name", "ph": "M", "pid": 1, "tid": tid, "args": {"name": name}}
+                  for name, tid in threads.items())
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+def write(log, base_path, chrome=None):
+    """Writes <base_path>.trace.jsonl (and .trace.json for Chrome). Returns the JSONL path."""
+    spans = sorted(log.get("_spans") or [], key=lambda s: s["start"])
+    chrome = CHROME_TRACE if chrome is None else chrome
+    try:
+        os.makedirs(os.path.dirname(base_path) or ".", exist_ok=True)
+        path = f"{base_path}.trace.jsonl"
+        with open(path, 'w', encoding='utf-8') as f:
+            for s in spans:
+                f.write(json.dumps(s) + "\n")
+        if chrome:
+            with open(f"{base_path}.trace.json", 'w', encoding='utf-8') as f:
+                json.dump(chrome_events(spans), f)
+        return path
+    except OSError as e:
+        print(f"⚠️  Could not write trace: {e}")
+        return None
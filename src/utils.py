@@ -1,36 +1,326 @@
 # utils.py
 import json
 import os
+import re
+import time
+import asyncio
+import threading
+import httpx
 from google import genai
 from google.genai import types
 from dotenv import load_dotenv
+from . import llm_cache, providers, run_log, scheduler, tracing
+from .json_stream import JsonStreamParser
 
 load_dotenv()
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+GEMINI_BASE_URL = os.getenv("GEMINI_BASE_URL")    # Optional override (e.g. a local stub server)
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "16"))
+MODEL_NAME = "gemini-2.5-flash"
+GENERATION_CONFIG = {"temperature": 0.0, "response_mime_type": "application/json"}
+# USD per 1M tokens (input, output incl. thinking), for the cost column of run reports.
+PRICE_PER_M_TOKENS = {"gemini-2.5-flash": (0.30, 2.50)}
+CONTEXT_CACHE_PRICE_RATIO = 0.25    # Prompt tokens served from a Gemini context cache bill at this share
 
+# temperature=0.0 makes responses reproducible, so identical requests are
+# served from disk. Set LLM_CACHE=0 (or pass use_cache=False) to bypass it.
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE", "1") != "0"
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_client():
+    """
+    Process-wide Gemini client, created on first use.
+    The SDK keeps one httpx connection pool per client, so sharing it lets every
+    call reuse warm keep-alive connections instead of paying TLS setup again.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                limits = httpx.Limits(max_connections=HTTP_POOL_SIZE, max_keepalive_connections=HTTP_POOL_SIZE)
+                _client = genai.Client(
+                    api_key=GEMINI_API_KEY,
+                    http_options=types.HttpOptions(
+                        base_url=GEMINI_BASE_URL,
+                        client_args={"limits": limits},
+                        async_client_args={"limits": limits},
+                    ),
+                )
+    return _client
+
+def get_async_client():
+    """Async view of the shared client (client.aio), backed by its own pooled connections."""
+    return get_client().aio
+
+def reset_client():
+    """Drops the shared client so the next call builds a fresh one (e.g. after changing the API key)."""
+    global _client
+    with _client_lock:
+        _client = None
+
+@tracing.traced("io.load_file")
 def load_file(path):
     try:
         with open(path, 'r', encoding='utf-8') as f: return f.read()
     except FileNotFoundError:
         print(f"❌ Error: File not found at {path}"); return None
 
+@tracing.traced("io.load_json")
 def load_json(path):
     try:
         with open(path, 'r', encoding='utf-8') as f: return json.load(f)
     except FileNotFoundError: return {}
 
-def get_llm_response(prompt):
-    """Shared function to call Gemini 2.5 Pro"""
-    try:
-        client = genai.Client(api_key=GEMINI_API_KEY)
-        response = client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                temperature=0.0,
-                response_mime_type="application/json"
-            )
-        )
-        return json.loads(response.text)
+async def load_file_async(path):
+    """load_file() in a worker thread, so reading a large file doesn't stall the event loop."""
+    return await asyncio.to_thread(load_file, path)
+
+async def load_json_async(path):
+    return await asyncio.to_thread(load_json, path)
+
+def estimate_tokens(text):
+    """Rough token count (~4 chars/token for English) for budgeting before a call."""
+    return len(text) // 4 + 1
+
+def truncate_to_tokens(text, max_tokens):
+    """Cuts `text` to about `max_tokens` (by estimate_tokens), at a line break when possible."""
+    if max_tokens <= 0: return ""
+    if estimate_tokens(text) <= max_tokens: return text
+    cut = text[:max_tokens * 4]
+    newline = cut.rfind("\n")
+    return cut[:newline] if newline > len(cut) // 2 else cut
+
+_provider = None
+
+def get_provider():
+    """The process-wide LLM backend chosen by LLM_PROVIDER (see providers.py)."""
+    global _provider
+    if _provider is None:
+        with _client_lock:
+            if _provider is None:
+                _provider = make_provider(providers.PROVIDER_NAME)
+    return _provider
+
+def make_provider(name):
+    if name not in providers.PROVIDERS:
+        raise ValueError(f"Unknown LLM provider '{name}' (choose from {', '.join(providers.PROVIDERS)})")
+    if name == "gemini":
+        return providers.GeminiProvider(MODEL_NAME, GENERATION_CONFIG)
+    if name == "ollama":
+        return providers.OllamaProvider(config=GENERATION_CONFIG)
+    return providers.PROVIDERS[name]()
+
+def set_provider(name):
+    """Switches every later LLM call to the `name` backend (e.g. from a --provider flag)."""
+    global _provider
+    _provider = make_provider(name)
+    return _provider
+
+def extract_json(text):
+    """
+    Parses a JSON object out of an LLM reply, tolerating ```json fences, chatter
+    around the object and trailing commas (common with local models).
+    Raises json.JSONDecodeError if nothing parses.
+    """
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        pass
+    # Regex to find JSON block
+    match = re.search(r'```(?:json)?\s*({.*?})\s*```', text, re.DOTALL)
+    if match:
+        json_str = match.group(1)
+    else:
+        # Fallback: Find outer brackets
+        start_idx = text.find('{')
+        end_idx = text.rfind('}')
+        json_str = text[start_idx:end_idx + 1] if start_idx != -1 and end_idx != -1 else text
+
+    # Clean common LLM JSON errors
+    json_str = re.sub(r',\s*}', '}', json_str)
+    json_str = re.sub(r',\s*]', ']', json_str)
+    return json.loads(json_str)
+
+def _new_call_stats(stage, provider):
+    return {"stage": stage, "provider": provider.name, "model": provider.model, "cached": False,
+            "queue_wait_s": 0.0, "retries": 0, "seconds": 0.0, "prompt_tokens": 0, "response_tokens": 0,
+            "token_source": "estimate", "context_cached_tokens": 0, "cost_usd": 0.0, "error": None}
+
+def _record_usage(stats, prompt, response_text, usage=None):
+    """Token counts from the provider's usage data, or estimated locally when it has none."""
+    if usage:
+        stats["prompt_tokens"] = usage["prompt_tokens"]
+        stats["response_tokens"] = usage["response_tokens"]
+        stats["context_cached_tokens"] = usage.get("context_cached_tokens", 0)
+        stats["token_source"] = "usage"
+    else:
+        stats["prompt_tokens"] = estimate_tokens(prompt)
+        stats["response_tokens"] = estimate_tokens(response_text) if response_text else 0
+    if not stats["cached"]:
+        price_in, price_out = PRICE_PER_M_TOKENS.get(stats["model"], (0.0, 0.0))
+        billed_in = stats["prompt_tokens"] - stats["context_cached_tokens"] * (1 - CONTEXT_CACHE_PRICE_RATIO)
+        stats["cost_usd"] = round((billed_in * price_in + stats["response_tokens"] * price_out) / 1e6, 6)
+
+def _finish_call(stats, start):
+    stats["seconds"] = round(time.perf_counter() - start, 3)
+    stats["queue_wait_s"] = round(stats["queue_wait_s"], 3)
+    run_log.record_llm_call(**stats)
+    tracing.record("llm.call", start, **{k: v for k, v in stats.items() if k != "seconds" and v is not None})
+
+def _rate_limited(fn, prompt, stats, provider):
+    """Takes a rate-limit slot (counting the wait) before every attempt of fn."""
+    if not provider.rate_limited: return fn
+    priority = scheduler.STAGE_PRIORITIES.get(stats["stage"], scheduler.PRIORITY_INTERVIEW)
+    def attempt():
+        stats["queue_wait_s"] += scheduler.limiter.acquire(estimate_tokens(prompt), priority)
+        return fn()
+    return attempt
+
+def _rate_limited_async(fn, prompt, stats, provider):
+    """_rate_limited for a coroutine function; waits on the event loop, not a thread."""
+    if not provider.rate_limited: return fn
+    priority = scheduler.STAGE_PRIORITIES.get(stats["stage"], scheduler.PRIORITY_INTERVIEW)
+    async def attempt():
+        stats["queue_wait_s"] += await scheduler.limiter.acquire_async(estimate_tokens(prompt), priority)
+        return await fn()
+    return attempt
+
+def _cached_text(key, use_cache, provider):
+    """Cached response text for `key` if it is usable, else None."""
+    if not (use_cache and LLM_CACHE_ENABLED and provider.cacheable): return None
+    cached = llm_cache.get(key)
+    if cached is None: return None
+    try:
+        extract_json(cached)
+    except json.JSONDecodeError:
+        return None  # Corrupt entry: fall through and refresh it
+    return cached
+
+def _store(key, prompt, stage, text, use_cache, provider):
+    if use_cache and LLM_CACHE_ENABLED and provider.cacheable:
+        llm_cache.put(key, text, model=provider.model)
+    if providers.RECORD_RESPONSES and provider.name != "replay":
+        providers.record(prompt, stage, text)
+
+def get_llm_response(prompt, use_cache=True, stage="resume", prefix=""):
+    """
+    Shared function to call the configured LLM (served from the on-disk cache when possible).
+    `stage` ("resume" / "interview") sets the rate-limit priority and labels the run log.
+    `prefix` is static text sent before `prompt`; providers that support it keep
+    it in a context cache across calls (see providers.GeminiProvider.cached_content).
+    """
+    start = time.perf_counter()
+    provider = get_provider()
+    stats = _new_call_stats(stage, provider)
+    full_prompt = prefix + prompt
+    key = llm_cache.make_key(provider.model, GENERATION_CONFIG, full_prompt)
+    cached = _cached_text(key, use_cache, provider)
+    if cached is not None:
+        stats["cached"] = True
+        _record_usage(stats, full_prompt, cached)
+        _finish_call(stats, start)
+        return extract_json(cached)
+
+    try:
+        text, usage = scheduler.call_with_retry(_rate_limited(
+            lambda: provider.generate(prompt, stage=stage, prefix=prefix), full_prompt, stats, provider), stats)
+        data = extract_json(text)
+    except Exception as e:
+        stats["error"] = f"{type(e).__name__}: {e}"
+        _finish_call(stats, start)
+        print(f"❌ LLM Error ({provider.name}): {e}"); return None
+
+    _record_usage(stats, full_prompt, text, usage)
+    _finish_call(stats, start)
+    _store(key, full_prompt, stage, text, use_cache, provider)
+    return data
+
+async def get_llm_response_async(prompt, use_cache=True, stage="resume", prefix=""):
+    """
+    get_llm_response for asyncio callers. Awaits the provider's async client when
+    it has one (Gemini) and runs the blocking call in a worker thread otherwise;
+    the disk cache is read and written off the event loop too.
+    """
+    start = time.perf_counter()
+    provider = get_provider()
+    stats = _new_call_stats(stage, provider)
+    full_prompt = prefix + prompt
+    key = llm_cache.make_key(provider.model, GENERATION_CONFIG, full_prompt)
+    cached = await asyncio.to_thread(_cached_text, key, use_cache, provider)
+    if cached is not None:
+        stats["cached"] = True
+        _record_usage(stats, full_prompt, cached)
+        _finish_call(stats, start)
+        return extract_json(cached)
+
+    async def call():
+        if hasattr(provider, "agenerate"):
+            return await provider.agenerate(prompt, stage=stage, prefix=prefix)
+        return await asyncio.to_thread(provider.generate, prompt, stage=stage, prefix=prefix)
+
+    try:
+        text, usage = await scheduler.call_with_retry_async(
+            _rate_limited_async(call, full_prompt, stats, provider), stats)
+        data = extract_json(text)
+    except Exception as e:
+        stats["error"] = f"{type(e).__name__}: {e}"
+        _finish_call(stats, start)
+        print(f"❌ LLM Error ({provider.name}): {e}"); return None
+
+    _record_usage(stats, full_prompt, text, usage)
+    _finish_call(stats, start)
+    await asyncio.to_thread(_store, key, full_prompt, stage, text, use_cache, provider)
+    return data
+
+def get_llm_response_stream(prompt, watch, on_item, use_cache=True, stage="resume", prefix=""):
+    """
+    Streaming variant of get_llm_response. Each value at one of the `watch` paths
+    (see json_stream.py) is passed to on_item(path, value) as soon as it closes,
+    so callers can post-process sections while the rest is still generating.
+    Returns the complete parsed response, or None on error.
+    """
+    start = time.perf_counter()
+    provider = get_provider()
+    stats = _new_call_stats(stage, provider)
+    full_prompt = prefix + prompt
+    key = llm_cache.make_key(provider.model, GENERATION_CONFIG, full_prompt)
+    parser = JsonStreamParser(watch, on_item)
+    usage = []  # The last chunk carries the usage data
+    cached = _cached_text(key, use_cache, provider)
+    if cached is not None:
+        stats["cached"] = True
+        _record_usage(stats, full_prompt, cached)
+        _finish_call(stats, start)
+        parser.feed(cached)  # Replay the sections through the same callbacks
+        return _close(parser)
+
+    def call():
+        for text, chunk_usage in provider.stream(prompt, stage=stage, prefix=prefix):
+            if text:
+                parser.feed(text)
+            if chunk_usage:
+                usage.append(chunk_usage)
+        return _close(parser)
+
+    try:
+        # Sections already handed to on_item can't be taken back, so only
+        # retry while nothing has been received yet.
+        data = scheduler.call_with_retry(_rate_limited(call, full_prompt, stats, provider), stats,
+                                         can_retry=lambda: not parser.text)
     except Exception as e:
-        print(f"❌ Gemini Error: {e}"); return None
\ No newline at end of file
+        stats["error"] = f"{type(e).__name__}: {e}"
+        _finish_call(stats, start)
+        print(f"❌ LLM Error ({provider.name}): {e}"); return None
+
+    _record_usage(stats, full_prompt, parser.text, usage[-1] if usage else None)
+    _finish_call(stats, start)
+    _store(key, full_prompt, stage, parser.text, use_cache, provider)
+    return data
+
+def _close(parser):
+    try:
+        return parser.close()
+    except json.JSONDecodeError:
+        return extract_json(parser.text)  # e.g. trailing commas from a local model
@@ -0,0 +1,12 @@
+import os
+import sys
+import importlib.util
+
+# Tests import the app the way main1.py does (src.*, main1, batch) from the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# test_json.py / test_local.py are manual scripts that talk to a running Ollama
+# server at import time; archive/ holds old, unused code.
+collect_ignore = ["archive"]
+if importlib.util.find_spec("ollama") is None:
+    collect_ignore += ["test_json.py", "test_local.py"]
@@ -0,0 +1,145 @@
+import asyncio
+import copy
+import json
+import os
+import time
+import httpx
+import pytest
+import async_api
+import main1
+import src.utils as utils
+from src import jd, providers, scheduler
+from src.scheduler import RateLimiter, call_with_retry_async
+from src.portfolio import parse_portfolio
+from bench.samples import sample_response, sample_interview_response, sample_portfolio_text, sample_static_data
+
+COMPANIES = ["Acme", "Globex", "Initech"]
+
+def _jd(company):
+    return f"Backend Engineer at {company}\n\nRequirements:\n- Python and Kafka\n- Postgres"
+
+@pytest.fixture
+def replay(tmp_path, monkeypatch):
+    """The replay provider serving a distinct tailoring response per company's JD."""
+    monkeypatch.setattr(main1, "TOKEN_BUDGET", 0)
+    monkeypatch.setattr(utils, "LLM_CACHE_ENABLED", False)
+    provider = providers.ReplayProvider(replay_dir=str(tmp_path / "replay"), latency=0.05)
+    monkeypatch.setattr(utils, "_provider", provider)
+    index = parse_portfolio(sample_portfolio_text(projects=5))
+    for company in COMPANIES:
+        jd_text, portfolio_text = main1.fit_to_budget(jd.clean_jd(_jd(company)), index)
+        response = copy.deepcopy(sample_response(0))
+        response["meta"] = {"company": company, "role": "Backend Engineer"}
+        providers.record(main1.build_tailor_prompt(jd_text, portfolio_text), "resume", json.dumps(response),
+                         replay_dir=provider.replay_dir)
+    providers.record("", "interview", json.dumps(sample_interview_response(0)), replay_dir=provider.replay_dir)
+    return index, sample_static_data(), tmp_path
+
+def test_tailor_async_with_replay(replay, capsys):
+    index, static, tmp_path = replay
+    result = asyncio.run(async_api.tailor_async(_jd("Acme"), index, static, output_dir=str(tmp_path / "out"),
+                                                prep_dir=str(tmp_path / "prep"), formats=["md", "txt"]))
+    assert result["error"] is None, result["errors"]
+    assert result["meta"]["company"] == "Acme"
+    assert set(result["outputs"]) == {"md", "txt"} and all(os.path.exists(p) for p in result["outputs"].values())
+    assert result["pdf_path"] is None and result["pdf_bytes"] is None
+    assert os.path.exists(result["interview"]["path"]) and "INTERVIEW PREP GUIDE" in result["interview"]["text"]
+    assert result["tokens"]["total"]["calls"] == 2
+    assert {"tailor", "render", "interview", "wall"} <= set(result["timings"])
+    assert capsys.readouterr().out == ""                # quiet: progress goes to result["messages"]
+    assert any("Acme" in m for m in result["messages"])
+
+def test_concurrent_jobs_keep_their_own_messages(replay, capsys):
+    index, static, tmp_path = replay
+
+    async def run_all():
+        return await asyncio.gather(*(async_api.tailor_async(
+            _jd(c), index, static, output_dir=str(tmp_path / c), prep_dir=str(tmp_path / c), formats=["md"],
+            job_id=c) for c in COMPANIES))
+
+    results = asyncio.run(run_all())
+    assert capsys.readouterr().out == ""
+    for company, result in zip(COMPANIES, results):
+        assert result["error"] is None and result["job_id"] == company
+        assert result["meta"]["company"] == company
+        mentioned = {c for c in COMPANIES if any(c in m for m in result["messages"])}
+        assert mentioned == {company}
+        assert result["tokens"]["total"]["calls"] == 2
+
+def test_pdf_bytes_come_back(replay, monkeypatch):
+    index, static, tmp_path = replay
+
+    async def fake_build(data, output_filename, **kwargs):
+        with open(output_filename, "wb") as f: f.write(b"%PDF-1.4 fake")
+        return output_filename
+
+    monkeypatch.setattr(async_api, "build_pdf_async", fake_build)
+    result = asyncio.run(async_api.tailor_async(_jd("Globex"), index, static, output_dir=str(tmp_path / "out"),
+                                                formats=["pdf"], interview=False))
+    assert result["error"] is None and result["pdf_bytes"] == b"%PDF-1.4 fake"
+    assert result["outputs"]["pdf"] == result["pdf_path"]
+
+def test_acquire_async_waits_for_full_window_without_blocking_loop(monkeypatch):
+    monkeypatch.setattr(scheduler, "WINDOW_S", 0.3)
+    limiter = RateLimiter(requests_per_min=2, tokens_per_min=0)
+
+    async def main():
+        ticks = 0
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01); ticks += 1
+        task = asyncio.create_task(ticker())
+        assert await limiter.acquire_async() == pytest.approx(0, abs=0.01)
+        await limiter.acquire_async()
+        start = time.monotonic()
+        waited = await limiter.acquire_async()
+        elapsed = time.monotonic() - start
+        task.cancel()
+        return waited, elapsed, ticks
+
+    waited, elapsed, ticks = asyncio.run(main())
+    assert 0.25 <= waited <= 0.6 and elapsed == pytest.approx(waited, abs=0.05)
+    assert ticks >= 10                                  # The loop kept running while it waited
+
+def test_try_acquire_full_window_and_queued_callers():
+    limiter = RateLimiter(requests_per_min=1, tokens_per_min=0)
+    assert limiter.try_acquire() == 0.0
+    assert limiter.try_acquire() > 0                    # Window full: seconds until the slot frees
+    limiter = RateLimiter(requests_per_min=60, tokens_per_min=0)
+    limiter._waiters.append((scheduler.PRIORITY_RESUME, -1))   # A blocked acquire() caller
+    assert limiter.try_acquire(priority=scheduler.PRIORITY_INTERVIEW) == scheduler.ASYNC_POLL_S
+    assert limiter.try_acquire(priority=scheduler.PRIORITY_RESUME) == scheduler.ASYNC_POLL_S
+    limiter._waiters.clear()
+    assert limiter.try_acquire(priority=scheduler.PRIORITY_INTERVIEW) == 0.0
+
+def _failing(errors, result="ok"):
+    calls = []
+    async def fn():
+        calls.append(1)
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return result
+    return fn, calls
+
+def test_call_with_retry_async_retries_transient_errors(monkeypatch):
+    monkeypatch.setattr(scheduler, "backoff_delay", lambda attempt: 0)
+    fn, calls = _failing([httpx.ConnectError("reset"), httpx.ReadTimeout("slow")])
+    stats = {}
+    assert asyncio.run(call_with_retry_async(fn, stats)) == "ok"
+    assert len(calls) == 3 and stats["retries"] == 2
+
+def test_call_with_retry_async_raises_non_retryable_at_once(monkeypatch):
+    monkeypatch.setattr(scheduler, "backoff_delay", lambda attempt: 0)
+    fn, calls = _failing([ValueError("bad request")])
+    with pytest.raises(ValueError):
+        asyncio.run(call_with_retry_async(fn, {}))
+    assert len(calls) == 1
+
+def test_call_with_retry_async_gives_up_after_max_retries(monkeypatch):
+    monkeypatch.setattr(scheduler, "backoff_delay", lambda attempt: 0)
+    fn, calls = _failing([httpx.ConnectError("down")] * 5)
+    stats = {}
+    with pytest.raises(httpx.ConnectError):
+        asyncio.run(call_with_retry_async(fn, stats, max_retries=2))
+    assert len(calls) == 3 and stats["retries"] == 2
@@ -0,0 +1,22 @@
+import json
+from batch import load_jobs
+
+def _write_jsonl(path, ids):
+    path.write_text("".join(json.dumps({"id": i, "jd": f"JD {n}"}) + "\n" for n, i in enumerate(ids)), encoding="utf-8")
+    return str(path)
+
+def test_job_ids_never_collide_with_suffixed_ids(tmp_path):
+    jobs = load_jobs(_write_jsonl(tmp_path / "jobs.jsonl", ["a", "a", "a_1", "a_1", "a"]))
+    ids = [job_id for job_id, _ in jobs]
+    assert ids == ["a", "a_1", "a_1_1", "a_1_2", "a_2"]
+    assert [text for _, text in jobs] == [f"JD {n}" for n in range(5)]
+
+def test_job_ids_are_safe_directory_names(tmp_path):
+    jobs = load_jobs(_write_jsonl(tmp_path / "jobs.jsonl", ["Acme/Backend Eng", "", "Acme_Backend_Eng"]))
+    assert [job_id for job_id, _ in jobs] == ["Acme_Backend_Eng", "job_2", "Acme_Backend_Eng_1"]
+
+def test_folder_source_skips_other_files(tmp_path):
+    (tmp_path / "b.txt").write_text("JD b", encoding="utf-8")
+    (tmp_path / "a.md").write_text("JD a", encoding="utf-8")
+    (tmp_path / "notes.pdf").write_text("x", encoding="utf-8")
+    assert load_jobs(str(tmp_path)) == [("a", "JD a"), ("b", "JD b")]
@@ -0,0 +1,61 @@
+import main1
+from src.portfolio import parse_portfolio, portfolio_for_jd
+from src.utils import estimate_tokens, truncate_to_tokens
+
+JD = "Backend role: Python, Kafka and Redis for event ingestion."
+
+def _portfolio(n):
+    entries = []
+    for i in range(n):
+        entries.append(f"""## PROJECT_ENTRY
+Name: Project {i}
+Technical Skills
+Languages: {"Python, Kafka" if i == 0 else "Haskell"}
+-- CONTENT --
+- {"Kafka event ingestion in Python" if i == 0 else "Compiler passes for a toy language"} with a long description {"x" * 200}
+""")
+    return parse_portfolio("\n".join(entries))
+
+def _prompt_tokens(jd_text, portfolio_text):
+    return estimate_tokens(main1.build_tailor_prompt(jd_text, portfolio_text))
+
+def test_truncate_to_tokens_prefers_line_break():
+    text = "first line of text\n" + "y" * 100
+    assert truncate_to_tokens(text, 100) == text
+    assert truncate_to_tokens(text, 0) == ""
+    assert truncate_to_tokens(text, 7) == "first line of text"
+
+def test_unbudgeted_is_untrimmed(monkeypatch):
+    monkeypatch.setattr(main1, "get_provider", lambda: object())
+    index = _portfolio(3)
+    assert main1.fit_to_budget(JD, index, budget=0) == (JD, portfolio_for_jd(index, JD))
+
+def test_budget_smaller_than_instructions():
+    instructions = estimate_tokens(main1.build_tailor_prompt("", ""))
+    assert main1.fit_to_budget(JD, _portfolio(3), budget=instructions) == (None, None)
+
+def test_roomy_budget_keeps_everything():
+    index = _portfolio(3)
+    full = portfolio_for_jd(index, JD)
+    jd_text, portfolio_text = main1.fit_to_budget(JD, index, budget=_prompt_tokens(JD, full) + 100)
+    assert (jd_text, portfolio_text) == (JD, full)
+
+def test_portfolio_trimmed_to_the_best_match():
+    index = _portfolio(6)
+    full = portfolio_for_jd(index, JD)
+    budget = _prompt_tokens(JD, full) - 150
+    jd_text, portfolio_text = main1.fit_to_budget(JD, index, budget=budget)
+    assert jd_text == JD
+    assert "Project 0" in portfolio_text and len(portfolio_text) < len(full)
+    assert _prompt_tokens(jd_text, portfolio_text) <= budget + 2
+
+def test_long_jd_truncated_to_its_share():
+    index = _portfolio(6)
+    long_jd = "\n".join(f"Requirement {i}: Python, Kafka and Redis experience." for i in range(400))
+    budget = estimate_tokens(main1.build_tailor_prompt("", "")) + 600
+    jd_text, portfolio_text = main1.fit_to_budget(long_jd, index, budget=budget)
+    assert long_jd.startswith(jd_text) and len(jd_text) < len(long_jd)
+    share = int(600 * main1.JD_BUDGET_SHARE)
+    assert share - 20 <= estimate_tokens(jd_text) <= share   # cut at a line break
+    assert "Project 0" in portfolio_text
+    assert _prompt_tokens(jd_text, portfolio_text) <= budget + 2
@@ -0,0 +1,44 @@
+import json
+import main1
+from bench.samples import sample_response, sample_static_data
+from src.interview_agent import build_interview_prompt, compact_resume
+
+RESUME = {
+    "experience": [{
+        "role": "Software Engineer Intern", "company": "Acme Corp", "dates": "2024", "location": "",
+        "bullets": ["Built a Kafka service handling 2M events/day", "Cut p99 latency by 40% with C++ & Redis"],
+    }],
+    "projects": [{"name": "RAG Search", "tech_stack": "Python, FAISS", "bullets": ["Search over 10k PDFs"]}],
+    "skills": {"Languages": "Python, Go", "Tools": ""},
+}
+
+def test_text_format_is_terse_lines():
+    assert compact_resume(RESUME, "text") == "\n".join([
+        "EXPERIENCE",
+        "- Software Engineer Intern | Acme Corp | 2024",
+        "  * Built a Kafka service handling 2M events/day",
+        "  * Cut p99 latency by 40% with C++ & Redis",
+        "PROJECTS",
+        "- RAG Search | Python, FAISS",
+        "  * Search over 10k PDFs",
+        "SKILLS",
+        "- Languages: Python, Go",
+    ])
+
+def test_missing_sections_are_skipped():
+    assert compact_resume({"projects": [{"name": "Solo"}]}, "text") == "PROJECTS\n- Solo"
+    assert compact_resume({}, "text") == ""
+
+def test_json_formats_round_trip():
+    assert json.loads(compact_resume(RESUME, "json")) == RESUME
+    assert json.loads(compact_resume(RESUME, "pretty")) == RESUME
+    assert len(compact_resume(RESUME, "json")) < len(compact_resume(RESUME, "pretty"))
+
+def test_prompt_gets_plain_text_not_latex():
+    response = sample_response()
+    response["resume"]["experience"][0]["bullets"][0] = "Cut p99 latency by 40% with C++ & Redis"
+    prepared = main1.prepare_resume(response, sample_static_data())
+    assert "40\\%" in prepared["final_data"]["experience"][0]["bullets"][0]   # The PDF copy is escaped...
+    prompt = build_interview_prompt("JD text", prepared["plain_data"])
+    assert "40% with C++ & Redis" in prompt   # ...the interview prompt is not
+    assert "\\%" not in prompt and "\\&" not in prompt
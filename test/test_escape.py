@@ -0,0 +1,76 @@
+"""The single-pass escaper against the original regex + str.replace implementation."""
+import pytest
+import main1
+from src.resume_builder import clean_text
+from bench.bench_sanitize import (check_equivalence, legacy_clean_text, legacy_escape_latex_chars,
+                                  legacy_recursive_sanitize, _corpus)
+
+EDGE_CASES = [
+    "", "plain text", "C:\\path\\to\\file", "a \\ b", "~/home", "x^2", "93%", "#1 ranked", "R&D",
+    "snake_case_name", "{braces}", "}{", "<50ms> latency", "$5M ARR", "**bold** and *italic*",
+    "***", "line\nbreak\r\n", "  padded  ", "\\&", "\\%", "\\_", "\\{\\}", "\\textasciitilde{}",
+    "$<$ already $>$", "mixed \\\\ ~ ^ % # & _ { } < > $ *",
+]
+
+@pytest.mark.parametrize("text", EDGE_CASES)
+def test_escape_matches_legacy(text):
+    assert main1.escape_latex_chars(text) == legacy_escape_latex_chars(text)
+
+@pytest.mark.parametrize("text", EDGE_CASES)
+def test_fused_sanitize_matches_legacy_two_passes(text):
+    assert main1.recursive_sanitize(text, flatten=True) == legacy_clean_text(legacy_escape_latex_chars(text))
+    assert clean_text(text) == legacy_clean_text(text)
+
+def test_non_strings_pass_through():
+    data = {"n": 3, "f": 1.5, "none": None, "flag": True, "list": [1, "a&b", {"k": "50%"}]}
+    assert main1.recursive_sanitize(data) == legacy_recursive_sanitize(data)
+
+def test_random_strings_match_legacy():
+    check_equivalence(5000)
+
+def test_sample_corpus_matches_legacy():
+    for doc in _corpus(50):
+        assert main1.recursive_sanitize(doc, flatten=True) == legacy_clean_text(legacy_recursive_sanitize(doc))
+
+def _legacy_escape_resume(data):
+    # escape_resume before it was fused: selected fields escaped, then clean_text over everything
+    esc = legacy_escape_latex_chars
+    def entry(item, fields):
+        item = {**item, **{f: esc(item.get(f, '')) for f in fields}}
+        if isinstance(item.get('bullets'), list):
+            item['bullets'] = [esc(b) for b in item['bullets']]
+        return item
+    escaped = dict(data)
+    escaped['experience'] = [entry(e, ('company', 'role', 'location')) for e in data.get('experience', [])]
+    escaped['projects'] = [entry(p, ('name', 'tech_stack')) for p in data.get('projects', [])]
+    if 'skills' in data:
+        escaped['skills'] = {k: esc(v) if isinstance(v, str) else v for k, v in data['skills'].items()}
+    return legacy_clean_text(escaped)
+
+def _resumes():
+    from bench.samples import sample_response
+    for seed in range(20):
+        yield main1.clean_skills(main1.layout_check(main1.normalize_keys(sample_response(seed)["resume"])))
+    yield {
+        "summary": "Builds R&D tools\nfor 50% less",
+        "experience": [{"company": "A&B\nCorp ", "role": " SWE_2 ", "dates": "2023 -\n2024", "bullets": ["x^2 ~ y", "a\r\nb"]},
+                       {"role": "No company", "bullets": "one string bullet with 5% and\nnewline"}],
+        "projects": [{"name": "**Proj** #1", "tech_stack": "C#, {Go}", "link": "http://x/a_b", "bullets": []},
+                     {"name": "Bare"}],
+        "skills": {"languages": "C++, C#", "tools": ["Git", "Make\n"], "other": None},
+    }
+
+def test_fused_resume_escape_matches_two_passes():
+    for data in _resumes():
+        assert main1.escape_resume(data, flatten=True) == _legacy_escape_resume(data)
+        assert main1.escape_resume(data, flatten=True) == clean_text(main1.escape_resume(data))
+
+def test_prepare_resume_final_data_is_escaped_and_flat():
+    from bench.samples import sample_response, sample_static_data
+    static = sample_static_data()
+    for seed in range(5):
+        response = sample_response(seed)
+        plain = main1.clean_skills(main1.layout_check(main1.normalize_keys(sample_response(seed)["resume"])))
+        final = main1.prepare_resume(response, static)["final_data"]
+        expected = {**legacy_clean_text(legacy_recursive_sanitize(static["contact_info"])), **_legacy_escape_resume(plain)}
+        assert {k: final[k] for k in expected} == expected
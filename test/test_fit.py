@@ -0,0 +1,81 @@
+import pytest
+from src import fit
+
+JD = set(fit.tokenize("Python Kafka streaming pipelines on AWS"))
+
+def _resume(entries=3, bullets=4, words=20):
+    filler = " ".join(["lorem"] * words)
+    return {
+        "education": [{"bullets": []}],
+        "experience": [{"company": f"Co{i}", "bullets": [f"Bullet {j} {filler}" for j in range(bullets)]}
+                       for i in range(entries)],
+        "projects": [{"name": f"P{i}", "tech_stack": "Python, Go, Rust, Kafka, Redis",
+                      "bullets": [f"Project bullet {j} {filler}" for j in range(bullets)]} for i in range(entries)],
+        "skills": {"languages": "Python, Go", "tools": "Git", "frameworks": "FastAPI"},
+    }
+
+def test_estimate_grows_with_content_and_wraps_long_bullets():
+    assert fit._lines("short bullet") == 1
+    assert fit._lines(" ".join(["word"] * 200)) > 3
+    small, large = fit.estimate_height(_resume(1, 1)), fit.estimate_height(_resume(6, 6))
+    assert small < large
+    assert fit.estimate_pages(_resume(1, 1)) == 1
+    assert fit.estimate_pages(_resume(8, 8, words=40)) > 1
+
+def test_text_width_reads_through_latex_escapes():
+    assert fit.unescape(r"93\% R\&D \textasciitilde{} $<$") == "93% R&D ~ <"
+    assert fit.text_width(r"50\%") == fit.text_width("50%")
+
+def test_trim_order_least_relevant_bullet_then_stack():
+    data = {"experience": [{"company": "A", "bullets": ["Built Kafka streaming pipelines in Python",
+                                                        "Organized the office party", "Ran the team offsite"]}],
+            "projects": [{"name": "P", "tech_stack": "Python, Go, Rust, Kafka, Redis", "bullets": ["Only bullet"]}]}
+    cuts = [fit.trim_once(data, JD) for _ in range(2)]
+    assert cuts == ["bullet: A #3", "bullet: A #2"]      # Ties go to the later bullet
+    assert data["experience"][0]["bullets"] == ["Built Kafka streaming pipelines in Python"]
+    assert fit.trim_once(data, JD) == "stack: P"          # MIN_BULLETS reached, stacks next
+    assert data["projects"][0]["tech_stack"] == "Python, Go, Rust, Kafka"
+    assert fit.trim_once(data, JD) == "stack: P"
+    assert fit.trim_once(data, JD) is None                # MIN_STACK_ITEMS reached
+
+class FakeBuild:
+    """Stands in for build_pdf: reports `pages(data)` pages and counts calls."""
+    def __init__(self, pages):
+        self.pages, self.calls = pages, 0
+
+    def __call__(self, data, output_filename, report, **kwargs):
+        self.calls += 1
+        report["pages"] = self.pages(data)
+        return output_filename
+
+def test_estimate_only_fit_compiles_once(monkeypatch):
+    build = FakeBuild(lambda data: 1)
+    monkeypatch.setattr(fit, "build_pdf", build)
+    data = _resume(2, 6, words=25)
+    before = fit.estimate_height(data)
+    path, info = fit.build_fitted(data, "out.pdf", jd_text="Python Kafka")
+    assert before > fit.PAGE_HEIGHT_PT
+    assert (path, build.calls, info["compiles"], info["pages"], info["predicted_pages"]) == ("out.pdf", 1, 1, 1, 1)
+    assert info["trims"] and all(cut.startswith("bullet:") for cut in info["trims"])
+    assert fit.estimate_height(data) == before           # The caller's data is untouched
+
+def test_rebuild_stops_at_max_compiles(monkeypatch):
+    build = FakeBuild(lambda data: 2)
+    monkeypatch.setattr(fit, "build_pdf", build)
+    path, info = fit.build_fitted(_resume(2, 4, words=5), "out.pdf")
+    assert build.calls == info["compiles"] == fit.MAX_COMPILES
+    assert info["pages"] == 2 and len(info["trims"]) <= fit.MAX_TRIMS
+
+def test_rebuild_stops_when_nothing_left_to_trim(monkeypatch):
+    build = FakeBuild(lambda data: 2)
+    monkeypatch.setattr(fit, "build_pdf", build)
+    data = _resume(1, 1)
+    data["projects"][0]["tech_stack"] = "Python, Go"
+    path, info = fit.build_fitted(data, "out.pdf")
+    assert (build.calls, info["trims"]) == (1, [])
+
+def test_rebuild_when_estimate_was_optimistic(monkeypatch):
+    build = FakeBuild(lambda data: 2 if sum(len(e["bullets"]) for e in data["experience"]) > 6 else 1)
+    monkeypatch.setattr(fit, "build_pdf", build)
+    path, info = fit.build_fitted(_resume(3, 4), "out.pdf")
+    assert info["pages"] == 1 and 1 < info["compiles"] <= fit.MAX_COMPILES
@@ -0,0 +1,143 @@
+import json
+import pytest
+from src import jd
+
+RUN_TOGETHER = """Senior Backend Engineer
+
+About us:
+We are a fast-growing fintech with offices in five countries.
+Responsibilities:
+- Build payment APIs in Go
+- Own on-call for the ledger service
+Requirements:
+- 5+ years of Python or Go
+- Postgres and Kafka in production"""
+
+SENTENCE_CASE = """Backend Engineer at Foo
+
+Benefits
+- Unlimited PTO
+- Free lunch and a gym stipend
+
+What you'll do
+- Design streaming pipelines with Flink
+- Mentor junior engineers
+
+Equal opportunity employer. We hire without regard to race, religion or age."""
+
+def test_about_us_ends_at_next_heading_without_blank_line():
+    cleaned = jd.clean_jd(RUN_TOGETHER)
+    assert "fintech" not in cleaned
+    for line in ("Responsibilities:", "- Build payment APIs in Go", "Requirements:", "- Postgres and Kafka in production"):
+        assert line in cleaned
+
+def test_sentence_case_heading_ends_benefits():
+    cleaned = jd.clean_jd(SENTENCE_CASE)
+    assert "Unlimited PTO" not in cleaned and "without regard" not in cleaned
+    assert "What you'll do\n- Design streaming pipelines with Flink\n- Mentor junior engineers" in cleaned
+
+@pytest.mark.parametrize("heading", ["What you'll bring", "WHAT YOU WILL DO", "## the role", "Who You Are", "Nice to have:"])
+def test_role_headings_end_a_skipped_section(heading):
+    text = f"Title\n\nPerks & Benefits\n- Snacks\n{heading}\n- Kubernetes operators in Go\n- Terraform"
+    cleaned = jd.clean_jd(text)
+    assert "Snacks" not in cleaned
+    assert "- Kubernetes operators in Go" in cleaned
+
+def test_eeo_sentence_only_drops_itself():
+    text = ("Platform Engineer\n\nResponsibilities:\n- Run Kubernetes clusters on GCP\n- Write Terraform modules\n"
+            "- Build CI pipelines in GitHub Actions\nWe are an equal opportunity employer. Apply by Friday.")
+    cleaned = jd.clean_jd(text)
+    for line in ("- Run Kubernetes clusters on GCP", "- Write Terraform modules", "- Build CI pipelines in GitHub Actions"):
+        assert line in cleaned
+    assert "equal opportunity" not in cleaned
+    assert cleaned.endswith("Apply by Friday.")
+
+def test_title_case_perks_stay_in_benefits():
+    text = ("Backend Engineer\n\nRequirements:\n- Go and gRPC services\n- Postgres schema design\n"
+            "- Observability with Prometheus\n\nBenefits\nHealth Insurance\nUnlimited PTO\n401k Matching\n"
+            "Team Offsites\nWhat you'll do:\n- Own the billing service")
+    cleaned = jd.clean_jd(text)
+    for perk in ("Health Insurance", "Unlimited PTO", "401k Matching", "Team Offsites"):
+        assert perk not in cleaned
+    assert "- Postgres schema design" in cleaned and "What you'll do:\n- Own the billing service" in cleaned
+
+@pytest.mark.parametrize("title", ["Legal Counsel", "Benefits Platform Engineer", "Compensation Analyst", "Privacy Engineer"])
+def test_role_titles_are_not_boilerplate_headings(title):
+    text = f"{title}\nRemote, full time\n\nResponsibilities:\n- Ship features weekly\n- Review designs"
+    assert jd.clean_jd(text).startswith(f"{title}\nRemote, full time")
+
+def test_about_the_role_is_kept():
+    text = "About the role:\nYou will build search ranking with Elasticsearch and learning to rank."
+    assert jd.clean_jd(text) == text
+
+def test_bullets_are_not_headings():
+    skills = "Skills:\n- Python and Django\n- Postgres query tuning\n- AWS Lambda and SQS"
+    text = f"About us:\nWe sell shoes online.\n- Free shipping\n- Great Culture\n\n{skills}"
+    assert jd.clean_jd(text) == skills
+
+def test_mostly_boilerplate_is_kept_whole():
+    text = "Benefits:\n" + "\n".join(f"- Perk number {i}" for i in range(20)) + "\nSkills:\n- Go"
+    assert jd.clean_jd(text) == jd.normalize_whitespace(text)
+
+def test_off_switch(monkeypatch):
+    assert jd.clean_jd(RUN_TOGETHER, strip=False) == RUN_TOGETHER
+    monkeypatch.setattr(jd, "STRIP_BOILERPLATE", False)
+    assert jd.clean_jd(SENTENCE_CASE) == jd.normalize_whitespace(SENTENCE_CASE)
+    assert "Unlimited PTO" not in jd.clean_jd(SENTENCE_CASE, strip=True)
+
+def test_normalize_whitespace():
+    assert jd.normalize_whitespace("  a​  b \n\n\n\n c d ") == "a b\n\nc d"
+
+POSTING = """Senior Data Engineer, Payments Platform
+
+Responsibilities:
+- Design and operate batch and streaming pipelines on Spark, Flink and Kafka
+- Model the ledger and settlement data in dbt and Snowflake
+- Build data quality checks, lineage and alerting for finance reporting
+- Partner with analysts and product managers on metric definitions
+- Lead design reviews and mentor two junior engineers
+
+Requirements:
+- 5+ years of data engineering with Python and SQL
+- Production experience with Airflow or Dagster orchestration
+- Strong understanding of distributed systems and data modeling
+- Experience with AWS (S3, EMR, Glue) and Terraform"""
+
+def test_simhash_near_duplicates_are_close():
+    body = jd.clean_jd(POSTING)
+    copy = body.replace("Lead design", "Run design") + "\nPosted 3 days ago"
+    other = jd.clean_jd(RUN_TOGETHER + "\n" + SENTENCE_CASE)
+    assert jd.simhash(body) == jd.simhash(body)
+    assert jd.distance(jd.simhash(body), jd.simhash(copy)) <= jd.MAX_DISTANCE
+    assert jd.distance(jd.simhash(body), jd.simhash(other)) > jd.MAX_DISTANCE
+
+def test_distance_counts_differing_bits():
+    assert jd.distance(0b1011, 0b0001) == 2
+    assert jd.distance(5, 5) == 0
+
+def _lines(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read().splitlines()
+
+def test_index_replaces_entry_for_same_job(tmp_path):
+    path = str(tmp_path / "jd_index.jsonl")
+    index = jd.JdIndex(path)
+    index.add(0b1111, "job_a", {"n": 1})
+    index.add(0b1111 << 20, "job_b", {"n": 2})
+    for n in range(3, 6):
+        index.add(0b1110, "job_a", {"n": n})
+    assert len(_lines(path)) == 2
+    assert index.find(0b1111)["result"] == {"n": 5}
+    assert index.find(0b1111, where=lambda e: e["result"]["n"] == 1) is None
+
+    reloaded = jd.JdIndex(path)
+    assert [e["job_id"] for e in reloaded.entries.values()] == ["job_b", "job_a"]
+    assert reloaded.find(0b1110)["result"] == {"n": 5}
+
+def test_index_compacts_file_on_load(tmp_path):
+    path = tmp_path / "jd_index.jsonl"
+    entries = [{"simhash": 7, "job_id": "a", "created": 0, "result": {"n": n}} for n in range(4)]
+    path.write_text("".join(json.dumps(e) + "\n" for e in entries) + '{"simhash": 7, "job', encoding="utf-8")
+    index = jd.JdIndex(str(path))
+    assert len(index.entries) == 1
+    assert [json.loads(line)["result"] for line in _lines(path)] == [{"n": 3}]
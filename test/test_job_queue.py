@@ -0,0 +1,79 @@
+import socket
+import subprocess
+import sys
+import time
+import pytest
+from src import job_queue
+from src.job_queue import JobQueue, STAGE_LLM, STAGE_LATEX, DONE, FAILED
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(str(tmp_path / "jobs.sqlite3"))
+
+def test_claim_is_exclusive_and_in_order(queue):
+    queue.submit("a", "JD a", ["pdf"])
+    time.sleep(0.01)
+    queue.submit("b", "JD b", ["md"])
+    first = queue.claim(STAGE_LLM, "w1")
+    second = queue.claim(STAGE_LLM, "w2")
+    assert (first["id"], first["formats"], first["attempts"]) == ("a", ["pdf"], 1)
+    assert second["id"] == "b"
+    assert queue.claim(STAGE_LLM, "w3") is None
+    assert queue.claim(STAGE_LATEX, "w3") is None
+    assert queue.counts()["leased"] == 2
+
+def test_advance_then_finish(queue):
+    queue.submit("a", "JD", ["pdf"])
+    queue.claim(STAGE_LLM, "w1")
+    assert queue.advance("a", "w1", STAGE_LATEX, {"tex": "x"})
+    job = queue.claim(STAGE_LATEX, "w2")
+    assert (job["payload"], job["attempts"]) == ({"tex": "x"}, 1)
+    assert queue.finish("a", "w2", {"pdf": "out.pdf"})
+    job = queue.get("a")
+    assert (job["stage"], job["result"], job["payload"], job["lease_owner"]) == (DONE, {"pdf": "out.pdf"}, None, None)
+
+def test_expired_lease_is_reclaimed_and_old_owner_fenced(queue):
+    queue.submit("a", "JD", ["pdf"])
+    queue.claim(STAGE_LLM, "slow", lease_s=0.05)
+    assert queue.claim(STAGE_LLM, "fast") is None
+    time.sleep(0.1)
+    job = queue.claim(STAGE_LLM, "fast")
+    assert (job["id"], job["attempts"]) == ("a", 2)
+    assert not queue.renew("a", "slow")
+    assert not queue.advance("a", "slow", STAGE_LATEX, {})
+    assert queue.get("a")["stage"] == STAGE_LLM
+    assert queue.advance("a", "fast", STAGE_LATEX, {})
+
+def test_retry_until_failed(queue, monkeypatch):
+    monkeypatch.setattr(job_queue, "MAX_ATTEMPTS", 2)
+    queue.submit("a", "JD", ["pdf"])
+    queue.claim(STAGE_LLM, "w1")
+    assert queue.retry("a", "w1", "boom", delay_s=0.05)
+    assert queue.claim(STAGE_LLM, "w1") is None
+    time.sleep(0.1)
+    queue.claim(STAGE_LLM, "w1")
+    assert queue.retry("a", "w1", "boom again", delay_s=0)
+    assert queue.claim(STAGE_LLM, "w1") is None
+    job = queue.get("a")
+    assert (job["stage"], job["error"], job["attempts"]) == (FAILED, "boom again", 2)
+
+def test_submit_requeues_only_finished_jobs(queue):
+    assert queue.submit("a", "JD", ["pdf"])
+    assert not queue.submit("a", "JD v2", ["pdf"])
+    queue.claim(STAGE_LLM, "w1")
+    assert not queue.submit("a", "JD v2", ["pdf"])
+    queue.finish("a", "w1", {})
+    assert queue.submit("a", "JD v2", ["md"])
+    job = queue.get("a")
+    assert (job["stage"], job["jd"], job["formats"], job["attempts"], job["result"]) == (STAGE_LLM, "JD v2", ["md"], 0, None)
+
+def test_recover_releases_leases_of_dead_processes(queue):
+    dead = subprocess.Popen([sys.executable, "-c", "pass"])
+    dead.wait()
+    queue.submit("dead", "JD", ["pdf"])
+    queue.submit("alive", "JD", ["pdf"])
+    host = socket.gethostname()
+    queue.claim(STAGE_LLM, f"{host}:{dead.pid}:w1")
+    queue.claim(STAGE_LLM, job_queue.make_owner("w2"))
+    assert queue.recover() == ["dead"]
+    assert queue.claim(STAGE_LLM, "w3")["id"] == "dead"
@@ -0,0 +1,137 @@
+import copy
+import json
+import os
+import hashlib
+import pytest
+import main1
+from src import interview_agent, job_state
+from src.portfolio import MAX_PROJECTS, parse_portfolio
+from bench.samples import sample_response, sample_static_data
+
+JD = "Backend engineer: Kafka streaming pipelines in Python."
+MATCHED = "## PROJECT_ENTRY\nName: Stream {n}\n- Kafka streaming pipeline number {n} in Python"
+UNMATCHED = "## PROJECT_ENTRY\nName: Pixel Art Editor\n- A React canvas editor with undo history"
+
+def portfolio(matched_edit="", unmatched_edit=""):
+    # MAX_PROJECTS Kafka projects plus one that shares no term with the JD, so BM25
+    # (top MAX_PROJECTS) always leaves the unmatched one out of the prompt
+    entries = [MATCHED.format(n=n) + (matched_edit if n == 0 else "") for n in range(MAX_PROJECTS)]
+    text = "\n\n".join(entries + [UNMATCHED + unmatched_edit])
+    index = parse_portfolio(text)
+    index["sha256"] = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return index
+
+class FakeProvider:
+    name, model, prefix_cache = "fake", "fake-model", False
+
+class Calls:
+    def __init__(self):
+        self.tailor = self.pdf = self.interview = 0
+
+@pytest.fixture
+def job(tmp_path, monkeypatch):
+    calls = Calls()
+
+    def tailor(jd_text, portfolio_text, on_section=None, shortlist=None):
+        calls.tailor += 1
+        return copy.deepcopy(sample_response(0))
+
+    def build_pdf(data, output_filename, **kwargs):
+        calls.pdf += 1
+        with open(output_filename, "w") as f: f.write("%PDF")
+        return output_filename
+
+    def interview(jd_text, plain_data, base_name, output_dir, stream=False):
+        calls.interview += 1
+        os.makedirs(output_dir, exist_ok=True)
+        path = os.path.join(output_dir, f"{base_name}.md")
+        with open(path, "w") as f: f.write("guide")
+        return path
+
+    monkeypatch.setattr(main1, "get_provider", lambda: FakeProvider())
+    monkeypatch.setattr(main1, "TOKEN_BUDGET", 0)
+    monkeypatch.setattr(main1, "analyze_and_tailor", tailor)
+    monkeypatch.setattr(main1, "build_pdf", build_pdf)
+    monkeypatch.setattr(interview_agent, "generate_interview_guide", interview)
+    monkeypatch.setattr(job_state, "REBUILD", False)
+    out = str(tmp_path / "out")
+
+    def run(index=None, static=None):
+        return main1.run_job(JD, index or portfolio(), static or sample_static_data(), output_dir=out,
+                             prep_dir=str(tmp_path / "prep"), stream=False, overlap=False,
+                             formats=["pdf", "md"], incremental=True)
+    run.calls, run.out = calls, out
+    return run
+
+def _counts(run):
+    return run.calls.tailor, run.calls.pdf, run.calls.interview
+
+def test_unchanged_rerun_reuses_everything(job):
+    first = job()
+    assert first["error"] is None and _counts(job) == (1, 1, 1)
+    second = job()
+    assert _counts(job) == (1, 1, 1)
+    assert sorted(second["reused"]) == ["interview", "pdf", "render.md", "tailor"]
+    assert second["outputs"] == first["outputs"]
+
+def test_static_data_edit_rebuilds_outputs_but_keeps_response(job):
+    job()
+    static = sample_static_data()
+    static["education"][0]["degree"] = "MSc Computer Science"
+    result = job(static=static)
+    assert _counts(job) == (1, 2, 1)
+    assert "tailor" in result["reused"] and "pdf" not in result["reused"]
+    assert "render.md" not in result["reused"]
+
+def test_unmatched_portfolio_edit_keeps_response(job):
+    job()
+    result = job(portfolio(unmatched_edit="\n- Added a palette picker"))
+    assert _counts(job) == (1, 1, 1)
+    assert "tailor" in result["reused"]
+
+def test_matched_portfolio_edit_retailors(job):
+    job()
+    result = job(portfolio(matched_edit="\n- Exactly-once Kafka sinks"))
+    assert job.calls.tailor == 2
+    assert "tailor" not in result["reused"]
+
+def test_deleted_output_is_rebuilt(job):
+    first = job()
+    os.remove(first["pdf_path"])
+    os.remove(first["outputs"]["md"])
+    result = job()
+    assert _counts(job) == (1, 2, 1)
+    assert os.path.exists(first["pdf_path"]) and os.path.exists(first["outputs"]["md"])
+    assert "pdf" not in result["reused"] and "render.md" not in result["reused"]
+
+def test_rebuild_ignores_recorded_state(job, monkeypatch):
+    job()
+    monkeypatch.setattr(job_state, "REBUILD", True)
+    result = job()
+    assert _counts(job) == (2, 2, 2) and result["reused"] == []
+    monkeypatch.setattr(job_state, "REBUILD", False)
+    assert job()["reused"]                                  # It recorded afresh
+
+def test_other_state_version_is_discarded(job):
+    job()
+    path = os.path.join(job.out, job_state.STATE_FILENAME)
+    with open(path) as f:
+        stored = json.load(f)
+    assert stored["version"] == job_state.STATE_VERSION and "tailor" in stored["stages"]
+    stored["version"] = job_state.STATE_VERSION + 1
+    with open(path, "w") as f:
+        json.dump(stored, f)
+    assert job_state.JobState(path).stages == {}
+    result = job()
+    assert _counts(job) == (2, 2, 2) and result["reused"] == []
+
+def test_fresh_checks_inputs_and_paths(tmp_path):
+    state = job_state.JobState(str(tmp_path / "state.json"))
+    existing = tmp_path / "a.pdf"
+    existing.write_text("x")
+    state.record("pdf", "abc", fit=None)
+    assert state.fresh("pdf", "abc", [str(existing)])["inputs"] == "abc"
+    assert state.fresh("pdf", "other", [str(existing)]) is None
+    assert state.fresh("pdf", "abc", [str(tmp_path / "missing.pdf")]) is None
+    assert state.fresh("tailor", "abc") is None
+    assert job_state.digest({"a": 1, "b": 2}) == job_state.digest({"b": 2, "a": 1})
@@ -0,0 +1,53 @@
+import json
+import pytest
+from src import interview_agent
+from src.json_stream import JsonStreamParser
+
+DOC = {
+    "META": {"company": "Acme", "role": "SWE"},
+    "resume": {
+        "experience": [{"company": "A", "bullets": ["x \"quoted\" {brace}", "y"]}],
+        "projects": [{"name": "P1", "bullets": ["[not an array]"]}, {"name": "P2", "bullets": []}],
+    },
+}
+WATCH = [("meta",), ("resume", "experience", "*"), ("resume", "projects", "*")]
+
+def _parse(text, chunk_size):
+    items = []
+    parser = JsonStreamParser(WATCH, lambda path, value: items.append((path, value)))
+    for i in range(0, len(text), chunk_size):
+        parser.feed(text[i:i + chunk_size])
+    return parser.close(), items
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 17, 10_000])
+def test_items_reported_once_whatever_the_chunking(chunk_size):
+    text = "```json\n" + json.dumps(DOC, indent=2) + "\n```"
+    data, items = _parse(text, chunk_size)
+    assert data == DOC
+    assert items == [(("meta",), DOC["META"]),
+                     (("resume", "experience", 0), DOC["resume"]["experience"][0]),
+                     (("resume", "projects", 0), DOC["resume"]["projects"][0]),
+                     (("resume", "projects", 1), DOC["resume"]["projects"][1])]
+
+def test_item_is_reported_before_the_document_ends():
+    items = []
+    parser = JsonStreamParser(WATCH, lambda path, value: items.append(path))
+    text = json.dumps(DOC)
+    parser.feed(text[:text.index('"projects"')])
+    assert items == [("meta",), ("resume", "experience", 0)]
+
+def test_truncated_stream_fails_on_close():
+    parser = JsonStreamParser(WATCH, lambda path, value: None)
+    parser.feed(json.dumps(DOC)[:-5])
+    with pytest.raises(json.JSONDecodeError):
+        parser.close()
+
+def test_failed_stream_leaves_no_part_file(tmp_path, monkeypatch):
+    def broken_stream(prompt, base_filename, part_path):
+        with open(part_path, "w", encoding='utf-8') as f:
+            f.write("half a guide")
+        return None
+    monkeypatch.setattr(interview_agent, "_stream_guide", broken_stream)
+    path = interview_agent.generate_interview_guide("jd", {}, "Job", output_dir=str(tmp_path), stream=True)
+    assert path is None
+    assert list(tmp_path.iterdir()) == []
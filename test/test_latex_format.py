@@ -0,0 +1,15 @@
+from src import latex_format
+
+TEX = "\\documentclass{article}\n\\usepackage{amsmath}\n\\begin{document}\nHi\n\\end{document}\n"
+
+def test_missing_compiler_falls_back_to_cold_compile(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(latex_format, "FORMAT_DIR", str(tmp_path))
+    compiler = "no-such-pdflatex"
+    assert latex_format.prepare(TEX, compiler) == (TEX, [], None)
+    assert latex_format.prepare(TEX, compiler) == (TEX, [], None)
+    assert capsys.readouterr().out.count(f"Could not run {compiler}") == 1
+
+def test_split_for_dump_keeps_body():
+    dumped, marked = latex_format.split_for_dump(TEX)
+    assert dumped.endswith("\\usepackage{amsmath}")
+    assert latex_format.DUMP_MARKER in marked and marked.endswith("\\end{document}\n")
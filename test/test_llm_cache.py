@@ -0,0 +1,40 @@
+import json
+import os
+import time
+import pytest
+from src import llm_cache
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(llm_cache, "CACHE_DIR", str(tmp_path))
+
+def _age(key, seconds):
+    path = llm_cache._path(key)
+    with open(path, encoding='utf-8') as f:
+        entry = json.load(f)
+    entry["created"] = time.time() - seconds
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(entry, f)
+
+def test_round_trip():
+    llm_cache.put("ab01", '{"a": 1}')
+    assert llm_cache.get("ab01") == '{"a": 1}'
+
+def test_expires_on_created_even_when_hit():
+    llm_cache.put("ab02", "text")
+    _age("ab02", llm_cache.MAX_AGE_SECONDS + 60)
+    os.utime(llm_cache._path("ab02"))       # A recent hit must not keep it alive
+    assert llm_cache.get("ab02") is None
+    assert not os.path.exists(llm_cache._path("ab02"))
+
+def test_hit_refreshes_lru_order():
+    llm_cache.put("ab03", "x" * 100)
+    llm_cache.put("ab04", "y" * 100)
+    past = time.time() - 1000
+    os.utime(llm_cache._path("ab03"), (past, past))
+    os.utime(llm_cache._path("ab04"), (past - 10, past - 10))
+    assert llm_cache.get("ab04") == "y" * 100
+    size = os.path.getsize(llm_cache._path("ab04"))
+    llm_cache.evict(max_bytes=size)
+    assert llm_cache.get("ab03") is None
+    assert llm_cache.get("ab04") == "y" * 100
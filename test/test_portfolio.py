@@ -0,0 +1,87 @@
+import os
+from src.portfolio import load_portfolio_index, parse_portfolio, portfolio_for_jd, render_portfolio, select_entries
+
+PORTFOLIO = """# Om Asanani
+Summary: Backend engineer.
+
+## EXPERIENCE_ENTRY
+Company: Acme Corp
+Role: Software Engineer Intern
+Technical Skills
+Languages: Python, Go
+-- CONTENT --
+- Built a Kafka ingestion service handling 2M events/day
+- Cut p99 latency by 40% with Redis caching
+
+## PROJECT_ENTRY
+Name: RAG Search
+Type: Personal
+Content:
+- Retrieval-augmented search over PDFs with FAISS and LangChain
+
+## PROJECT_ENTRY
+Name: Pixel Art Editor
+- A React canvas editor with undo history
+"""
+
+def test_parse_entries_fields_skills_and_content():
+    index = parse_portfolio(PORTFOLIO)
+    assert index["preamble"].startswith("# Om Asanani")
+    assert [(e["kind"], e["name"]) for e in index["entries"]] == [
+        ("experience", "Acme Corp"), ("project", "RAG Search"), ("project", "Pixel Art Editor")]
+    acme = index["entries"][0]
+    assert acme["fields"]["role"] == "Software Engineer Intern"
+    assert acme["skills"] == {"Languages": "Python, Go"}
+    assert acme["content"] == ["Built a Kafka ingestion service handling 2M events/day",
+                               "Cut p99 latency by 40% with Redis caching"]
+    assert index["entries"][2]["content"] == ["A React canvas editor with undo history"]
+
+def test_entry_ids_are_stable_and_content_addressed():
+    first, second = parse_portfolio(PORTFOLIO), parse_portfolio(PORTFOLIO)
+    assert [e["id"] for e in first["entries"]] == [e["id"] for e in second["entries"]]
+    changed = parse_portfolio(PORTFOLIO.replace("undo history", "redo history"))
+    assert changed["entries"][2]["id"] != first["entries"][2]["id"]
+    assert changed["entries"][1]["id"] == first["entries"][1]["id"]
+
+def test_no_headers_keeps_everything_as_preamble():
+    index = parse_portfolio("Just a resume dump\nwith no entry headers")
+    assert index["entries"] == [] and portfolio_for_jd(index, "python") == "Just a resume dump\nwith no entry headers"
+
+def test_render_round_trips_every_entry():
+    index = parse_portfolio(PORTFOLIO)
+    assert parse_portfolio(render_portfolio(index))["entries"] == index["entries"]
+
+def test_select_keeps_relevant_entries_in_portfolio_order():
+    index = parse_portfolio(PORTFOLIO)
+    picked = select_entries(index, "FAISS retrieval search engineer", max_projects=1)
+    assert [e["name"] for e in picked] == ["Acme Corp", "RAG Search"]
+
+def test_index_is_reused_until_the_file_changes(tmp_path):
+    path, index_path = tmp_path / "portfolio.md", str(tmp_path / "index.json")
+    path.write_text(PORTFOLIO, encoding="utf-8")
+    first = load_portfolio_index(str(path), index_path)
+    assert load_portfolio_index(str(path), index_path)["sha256"] == first["sha256"]
+    path.write_text(PORTFOLIO + "\n## PROJECT_ENTRY\nName: New One\n- Fresh\n", encoding="utf-8")
+    os.utime(path, ns=(first["mtime_ns"] + 10**9, first["mtime_ns"] + 10**9))
+    assert [e["name"] for e in load_portfolio_index(str(path), index_path)["entries"]][-1] == "New One"
+
+def test_bm25_index_cached_by_content_not_identity(monkeypatch):
+    from src import retrieval
+    monkeypatch.setattr(retrieval, "_indexes", retrieval.OrderedDict())
+    first = retrieval.get_bm25_index(parse_portfolio(PORTFOLIO))
+    # A fresh parse of the same text reuses the index even though it's a new dict
+    assert retrieval.get_bm25_index(parse_portfolio(PORTFOLIO)) is first
+    other = parse_portfolio(PORTFOLIO.replace("FAISS", "Qdrant"))
+    assert retrieval.get_bm25_index(other) is not first
+
+def test_bm25_index_cache_is_bounded(monkeypatch):
+    from src import retrieval
+    monkeypatch.setattr(retrieval, "_indexes", retrieval.OrderedDict())
+    monkeypatch.setattr(retrieval, "MAX_INDEXES", 2)
+    a, b, c = (parse_portfolio(PORTFOLIO.replace("Redis", name)) for name in ("Memcached", "Valkey", "KeyDB"))
+    first = retrieval.get_bm25_index(a)
+    retrieval.get_bm25_index(b)
+    assert retrieval.get_bm25_index(a) is first   # a becomes most recently used
+    retrieval.get_bm25_index(c)                   # evicts b, not a
+    assert len(retrieval._indexes) == 2
+    assert retrieval.get_bm25_index(a) is first
@@ -0,0 +1,40 @@
+import pytest
+from src import providers, utils
+
+@pytest.fixture
+def replay_dir(tmp_path):
+    return str(tmp_path)
+
+def test_make_provider_by_name():
+    provider = utils.make_provider("replay")
+    assert isinstance(provider, providers.ReplayProvider)
+    assert provider.name == "replay" and not provider.prefix_cache
+
+def test_unknown_provider_rejected():
+    with pytest.raises(ValueError, match="choose from gemini, ollama, replay"):
+        utils.make_provider("gpt")
+
+def test_set_provider_switches_later_calls(monkeypatch):
+    monkeypatch.setattr(utils, "_provider", None)
+    provider = utils.set_provider("replay")
+    assert utils.get_provider() is provider
+
+def test_replay_exact_prompt_before_stage_fallback(replay_dir):
+    providers.record("prompt A", "resume", '{"a": 1}', replay_dir)
+    providers.record("prompt B", "resume", '{"b": 2}', replay_dir)
+    replay = providers.ReplayProvider(replay_dir, latency=0)
+    assert replay.generate("prompt A", stage="resume") == ('{"a": 1}', None)
+    # An unseen prompt gets the stage's latest recording
+    assert replay.generate("prompt C", stage="resume") == ('{"b": 2}', None)
+
+def test_replay_key_includes_prefix(replay_dir):
+    providers.record("PREFIX|prompt", "interview", '{"hit": true}', replay_dir)
+    providers.record("other", "interview", '{"hit": false}', replay_dir)
+    replay = providers.ReplayProvider(replay_dir, latency=0)
+    assert replay.generate("prompt", stage="interview", prefix="PREFIX|")[0] == '{"hit": true}'
+    assert "".join(chunk for chunk, _ in replay.stream("prompt", stage="interview", prefix="PREFIX|")) == '{"hit": true}'
+
+def test_replay_missing_stage(replay_dir):
+    providers.record("prompt", "resume", "{}", replay_dir)
+    with pytest.raises(FileNotFoundError):
+        providers.ReplayProvider(replay_dir, latency=0).generate("unseen", stage="interview")
@@ -0,0 +1,89 @@
+import io
+import os
+import re
+import html
+import zipfile
+import xml.etree.ElementTree as ET
+from html.parser import HTMLParser
+import pytest
+import main1
+from src import renderers
+from bench.samples import sample_response, sample_static_data
+
+TRICKY = "R&D <fast> *bold* _under_ [link](x) #1 `code` 50% {b} | ~t~ \\ back"
+
+def _resume(**overrides):
+    static = sample_static_data()
+    resume = main1.clean_skills(main1.layout_check(main1.normalize_keys(sample_response(0)["resume"])))
+    data = {**static["contact_info"], **resume, "education": static["education"], "leadership": static["leadership"]}
+    data["experience"][0]["bullets"][0] = TRICKY
+    data.update(overrides)
+    return data
+
+def test_markdown_escaping_round_trips():
+    assert re.sub(r'\\(.)', r'\1', renderers.escape_markdown(TRICKY)) == TRICKY
+    md = renderers.render_text(_resume(name="Om *Asanani*"), "md")
+    assert md.startswith("# Om \\*Asanani\\*")
+    assert renderers.escape_markdown(TRICKY) in md
+    assert renderers.escape_markdown(7) == 7
+
+class _Tags(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.tags, self.text = set(), []
+
+    def handle_starttag(self, tag, attrs):
+        self.tags.add(tag)
+
+    def handle_data(self, data):
+        self.text.append(data)
+
+def test_html_is_escaped_and_round_trips():
+    page = renderers.render_text(_resume(name="<script>alert(1)</script> & Co"), "html")
+    parser = _Tags()
+    parser.feed(page)
+    assert "script" not in parser.tags
+    text = "".join(parser.text)
+    assert "<script>alert(1)</script> & Co" in text
+    assert html.escape(TRICKY, quote=False) in page or html.escape(TRICKY) in page
+    assert TRICKY in html.unescape(page)
+
+def test_txt_is_plain_with_whitespace_collapsed():
+    txt = renderers.render_text(_resume(name="Om\n  Asanani\t"), "txt")
+    assert "OM ASANANI" in txt and TRICKY in txt
+
+def _docx_parts(content):
+    with zipfile.ZipFile(io.BytesIO(content)) as docx:
+        assert docx.testzip() is None
+        return {name: ET.fromstring(docx.read(name)) for name in docx.namelist()}
+
+def test_docx_is_well_formed_xml_with_the_text():
+    parts = _docx_parts(renderers.render_docx(_resume()))
+    assert set(parts) == {"[Content_Types].xml", "_rels/.rels", "word/document.xml"}
+    ns = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+    text = "".join(t.text or "" for t in parts["word/document.xml"].iter(f"{ns}t"))
+    assert TRICKY in text
+
+def test_docx_strips_control_characters():
+    parts = _docx_parts(renderers.render_docx(_resume(name="Om\x00 As\x07ana\x1bni￾", phone="555\x0e-0100")))
+    ns = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+    text = "".join(t.text or "" for t in parts["word/document.xml"].iter(f"{ns}t"))
+    assert "Om Asanani" in text and "555-0100" in text
+
+def test_write_outputs_writes_each_text_format(tmp_path):
+    base = str(tmp_path / "out" / "Resume")
+    paths = renderers.write_outputs(_resume(), ["pdf", "md", "html", "txt", "docx"], base)
+    assert paths == {f: f"{base}.{f}" for f in ("md", "html", "txt", "docx")}
+    assert sorted(os.listdir(tmp_path / "out")) == ["Resume.docx", "Resume.html", "Resume.md", "Resume.txt"]
+
+def test_parse_formats():
+    assert renderers.parse_formats(" PDF, md ,") == ["pdf", "md"]
+    with pytest.raises(ValueError):
+        renderers.parse_formats("pdf,rtf")
+
+def test_prepare_resume_without_pdf_skips_latex_cleaning(capsys):
+    prepared = main1.prepare_resume(sample_response(0), sample_static_data(), pdf=False)
+    assert prepared["final_data"] is None
+    assert "LaTeX" not in capsys.readouterr().out
+    main1.prepare_resume(sample_response(0), sample_static_data(), pdf=True)
+    assert "LaTeX Cleaning" in capsys.readouterr().out
@@ -0,0 +1,22 @@
+import os
+import stat
+from src import resume_builder
+
+def _mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+def test_moved_pdf_gets_umask_mode_not_0600(tmp_path, monkeypatch):
+    src = tmp_path / "build.pdf"
+    src.write_bytes(b"%PDF-1.4")
+    for umask in (0o022, 0o002, 0o077):
+        monkeypatch.setattr(resume_builder, "_UMASK", umask)
+        dst = tmp_path / "out" / f"Resume_{umask:o}.pdf"
+        resume_builder._move_into_place(str(src), str(dst))
+        assert dst.read_bytes() == b"%PDF-1.4"
+        assert _mode(dst) == 0o666 & ~umask
+    assert not [name for name in os.listdir(tmp_path / "out") if name.endswith(".part")]
+
+def test_umask_matches_a_plain_open(tmp_path):
+    plain = tmp_path / "plain.pdf"
+    plain.write_bytes(b"x")
+    assert _mode(plain) == 0o666 & ~resume_builder._UMASK
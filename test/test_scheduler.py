@@ -0,0 +1,71 @@
+import time
+import pytest
+import threading
+from src import scheduler
+from src.scheduler import RateLimiter, SlidingWindow
+from bench.bench_ratelimit import max_in_window
+
+def _drain(window, amount, until):
+    """Takes `amount` as soon as it fits, in simulated time; returns the take times."""
+    now, times = 0.0, []
+    while now < until:
+        window.refill(now)
+        wait = window.wait_time(amount)
+        if wait <= 0:
+            window.take(amount); times.append(now)
+        else:
+            now += wait
+    return times
+
+@pytest.fixture(autouse=True)
+def minute_window(monkeypatch):
+    monkeypatch.setattr(scheduler, "WINDOW_S", 60.0)
+
+def test_cold_start_stays_within_budget():
+    times = _drain(SlidingWindow(30), 1, until=300)
+    assert max_in_window(times) == 30
+    assert len([t for t in times if t < 60]) == 30
+
+def test_wait_is_until_oldest_take_expires():
+    window = SlidingWindow(3)
+    for now in (0.0, 10.0, 20.0):
+        window.refill(now); window.take(1)
+    window.refill(25.0)
+    assert window.wait_time(1) == 35.0
+    assert window.wait_time(2) == 45.0
+    window.refill(60.0)
+    assert window.wait_time(1) == 0.0
+
+def test_amount_over_capacity_waits_for_empty_window():
+    window = SlidingWindow(100)
+    window.refill(0.0); window.take(10)
+    window.refill(1.0)
+    assert window.wait_time(500) == 59.0
+    window.refill(60.0)
+    assert window.wait_time(500) == 0.0
+
+def test_idle_then_burst_stays_within_budget():
+    window = SlidingWindow(10)
+    times = []
+    for now in [0.0] * 10 + [59.0] * 10 + [61.0] * 10:
+        window.refill(now)
+        if window.wait_time(1) <= 0:
+            window.take(1); times.append(now)
+    assert max_in_window(times) <= 10
+
+def test_limiter_threads_never_exceed_budget(monkeypatch):
+    monkeypatch.setattr(scheduler, "WINDOW_S", 0.5)
+    limiter = RateLimiter(requests_per_min=5, tokens_per_min=0)
+    times, lock = [], threading.Lock()
+
+    def worker():
+        for _ in range(3):
+            limiter.acquire()
+            with lock:
+                times.append(time.monotonic())
+
+    threads = [threading.Thread(target=worker) for _ in range(5)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert len(times) == 15
+    assert max_in_window(times, window=0.45) <= 5     # Some slack for the time between acquire and append
@@ -0,0 +1,53 @@
+import main1
+from src.portfolio import parse_portfolio, portfolio_for_jd, render_portfolio
+
+PORTFOLIO = """## EXPERIENCE_ENTRY
+Company: Acme Corp
+Role: Software Engineer Intern
+-- CONTENT --
+- Built a Kafka ingestion service handling 2M events/day
+
+## PROJECT_ENTRY
+Name: Pixel Art Editor
+- A React canvas editor with undo history
+"""
+
+JD = "Backend role: Python, Kafka and Redis for event ingestion."
+
+class FakeProvider:
+    prefix_cache = True
+
+    def __init__(self, handle):
+        self.handle = handle
+        self.prefixes = []
+
+    def cached_content(self, prefix):
+        self.prefixes.append(prefix)
+        return self.handle
+
+def _use(monkeypatch, provider):
+    monkeypatch.setattr(main1, "get_provider", lambda: provider)
+    monkeypatch.setattr(main1, "TOKEN_BUDGET", 0)
+
+def test_whole_portfolio_when_prefix_is_cached(monkeypatch):
+    index = parse_portfolio(PORTFOLIO)
+    provider = FakeProvider("cachedContents/abc")
+    _use(monkeypatch, provider)
+    assert main1.shares_prefix(index)
+    assert main1.fit_to_budget(JD, index) == (JD, render_portfolio(index))
+    assert provider.prefixes[0] == main1.build_tailor_prefix(render_portfolio(index))
+
+def test_bm25_selection_when_no_cache_handle(monkeypatch):
+    index = parse_portfolio(PORTFOLIO)
+    _use(monkeypatch, FakeProvider(None))
+    assert not main1.shares_prefix(index)
+    assert main1.fit_to_budget(JD, index) == (JD, portfolio_for_jd(index, JD))
+
+def test_no_cache_lookup_when_caching_off_or_budgeted(monkeypatch):
+    index = parse_portfolio(PORTFOLIO)
+    provider = FakeProvider("cachedContents/abc")
+    _use(monkeypatch, provider)
+    assert not main1.shares_prefix(index, budget=2000)
+    provider.prefix_cache = False
+    assert not main1.shares_prefix(index)
+    assert provider.prefixes == []